@@ -1,8 +1,7 @@
 import os
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, send_file
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, send_file, g
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
-from functools import wraps
+from functools import wraps, partial
 import logging
 import subprocess
 import threading
@@ -14,18 +13,29 @@ except ImportError:
     requests = None
 from datetime import datetime, timedelta
 from database_manager_hybrid import db_manager
-from permissions_manager import PermissionManager, require_permission, require_admin, get_user_role
+from permissions_manager import PermissionManager, require_permission, require_admin, get_user_role, invalidate_permissions
 from ticket_system import init_app as init_ticket_app
 from system_analytics import init_app as init_analytics_app
 from vehicle_gallery import init_app as init_vehicle_gallery_app
 from event_rsvp import init_app as init_event_rsvp_app
 from blog_system import init_app as init_blog_app
+from suggest_index import init_app as init_suggest_app, suggest_index
+from geo_index import init_app as init_geo_app, install_geo_index, DEFAULT_RADIUS_KM
+from upload_store import init_app as init_upload_store_app, upload_store
+from image_pipeline import init_app as init_image_app, save_image_upload, InvalidImage
+from chunked_upload import init_app as init_chunked_upload_app, check_image_upload
+from card_renderer import render_card_pngs, cards_zip
+from card_batch import init_app as init_card_batch_app
+from database_session import init_app as init_db_session, after_commit
+from query_metrics import init_app as init_query_metrics
+from database_schema_updates import create_indexes
+from dashboard_stats import dashboard_stats, EVENT_STATS_QUERY
+from stats_counters import install_counters
+import search_index
+import pagination
 from flask_mail import Mail, Message
 from dotenv import load_dotenv
-from PIL import Image, ImageDraw, ImageFont
 import io
-import zipfile
-import tempfile
 
 # Set DATABASE_URL for Netlify
 if os.environ.get('NETLIFY_DATABASE_URL'):
@@ -36,6 +46,10 @@ load_dotenv()
 
 app = Flask(__name__)
 
+# Share one database connection and transaction per request
+init_db_session(app)
+init_query_metrics(app)
+
 # Initialize ticket system
 init_ticket_app(app)
 
@@ -51,14 +65,61 @@ init_event_rsvp_app(app)
 # Initialize blog system
 init_blog_app(app)
 
+# Initialize typeahead suggestions
+init_suggest_app(app)
+
+# Initialize places geo API
+init_geo_app(app)
+
+# Initialize the content-addressed upload store and /media route
+init_upload_store_app(app)
+
+# Initialize responsive image variants
+init_image_app(app)
+
+# Initialize upload size limits and resumable chunked uploads
+init_chunked_upload_app(app)
+
+# Initialize bulk membership cards
+init_card_batch_app(app)
+
+# Card render workers are spawned, and re-run this file as __mp_main__ when
+# it was started directly; they only render, so skip the schema work there
+if __name__ != '__mp_main__':
+    # Make sure hot lookup columns are indexed
+    create_indexes()
+
+    # Keep dashboard counters maintained by database triggers
+    install_counters()
+
+    # Keep the full-text search indexes in sync with their tables
+    search_index.install_search_index()
+
+    # Keep the places geospatial index in sync with the places table
+    install_geo_index()
+
 # --- Promo Code Utilities and Routes ---
 
+MAX_PROMO_CODES_PER_BATCH = 50000
+
 def generate_promo_code():
     """Generate a promo code in the format XXXX-XXXX-XXXX"""
     raw_code = secrets.token_hex(6).upper()  # 12 hex chars
     # Format as XXXX-XXXX-XXXX
     return f"{raw_code[:4]}-{raw_code[4:8]}-{raw_code[8:12]}"
 
+def generate_unique_promo_codes(count):
+    """Generate count distinct promo codes
+
+    Codes are unique within the batch; a clash with an existing code (48
+    random bits, so vanishingly rare) is caught by the UNIQUE constraint and
+    fails the whole batch rather than inserting part of it.
+    """
+    codes = set()
+    while len(codes) < count:
+        codes.add(generate_promo_code())
+    return list(codes)
+
 @app.route('/promo_codes', methods=['GET', 'POST'])
 @require_admin
 def promo_codes():
@@ -66,6 +127,9 @@ def promo_codes():
         # Bulk generate promo codes
         try:
             count = int(request.form.get('count', 10))
+            if count < 1 or count > MAX_PROMO_CODES_PER_BATCH:
+                flash(f'Count must be between 1 and {MAX_PROMO_CODES_PER_BATCH}', 'error')
+                return render_template('promo_codes.html', promo_codes=[])
             discount_type = request.form.get('discount_type', 'percentage')
             discount_value = float(request.form.get('discount_value', 10))
             usage_limit = int(request.form.get('usage_limit', 1))
@@ -77,19 +141,18 @@ def promo_codes():
             created_by = session.get('user_id')
             created_date = datetime.now().date()
 
-            generated_codes = []
-            for _ in range(count):
-                code = generate_promo_code()
-                # Insert into promo_codes table
-                insert_query = """
-                    INSERT INTO promo_codes (Code, DiscountType, DiscountValue, UsageLimit, UsedCount, ExpirationDate, Status, CreatedBy, CreatedDate)
-                    VALUES (?, ?, ?, ?, 0, ?, 'active', ?, ?)
-                """
-                db_manager.execute_query(insert_query, [
-                    code, discount_type, discount_value, usage_limit,
-                    expiration_date, created_by, created_date
-                ])
-                generated_codes.append(code)
+            generated_codes = generate_unique_promo_codes(count)
+
+            # Insert all codes in one transaction
+            insert_query = """
+                INSERT INTO promo_codes (Code, DiscountType, DiscountValue, UsageLimit, UsedCount, ExpirationDate, Status, CreatedBy, CreatedDate)
+                VALUES (?, ?, ?, ?, 0, ?, 'active', ?, ?)
+            """
+            db_manager.execute_many(insert_query, [
+                (code, discount_type, discount_value, usage_limit,
+                 expiration_date, created_by, created_date)
+                for code in generated_codes
+            ])
 
             flash(f'Successfully generated {count} promo codes.', 'success')
             return render_template('promo_codes.html', promo_codes=generated_codes)
@@ -175,35 +238,42 @@ else:
 
 logger = logging.getLogger(__name__)
 
+def get_current_user():
+    """Logged-in user with role and permissions, loaded once per request"""
+    if 'user_id' not in session:
+        return None
+    if 'current_user' in g:
+        return g.current_user
+
+    current_user = None
+    try:
+        user = db_manager.execute_query(
+            "SELECT * FROM members WHERE MemberID = ?",
+            [session['user_id']]
+        )
+        if user:
+            user_data = user[0]
+            permissions = PermissionManager.get_user_permissions(session['user_id'])
+            role = get_user_role(session['user_id'])
+            current_user = {
+                'id': user_data[0],
+                'username': user_data[1],
+                'email': user_data[3],
+                'first_name': user_data[4],
+                'last_name': user_data[5],
+                'role': role,
+                'permissions': permissions
+            }
+    except Exception as e:
+        logger.error(f"Error getting current user: {e}")
+        return None
+
+    g.current_user = current_user
+    return current_user
+
 # Context processor to make user available in templates
 @app.context_processor
 def inject_user():
-    def get_current_user():
-        if 'user_id' in session:
-            try:
-                user = db_manager.execute_query(
-                    "SELECT * FROM members WHERE MemberID = ?",
-                    [session['user_id']]
-                )
-                if user:
-                    user_data = user[0]
-                    permissions = PermissionManager.get_user_permissions(session['user_id'])
-                    role = get_user_role(session['user_id'])
-                    return {
-                        'id': user_data[0],
-                        'username': user_data[1],
-                        'email': user_data[3],
-                        'first_name': user_data[4],
-                        'last_name': user_data[5],
-                        'role': role,
-                        'permissions': permissions
-                    }
-                return None
-            except Exception as e:
-                logger.error(f"Error getting current user: {e}")
-                return None
-        return None
-    
     return dict(current_user=get_current_user())
 
 
@@ -287,6 +357,7 @@ def register():
             result = db_manager.register_user(username, email, password, first_name, last_name)
             
             if result['success']:
+                after_commit(partial(suggest_index.add_member, username))
                 flash('Registration successful! Please log in.', 'success')
                 return redirect(url_for('login'))
             else:
@@ -311,27 +382,16 @@ def dashboard():
             return render_template('index_member.html', events=events, places=places)
 
         # Admin/Moderator dashboard - show full dashboard
-        total_members = db_manager.execute_query("SELECT COUNT(*) FROM members")[0][0]
-        total_vehicles = db_manager.execute_query("SELECT COUNT(*) FROM vehicles")[0][0]
-        upcoming_events = db_manager.execute_query("SELECT COUNT(*) FROM events WHERE EventDate >= DATE()")[0][0]
-
-        # Get ticket statistics for admin dashboard
-        total_tickets = db_manager.execute_query("SELECT COUNT(*) FROM tickets")[0][0] if db_manager.table_exists('tickets') else 0
-        valid_tickets = db_manager.execute_query("SELECT COUNT(*) FROM tickets WHERE Status = 'valid'")[0][0] if db_manager.table_exists('tickets') else 0
-        used_tickets = db_manager.execute_query("SELECT COUNT(*) FROM tickets WHERE Status = 'used'")[0][0] if db_manager.table_exists('tickets') else 0
-
-        # Calculate total revenue
-        revenue_result = db_manager.execute_query("SELECT SUM(Price) FROM tickets WHERE Status IN ('valid', 'used')")[0][0] if db_manager.table_exists('tickets') else 0
-        total_revenue = revenue_result if revenue_result else 0
+        stats = dashboard_stats.get()
 
         return render_template('dashboard.html',
-                           total_members=total_members,
-                           total_vehicles=total_vehicles,
-                           upcoming_events=upcoming_events,
-                           total_tickets=total_tickets,
-                           valid_tickets=valid_tickets,
-                           used_tickets=used_tickets,
-                           total_revenue=total_revenue)
+                           total_members=stats['total_members'],
+                           total_vehicles=stats['total_vehicles'],
+                           upcoming_events=stats['upcoming_events'],
+                           total_tickets=stats['total_tickets'],
+                           valid_tickets=stats['valid_tickets'],
+                           used_tickets=stats['used_tickets'],
+                           total_revenue=stats['total_revenue'])
     except Exception as e:
         logger.error(f"Dashboard error: {e}")
         return render_template('dashboard.html',
@@ -348,24 +408,42 @@ def dashboard():
 def members():
     try:
         search = request.args.get('search', '')
-        sort_by = request.args.get('sort_by', 'Username')
+        # Search results are ordered by relevance unless a sort is asked for;
+        # without a search there is nothing to rank
+        sort_by = request.args.get('sort_by') or ('relevance' if search else 'Username')
+        if sort_by == 'relevance' and not search:
+            sort_by = 'Username'
         
-        query = "SELECT * FROM members"
+        per_page = pagination.page_size(request.args.get('per_page'))
+        conditions = []
         params = []
         
         if search:
-            query += " WHERE Username LIKE ? OR FirstName LIKE ? OR LastName LIKE ?"
-            search_param = f'%{search}%'
-            params.extend([search_param, search_param, search_param])
-        
-        if sort_by == 'Username':
-            query += " ORDER BY Username"
-        elif sort_by == 'JoinDate':
-            query += " ORDER BY JoinDate DESC"
+            member_ids = search_index.search('members', search)
+            condition, params = search_index.key_filter('MemberID', member_ids)
+            conditions.append(condition)
         
-        members = db_manager.execute_query(query, params)
+        prev_url = next_url = None
+        if sort_by == 'relevance':
+            # Bounded by the search limit; ranked results are not paged
+            query = "SELECT * FROM members WHERE " + ' AND '.join(conditions)
+            members = search_index.order_by_rank(db_manager.execute_query(query, params), member_ids)
+        else:
+            if sort_by == 'JoinDate':
+                order, descending = [pagination.date_key('JoinDate'), 'MemberID'], True
+            else:
+                sort_by = 'Username'
+                order, descending = ['Username', 'MemberID'], False
+            members, prev_cursor, next_cursor = pagination.keyset_page(
+                '*', 'members', order, conditions, params, descending,
+                before=request.args.get('before'), after=request.args.get('after'), per_page=per_page
+            )
+            prev_url, next_url = pagination.page_urls(
+                'members', prev_cursor, next_cursor, search=search, sort_by=sort_by, per_page=request.args.get('per_page')
+            )
         
-        return render_template('members.html', members=members, search=search, sort_by=sort_by)
+        return render_template('members.html', members=members, search=search, sort_by=sort_by,
+                               prev_url=prev_url, next_url=next_url)
     except Exception as e:
         logger.error(f"Members error: {e}")
         return render_template('members.html', members=[], search='', sort_by='Username')
@@ -384,21 +462,24 @@ def edit_member(member_id):
             profile_picture = request.form.get('profile_picture', '').strip()
             location = request.form.get('location', '').strip()
 
+            # Validate required fields
+            if not all([username, email, first_name, last_name]):
+                flash('Username, email, first name, and last name are required', 'error')
+                return redirect(url_for('edit_member', member_id=member_id))
+
             # Handle file upload
+            uploaded = False
             if 'profile_picture_file' in request.files:
                 file = request.files['profile_picture_file']
                 if file and file.filename:
-                    filename = secure_filename(file.filename)
-                    upload_dir = os.path.join(app.root_path, 'static', 'uploads')
-                    os.makedirs(upload_dir, exist_ok=True)
-                    file_path = os.path.join(upload_dir, filename)
-                    file.save(file_path)
-                    profile_picture = f'/static/uploads/{filename}'
+                    try:
+                        profile_picture = save_image_upload(file, 'profile_picture')
+                        uploaded = True
+                    except InvalidImage as e:
+                        flash(f'Profile picture rejected: {e}', 'error')
+                        return redirect(url_for('edit_member', member_id=member_id))
 
-            # Validate required fields
-            if not all([username, email, first_name, last_name]):
-                flash('Username, email, first name, and last name are required', 'error')
-                return redirect(url_for('edit_member', member_id=member_id))
+            current = db_manager.execute_query("SELECT ProfilePicture FROM members WHERE MemberID = ?", [member_id])
 
             # Update member in the database
             update_query = """
@@ -413,9 +494,13 @@ def edit_member(member_id):
             )
 
             if result:
+                upload_store.replace(current[0][0] if current else None, profile_picture, counted=uploaded)
+                after_commit(partial(suggest_index.invalidate, 'username'))
                 flash('Member updated successfully!', 'success')
                 return redirect(url_for('members'))
             else:
+                if uploaded:
+                    upload_store.release(profile_picture)
                 flash('Failed to update member. Please try again.', 'error')
                 return redirect(url_for('edit_member', member_id=member_id))
 
@@ -439,28 +524,41 @@ def vehicles():
         search = request.args.get('search', '')
         make_filter = request.args.get('make', '')
         
-        query = """
-            SELECT v.*, m.FirstName, m.LastName 
-            FROM vehicles v 
-            JOIN members m ON v.MemberID = m.MemberID
-        """
+        columns = "v.*, m.FirstName, m.LastName"
+        from_clause = "vehicles v JOIN members m ON v.MemberID = m.MemberID"
+        conditions = []
         params = []
         
         if search:
-            query += " WHERE v.Make LIKE ? OR v.Model LIKE ? OR m.FirstName LIKE ? OR m.LastName LIKE ?"
-            search_param = f'%{search}%'
-            params.extend([search_param, search_param, search_param, search_param])
+            # Vehicles matching the search, then vehicles of owners matching it
+            vehicle_ids = search_index.search('vehicles', search)
+            owner_ids = search_index.search('members', search)
+            vehicle_condition, vehicle_params = search_index.key_filter('v.id', vehicle_ids)
+            owner_condition, owner_params = search_index.key_filter('v.MemberID', owner_ids)
+            conditions.append(f"({vehicle_condition} OR {owner_condition})")
+            params.extend(vehicle_params + owner_params)
         
         if make_filter:
-            if search:
-                query += " AND v.Make = ?"
-            else:
-                query += " WHERE v.Make = ?"
+            conditions.append("v.Make = ?")
             params.append(make_filter)
         
-        vehicles = db_manager.execute_query(query, params)
+        prev_url = next_url = None
+        if search:
+            # Bounded by the search limit; ranked results are not paged
+            query = f"SELECT {columns} FROM {from_clause} WHERE {' AND '.join(conditions)}"
+            vehicles = search_index.order_by_rank(db_manager.execute_query(query, params), vehicle_ids)
+        else:
+            vehicles, prev_cursor, next_cursor = pagination.keyset_page(
+                columns, from_clause, ['v.id'], conditions, params,
+                before=request.args.get('before'), after=request.args.get('after'),
+                per_page=pagination.page_size(request.args.get('per_page'))
+            )
+            prev_url, next_url = pagination.page_urls(
+                'vehicles', prev_cursor, next_cursor, make=make_filter, per_page=request.args.get('per_page')
+            )
         
-        return render_template('vehicles.html', vehicles=vehicles, search=search, make_filter=make_filter)
+        return render_template('vehicles.html', vehicles=vehicles, search=search, make_filter=make_filter,
+                               prev_url=prev_url, next_url=next_url)
     except Exception as e:
         logger.error(f"Vehicles error: {e}")
         return render_template('vehicles.html', vehicles=[], search='', make_filter='')
@@ -520,6 +618,7 @@ def edit_vehicle(vehicle_id):
         )
         
         if result:
+            after_commit(partial(suggest_index.invalidate, 'make', 'model', 'make_model'))
             flash('Vehicle updated successfully!', 'success')
             return redirect(url_for('vehicles'))
         else:
@@ -537,7 +636,12 @@ def edit_vehicle(vehicle_id):
 @app.route('/places')
 def places():
     try:
-        places = db_manager.execute_query("SELECT * FROM places")
+        places, prev_cursor, next_cursor = pagination.keyset_page(
+            '*', 'places', ['Name', 'PlaceID'],
+            before=request.args.get('before'), after=request.args.get('after'),
+            per_page=pagination.page_size(request.args.get('per_page'))
+        )
+        prev_url, next_url = pagination.page_urls('places', prev_cursor, next_cursor, per_page=request.args.get('per_page'))
         # Prepare map links for each place if latitude and longitude are available
         places_with_links = []
         for place in places:
@@ -560,10 +664,11 @@ def places():
                 'longitude': lon,
                 'map_link': map_link
             })
-        return render_template('places.html', places=places_with_links)
+        return render_template('places.html', places=places_with_links, prev_url=prev_url, next_url=next_url,
+                               nearby_radius_km=DEFAULT_RADIUS_KM)
     except Exception as e:
         logger.error(f"Places error: {e}")
-    return render_template('places.html', places=[])
+    return render_template('places.html', places=[], nearby_radius_km=DEFAULT_RADIUS_KM)
 
 @app.route('/events')
 def events():
@@ -571,38 +676,48 @@ def events():
         search = request.args.get('search', '')
         filter_type = request.args.get('filter', '')
 
-        query = "SELECT * FROM events"
+        conditions = []
         params = []
 
         if search:
-            query += " WHERE Title LIKE ? OR Description LIKE ? OR Location LIKE ?"
-            search_param = f'%{search}%'
-            params.extend([search_param, search_param, search_param])
+            event_ids = search_index.search('events', search)
+            condition, params = search_index.key_filter('EventID', event_ids)
+            conditions.append(condition)
 
         if filter_type == 'upcoming':
-            if search:
-                query += " AND EventDate >= DATE()"
-            else:
-                query += " WHERE EventDate >= DATE()"
+            conditions.append("EventDate >= DATE()")
         elif filter_type == 'past':
-            if search:
-                query += " AND EventDate < DATE()"
-            else:
-                query += " WHERE EventDate < DATE()"
+            conditions.append("EventDate < DATE()")
 
-        query += " ORDER BY EventDate DESC"
-        events = db_manager.execute_query(query, params)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        prev_url = next_url = None
+        if search:
+            # Bounded by the search limit; ranked results are not paged
+            events = db_manager.execute_query("SELECT * FROM events" + where, params)
+            events = search_index.order_by_rank(events, event_ids)
+        else:
+            events, prev_cursor, next_cursor = pagination.keyset_page(
+                '*', 'events', ['EventDate', 'EventID'], conditions, params, descending=True,
+                before=request.args.get('before'), after=request.args.get('after'),
+                per_page=pagination.page_size(request.args.get('per_page'))
+            )
+            prev_url, next_url = pagination.page_urls(
+                'events', prev_cursor, next_cursor, filter=filter_type, per_page=request.args.get('per_page')
+            )
 
-        # Calculate stats
-        upcoming_events_count = len([e for e in events if e[2] >= str(datetime.now().date())]) if events else 0
-        past_events_count = len([e for e in events if e[2] < str(datetime.now().date())]) if events else 0
+        # Counts cover every matching event, not just this page
+        stats = db_manager.execute_query(EVENT_STATS_QUERY + where, params)[0]
+        upcoming_events_count = stats[1] or 0
+        past_events_count = stats[0] - upcoming_events_count
 
         return render_template('events.html',
                              events=events,
                              search=search,
                              filter=filter_type,
                              upcoming_events_count=upcoming_events_count,
-                             past_events_count=past_events_count)
+                             past_events_count=past_events_count,
+                             prev_url=prev_url,
+                             next_url=next_url)
     except Exception as e:
         logger.error(f"Events error: {e}")
     return render_template('events.html', events=[], search='', filter='', upcoming_events_count=0, past_events_count=0)
@@ -674,6 +789,7 @@ def add_vehicle():
             )
             
             if result:
+                after_commit(partial(suggest_index.add_vehicle, make, model))
                 flash(f'Vehicle "{make} {model}" registered successfully! You can add another vehicle below.', 'success')
                 # Clear form data by redirecting back to add_vehicle
                 return redirect(url_for('add_vehicle'))
@@ -848,6 +964,8 @@ def update_permissions():
                 [user_id, can_edit_members, can_post_events, can_manage_vehicles]
             )
 
+        invalidate_permissions(user_id)
+
         if result:
             logger.info(f"Permissions updated for user ID {user_id}")
             return jsonify({'success': True, 'message': 'Permissions updated successfully'})
@@ -894,21 +1012,24 @@ def edit_profile():
             profile_picture = request.form.get('profile_picture', '').strip()
             location = request.form.get('location', '').strip()
 
+            # Validate input
+            if not all([first_name, last_name, email]):
+                flash('First name, last name, and email are required', 'error')
+                return redirect(url_for('edit_profile'))
+
             # Handle file upload
+            uploaded = False
             if 'profile_picture_file' in request.files:
                 file = request.files['profile_picture_file']
                 if file and file.filename:
-                    filename = secure_filename(file.filename)
-                    upload_dir = os.path.join(app.root_path, 'static', 'uploads')
-                    os.makedirs(upload_dir, exist_ok=True)
-                    file_path = os.path.join(upload_dir, filename)
-                    file.save(file_path)
-                    profile_picture = f'/static/uploads/{filename}'
+                    try:
+                        profile_picture = save_image_upload(file, 'profile_picture')
+                        uploaded = True
+                    except InvalidImage as e:
+                        flash(f'Profile picture rejected: {e}', 'error')
+                        return redirect(url_for('edit_profile'))
 
-            # Validate input
-            if not all([first_name, last_name, email]):
-                flash('First name, last name, and email are required', 'error')
-                return redirect(url_for('edit_profile'))
+            current = db_manager.execute_query("SELECT ProfilePicture FROM members WHERE MemberID = ?", [session['user_id']])
 
             # Update user
             update_query = """
@@ -923,9 +1044,12 @@ def edit_profile():
             )
 
             if result:
+                upload_store.replace(current[0][0] if current else None, profile_picture, counted=uploaded)
                 flash('Profile updated successfully!', 'success')
                 return redirect(url_for('profile'))
             else:
+                if uploaded:
+                    upload_store.release(profile_picture)
                 flash('Failed to update profile', 'error')
 
         except Exception as e:
@@ -1019,25 +1143,7 @@ def ticket_dashboard():
     """Display ticket dashboard with analytics and management - Admin Only"""
     try:
         # Get ticket statistics
-        total_tickets = db_manager.execute_query("SELECT COUNT(*) FROM tickets")[0][0]
-
-        valid_tickets = db_manager.execute_query(
-            "SELECT COUNT(*) FROM tickets WHERE Status = 'valid'"
-        )[0][0]
-
-        used_tickets = db_manager.execute_query(
-            "SELECT COUNT(*) FROM tickets WHERE Status = 'used'"
-        )[0][0]
-
-        expired_tickets = db_manager.execute_query(
-            "SELECT COUNT(*) FROM tickets WHERE Status = 'expired'"
-        )[0][0]
-
-        # Calculate total revenue
-        revenue_result = db_manager.execute_query(
-            "SELECT SUM(Price) FROM tickets WHERE Status IN ('valid', 'used')"
-        )[0][0]
-        total_revenue = revenue_result if revenue_result else 0
+        stats = dashboard_stats.get()
 
         # Get recent tickets with event info
         tickets = db_manager.execute_query("""
@@ -1049,11 +1155,11 @@ def ticket_dashboard():
         """)
 
         return render_template('ticket_dashboard.html',
-                             total_tickets=total_tickets,
-                             valid_tickets=valid_tickets,
-                             used_tickets=used_tickets,
-                             expired_tickets=expired_tickets,
-                             total_revenue=total_revenue,
+                             total_tickets=stats['total_tickets'],
+                             valid_tickets=stats['valid_tickets'],
+                             used_tickets=stats['used_tickets'],
+                             expired_tickets=stats['expired_tickets'],
+                             total_revenue=stats['total_revenue'],
                              tickets=tickets)
 
     except Exception as e:
@@ -1273,6 +1379,7 @@ def add_place():
             )
 
             if result:
+                after_commit(partial(suggest_index.add_place, name))
                 flash(f'Place "{name}" added successfully! You can add another place below.', 'success')
                 # Clear form data by redirecting back to add_place
                 return redirect(url_for('add_place'))
@@ -1407,119 +1514,6 @@ def reset_password(token):
 
     return render_template('reset_password.html', token=token)
 
-def generate_ssm_card(role, member_name, signature, birthdate, member_id, car_photo, plate='', model='', reason=''):
-    """Generate SSM card images using PIL"""
-    # Card dimensions (standard ID card size)
-    width, height = 300, 180
-
-    # Create front card
-    front_card = Image.new('RGB', (width, height), 'black')
-    front_draw = ImageDraw.Draw(front_card)
-
-    # Load fonts (using default if Orbitron not available)
-    try:
-        title_font = ImageFont.truetype("Orbitron-Bold.ttf", 24)
-        text_font = ImageFont.truetype("arial.ttf", 12)
-    except:
-        title_font = ImageFont.load_default()
-        text_font = ImageFont.load_default()
-
-    # Front card design
-    # Metallic accent stripe
-    if role == 'OWNER':
-        accent_color = (255, 215, 0)  # Gold
-    elif role == 'DRIVER':
-        accent_color = (192, 192, 192)  # Silver
-    else:  # HONORARY_GUEST
-        accent_color = (50, 205, 50)  # Green
-
-    front_draw.rectangle([0, 0, width, 30], fill=accent_color)
-
-    # Role name
-    front_draw.text((width//2, 45), role.replace('_', ' '), fill='white', font=title_font, anchor='mm')
-
-    # Signature space
-    front_draw.text((width//2, height-20), f"Signature: {signature}", fill='white', font=text_font, anchor='mm')
-
-    # Create back card
-    back_card = Image.new('RGB', (width, height), (20, 20, 20))
-    back_draw = ImageDraw.Draw(back_card)
-
-    # Process car photo
-    if car_photo:
-        try:
-            car_image = Image.open(car_photo)
-            car_image = car_image.resize((int(width * 0.6), int(height * 0.6)))
-            back_card.paste(car_image, (10, 10))
-        except Exception as e:
-            logger.error(f"Error processing car photo: {e}")
-
-    # SSM watermark
-    back_draw.text((width-30, 10), 'SSM', fill=(255, 255, 255, 50), font=title_font)
-
-    # Member information based on role
-    info_y = height - 80
-    back_draw.text((10, info_y), f"Name: {member_name}", fill='white', font=text_font)
-    info_y += 15
-    back_draw.text((10, info_y), f"Birthdate: {birthdate}", fill='white', font=text_font)
-    info_y += 15
-    back_draw.text((10, info_y), f"ID: {member_id}", fill='white', font=text_font)
-
-    if role == 'DRIVER':
-        info_y += 15
-        back_draw.text((10, info_y), f"Plate: {plate}", fill='white', font=text_font)
-        info_y += 15
-        back_draw.text((10, info_y), f"Model: {model}", fill='white', font=text_font)
-    elif role == 'HONORARY_GUEST':
-        info_y += 15
-        back_draw.text((10, info_y), f"Reason: {reason}", fill='white', font=text_font)
-
-    return front_card, back_card
-
-@app.route('/download_cards')
-@login_required
-def download_cards():
-    """Serve generated card images for download"""
-    front_path = session.get('card_front')
-    back_path = session.get('card_back')
-
-    if not front_path or not back_path:
-        flash('No cards available for download', 'error')
-        return redirect(url_for('create_cards'))
-
-    try:
-        # Create ZIP file with both cards
-        zip_buffer = io.BytesIO()
-
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            zip_file.write(front_path, 'front_card.png')
-            zip_file.write(back_path, 'back_card.png')
-
-        zip_buffer.seek(0)
-
-        # Clean up temporary files
-        try:
-            os.remove(front_path)
-            os.remove(back_path)
-        except:
-            pass
-
-        # Clear session
-        session.pop('card_front', None)
-        session.pop('card_back', None)
-
-        return send_file(
-            zip_buffer,
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name='ssm_cards.zip'
-        )
-
-    except Exception as e:
-        logger.error(f"Download error: {e}")
-        flash('Error downloading cards', 'error')
-        return redirect(url_for('create_cards'))
-
 @app.route('/create_cards', methods=['GET', 'POST'])
 @login_required
 def create_cards():
@@ -1551,33 +1545,31 @@ def create_cards():
                 flash('Reason is required for guest status', 'error')
                 return redirect(url_for('create_cards'))
 
-            # Generate card images
-            front_image, back_image = generate_ssm_card(
+            try:
+                check_image_upload(car_photo, 'card_photo')
+            except InvalidImage as e:
+                flash(f'Car photo rejected: {e}', 'error')
+                return redirect(url_for('create_cards'))
+
+            # Render both sides in memory and send them as one ZIP
+            front_png, back_png = render_card_pngs(
                 role=role,
                 member_name=member_name,
                 signature=signature,
                 birthdate=birthdate,
                 member_id=member_id,
-                car_photo=car_photo,
+                car_photo=car_photo.stream,
                 plate=plate,
                 model=model,
                 reason=reason
             )
 
-            # Save images temporarily
-            temp_dir = tempfile.mkdtemp()
-            front_path = os.path.join(temp_dir, 'front.png')
-            back_path = os.path.join(temp_dir, 'back.png')
-
-            front_image.save(front_path)
-            back_image.save(back_path)
-
-            # Store paths in session for download
-            session['card_front'] = front_path
-            session['card_back'] = back_path
-
-            flash('Cards generated successfully!', 'success')
-            return redirect(url_for('download_cards'))
+            return send_file(
+                io.BytesIO(cards_zip([('front_card.png', front_png), ('back_card.png', back_png)])),
+                mimetype='application/zip',
+                as_attachment=True,
+                download_name='ssm_cards.zip'
+            )
 
         except Exception as e:
             logger.error(f"Card generation error: {e}")
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Load test and benchmark harness for the SuliStreetMeet ticket system
+
+Seeds a scratch database with events and tickets, then drives the purchase,
+QR fetch and gate scan endpoints, first through Flask's test client (the app
+alone) and then over HTTP against an in-process threaded server (the app plus
+the HTTP stack). Every request to send is generated before the clock starts,
+so the numbers measure the server and not the load generator. Results are
+p50/p95/p99 latency and throughput per endpoint, written as JSON that can be
+kept and diffed between releases:
+
+    python benchmark_ticket_system.py --events 5 --tickets 2000 --requests 500 --out bench.json
+    python benchmark_ticket_system.py --baseline bench.json
+
+SQLite runs use a temporary database file. With --backend postgres the
+database in BENCH_DATABASE_URL is used, since its tickets table is dropped
+and recreated; the app's DATABASE_URL is not used, and the run is refused
+when both name the same database.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import http.client
+from datetime import datetime
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = ['purchase', 'qr', 'qr_cached', 'scan']
+MODES = ['testclient', 'http']
+# Scans that hit a ticket already scanned in the run, like a guest trying twice
+DEFAULT_REPEAT_RATIO = 0.1
+
+
+def seed_database(ticket_system, events, tickets_per_event, seed=1):
+    """Recreate the tickets table and fill it with valid tickets
+
+    Returns (event IDs, ticket IDs).
+    """
+    db = ticket_system.db_manager
+    rng = random.Random(seed)
+
+    db.execute_query("DROP TABLE IF EXISTS tickets")
+    ticket_system.init_ticket_table()
+
+    if not db.execute_query("SELECT MemberID FROM members WHERE Username = 'bench'"):
+        db.execute_query(
+            "INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES ('bench', 'x', 'bench@example.com', 'Bench', 'Mark')"
+        )
+    member_id = db.execute_query("SELECT MemberID FROM members WHERE Username = 'bench'")[0][0]
+
+    db.execute_many(
+        "INSERT INTO events (Title, Description, Location, EventDate, CreatedBy) VALUES (?, ?, ?, ?, ?)",
+        [(f"Bench Meet {n}", 'Benchmark event', 'Test Track', '2099-01-01', member_id) for n in range(events)]
+    )
+    event_ids = [row[0] for row in db.execute_query(
+        "SELECT EventID FROM events WHERE Title LIKE 'Bench Meet %' ORDER BY EventID DESC LIMIT ?", [events]
+    )]
+
+    ticket_ids = []
+    for event_id in event_ids:
+        rows = []
+        for n in range(tickets_per_event):
+            ticket_id = f"B{event_id:04d}{n:08d}{rng.randrange(16 ** 4):04X}"
+            purchase_date = f"2099-01-01 {n // 3600 % 24:02d}:{n // 60 % 60:02d}:{n % 60:02d}"
+            rows.append((ticket_id, event_id, f"Guest {n}", f"guest{n}@example.com", '', 10.0, purchase_date, ticket_id))
+            ticket_ids.append(ticket_id)
+        db.execute_many("""
+            INSERT INTO tickets (TicketID, EventID, BuyerName, BuyerEmail, BuyerPhone, Price, PurchaseDate, QRCode, Status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'valid')
+        """, rows)
+    return event_ids, ticket_ids
+
+
+def reset_tickets(ticket_system, ticket_ids):
+    """Put the seeded tickets back to valid and drop every warm cache"""
+    ticket_system.db_manager.execute_query(
+        "UPDATE tickets SET Status = 'valid', ScannedAt = NULL, ScannedBy = NULL WHERE Status = 'used'"
+    )
+    ticket_system.used_tickets.clear()
+    from qr_cache import QRImageCache
+    ticket_system.qr_image_cache = QRImageCache(directory=tempfile.mkdtemp(prefix='bench_qr_'))
+
+
+def build_plan(event_ids, ticket_ids, requests, repeat_ratio=DEFAULT_REPEAT_RATIO, seed=1):
+    """Every request of a run, per endpoint, as (method, path, body, headers)"""
+    rng = random.Random(seed)
+    sample = rng.sample(ticket_ids, requests)
+
+    purchases = []
+    for n in range(requests):
+        body = urlencode({'buyer_name': f"Buyer {n}", 'buyer_email': f"buyer{n}@example.com", 'price': '10.00'})
+        purchases.append(('POST', f"/ticket/buy_ticket/{rng.choice(event_ids)}", body,
+                          {'Content-Type': 'application/x-www-form-urlencoded'}))
+
+    scans = []
+    for n, ticket_id in enumerate(sample):
+        if n and rng.random() < repeat_ratio:
+            ticket_id = rng.choice(sample[:n])
+        body = json.dumps({'ticket_id': f"TICKET:{ticket_id}"})
+        scans.append(('POST', '/ticket/api/scan_ticket', body, {'Content-Type': 'application/json'}))
+
+    qr = [('GET', f"/ticket/ticket/qr/{ticket_id}", None, {}) for ticket_id in sample]
+    return {
+        'purchase': purchases,
+        'qr': qr,
+        # The same images again, now served from the QR cache
+        'qr_cached': list(qr),
+        'scan': scans,
+    }
+
+
+def summarize(latencies, errors, elapsed):
+    """Latency percentiles in milliseconds and throughput in requests/second"""
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)] * 1000, 3)
+
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else None,
+        'throughput_rps': round(len(ordered) / elapsed, 1) if elapsed else None,
+    }
+
+
+def run_jobs(jobs, send, concurrency):
+    """Send every job from a pool of threads; send returns the status code"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(job):
+        started = time.perf_counter()
+        try:
+            status = send(job)
+        except Exception:
+            status = None
+        duration = time.perf_counter() - started
+        with lock:
+            latencies.append(duration)
+            if status is None or status >= 400:
+                errors.append(status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, jobs))
+    return summarize(latencies, len(errors), time.perf_counter() - started)
+
+
+def test_client_sender(app):
+    local = threading.local()
+
+    def send(job):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        method, path, body, headers = job
+        return local.client.open(path, method=method, data=body, headers=headers).status_code
+
+    return send
+
+
+def http_sender(host, port):
+    def send(job):
+        method, path, body, headers = job
+        # The development server closes the connection after each response
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        finally:
+            conn.close()
+
+    return send
+
+
+def run_benchmark(app, ticket_system, event_ids, ticket_ids, requests, concurrency, modes=MODES,
+                  repeat_ratio=DEFAULT_REPEAT_RATIO):
+    """Run every endpoint in every mode and return the results by mode"""
+    plan = build_plan(event_ids, ticket_ids, requests, repeat_ratio)
+    results = {}
+    for mode in modes:
+        reset_tickets(ticket_system, ticket_ids)
+        if mode == 'testclient':
+            results[mode] = {name: run_jobs(plan[name], test_client_sender(app), concurrency) for name in ENDPOINTS}
+            continue
+
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            sender = http_sender('127.0.0.1', server.server_port)
+            results[mode] = {name: run_jobs(plan[name], sender, concurrency) for name in ENDPOINTS}
+        finally:
+            server.shutdown()
+            thread.join()
+    return results
+
+
+def compare(baseline, current):
+    """Print p95 and throughput changes against an earlier result file"""
+    for mode, endpoints in current['results'].items():
+        for name, stats in endpoints.items():
+            before = baseline.get('results', {}).get(mode, {}).get(name)
+            if not before or not before.get('p95_ms') or not before.get('throughput_rps'):
+                continue
+            p95_change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            rps_change = (stats['throughput_rps'] - before['throughput_rps']) / before['throughput_rps'] * 100
+            print(f"{mode:<11} {name:<10} p95 {before['p95_ms']:>9.2f} -> {stats['p95_ms']:>9.2f} ms ({p95_change:+.1f}%)"
+                  f"   throughput {before['throughput_rps']:>8.1f} -> {stats['throughput_rps']:>8.1f} rps ({rps_change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ticket purchase, QR and scan endpoints")
+    parser.add_argument('--backend', choices=['sqlite', 'postgres'], default='sqlite',
+                        help="sqlite uses a temporary file; postgres uses BENCH_DATABASE_URL")
+    parser.add_argument('--events', type=int, default=5, help="Events to seed")
+    parser.add_argument('--tickets', type=int, default=2000, help="Tickets to seed per event")
+    parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint and mode")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients")
+    parser.add_argument('--repeat-ratio', type=float, default=DEFAULT_REPEAT_RATIO,
+                        help="Share of scans that repeat an already scanned ticket")
+    parser.add_argument('--mode', choices=MODES + ['both'], default='both', help="Test client, HTTP or both")
+    parser.add_argument('--out', help="Write the JSON results to this file instead of stdout")
+    parser.add_argument('--baseline', help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    if args.requests > args.events * args.tickets:
+        parser.error("--requests cannot exceed the number of seeded tickets (--events x --tickets)")
+
+    if args.backend == 'sqlite':
+        os.environ.pop('DATABASE_URL', None)
+        os.environ.pop('NETLIFY_DATABASE_URL', None)
+        os.environ['SQLITE_DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='bench_db_'), 'benchmark.db')
+    else:
+        bench_url = os.environ.get('BENCH_DATABASE_URL', '')
+        if 'postgres' not in bench_url:
+            parser.error("--backend postgres needs BENCH_DATABASE_URL pointing at a scratch PostgreSQL database")
+        if bench_url in (os.environ.get('DATABASE_URL'), os.environ.get('NETLIFY_DATABASE_URL')):
+            parser.error("BENCH_DATABASE_URL must be a separate database from the app's DATABASE_URL")
+        os.environ.pop('NETLIFY_DATABASE_URL', None)
+        os.environ['DATABASE_URL'] = bench_url
+    os.environ.setdefault('DB_SLOW_QUERY_LOG', os.path.join(tempfile.gettempdir(), 'bench_slow_queries.log'))
+
+    # Imported only now: the app connects to the database at import time
+    logging.basicConfig(level=logging.WARNING)
+    import ticket_system
+    from app import app
+    from database_schema_updates import create_indexes
+    from stats_counters import install_counters
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"Seeding {args.events} events x {args.tickets} tickets on {ticket_system.db_manager.db_type}...", file=sys.stderr)
+    event_ids, ticket_ids = seed_database(ticket_system, args.events, args.tickets)
+    # Dropping tickets removed its indexes and counter triggers
+    create_indexes()
+    install_counters()
+
+    modes = MODES if args.mode == 'both' else [args.mode]
+    results = run_benchmark(app, ticket_system, event_ids, ticket_ids, args.requests, args.concurrency, modes,
+                            args.repeat_ratio)
+
+    report = {
+        'meta': {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'backend': ticket_system.db_manager.db_type,
+            'events': args.events,
+            'tickets_per_event': args.tickets,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'repeat_ratio': args.repeat_ratio,
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output + '\n')
+        print(f"Results written to {args.out}", file=sys.stderr)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""
+Bulk SSM membership cards for SuliStreetMeet Platform
+
+Selects members by platform role, search or ID, with their first registered
+vehicle for plate and model, renders front and back cards with
+generate_ssm_card in a process pool and streams them out as a ZIP while they
+are produced, or as a print-ready PDF with ten cards per A4 page (fronts,
+then the backs mirrored for duplex printing). Jobs are recorded in the card_jobs table so their progress can be
+polled from any worker. Also usable from the command line:
+
+    python card_batch.py --role OWNER --scope with_vehicle --out cards.zip
+"""
+
+import io
+import os
+import json
+import time
+import uuid
+import logging
+import zipfile
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from flask import Blueprint, Response, jsonify, render_template, request, session, stream_with_context
+from PIL import Image
+from database_manager_hybrid import db_manager
+from permissions_manager import require_admin
+from card_renderer import render_member_card, CARD_WIDTH, CARD_HEIGHT, ROLE_ACCENTS
+from image_pipeline import image_url, preload_variants
+from upload_store import upload_store
+from vehicle_gallery import PRIMARY_PHOTO
+import search_index
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_CARDS = 2000
+# A card with its small photo variant renders in about 10ms; spawning the
+# workers takes about 0.2s, and 0.25s more when they re-run app.py, so
+# below this many cards the pool costs more than it saves on 2 cores
+POOL_THRESHOLD = 100
+RENDER_WORKERS = int(os.environ.get('CARD_RENDER_WORKERS', os.cpu_count() or 1))
+# Cards handed to the pool at a time, bounding memory while the ZIP streams
+WINDOW_PER_WORKER = 8
+# Progress is written to the database after this many cards
+PROGRESS_EVERY = 25
+
+SCOPES = ('all', 'with_vehicle')
+# Members by platform role, matching permissions_manager.get_user_role
+MEMBER_ROLES = {
+    'admin': "p.CanEditMembers = 1",
+    'moderator': "p.CanEditMembers = 0 AND (p.CanPostEvents = 1 OR p.CanManageVehicles = 1)",
+    'member': "(p.MemberID IS NULL OR NOT (p.CanEditMembers = 1 OR p.CanPostEvents = 1 OR p.CanManageVehicles = 1))",
+}
+FORMATS = ('zip', 'pdf')
+
+# A4 at the resolution that prints a card at ID-1 size (85.6mm wide)
+PDF_DPI = CARD_WIDTH / (85.6 / 25.4)
+PAGE_SIZE = (round(210 / 25.4 * PDF_DPI), round(297 / 25.4 * PDF_DPI))
+PAGE_COLUMNS, PAGE_ROWS = 2, 5
+PDF_JPEG_QUALITY = 90
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+card_jobs_bp = Blueprint('card_jobs', __name__)
+
+
+def install_card_jobs():
+    """Create the card_jobs table"""
+    if db_manager.db_type == 'sqlite':
+        statement = '''
+            CREATE TABLE IF NOT EXISTS card_jobs (
+                JobID TEXT PRIMARY KEY,
+                CreatedBy INTEGER NOT NULL,
+                Params TEXT NOT NULL,
+                Total INTEGER NOT NULL,
+                Done INTEGER NOT NULL DEFAULT 0,
+                Status TEXT NOT NULL DEFAULT 'pending',
+                UpdatedAt REAL NOT NULL
+            )
+        '''
+    else:
+        statement = '''
+            CREATE TABLE IF NOT EXISTS card_jobs (
+                "JobID" TEXT PRIMARY KEY,
+                "CreatedBy" INTEGER NOT NULL,
+                "Params" TEXT NOT NULL,
+                "Total" INTEGER NOT NULL,
+                "Done" INTEGER NOT NULL DEFAULT 0,
+                "Status" TEXT NOT NULL DEFAULT 'pending',
+                "UpdatedAt" DOUBLE PRECISION NOT NULL
+            )
+        '''
+    try:
+        with db_manager.get_db_connection() as conn:
+            conn.cursor().execute(statement)
+            conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Error creating card_jobs table: {e}")
+        return False
+
+
+def _photo_path(url):
+    """Local file of a stored photo URL, preferring its small variant"""
+    if not url:
+        return None
+    url = image_url(url, 'small')
+    if url.startswith('/static/'):
+        path = os.path.normpath(os.path.join(STATIC_DIR, url[len('/static/'):]))
+        return path if path.startswith(STATIC_DIR + os.sep) else None
+    return upload_store.local_path(url)
+
+
+def select_members(scope='all', query='', member_ids=None, limit=MAX_BATCH_CARDS, member_role=''):
+    """Rows of (MemberID, FirstName, LastName, Make, Model, LicensePlate, photo URL)
+
+    Each member comes with their first registered vehicle, if any.
+    member_role keeps only admins, moderators or plain members.
+    """
+    photo = PRIMARY_PHOTO if db_manager.table_exists('vehicle_photos') else 'NULL'
+    conditions, params = [], []
+    if scope == 'with_vehicle':
+        conditions.append("v.id IS NOT NULL")
+    if member_role:
+        conditions.append(MEMBER_ROLES[member_role])
+    if query:
+        condition, search_params = search_index.key_filter('m.MemberID', search_index.search('members', query, limit))
+        conditions.append(condition)
+        params.extend(search_params)
+    if member_ids:
+        condition, id_params = search_index.key_filter('m.MemberID', member_ids)
+        conditions.append(condition)
+        params.extend(id_params)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return db_manager.execute_query(f"""
+        SELECT m.MemberID, m.FirstName, m.LastName, v.Make, v.Model, v.LicensePlate, {photo}
+        FROM members m
+        LEFT JOIN vehicles v ON v.id = (SELECT MIN(id) FROM vehicles WHERE MemberID = m.MemberID)
+        LEFT JOIN permissions p ON p.MemberID = m.MemberID
+        {where}
+        ORDER BY m.MemberID
+        LIMIT ?
+    """, params + [limit]) or []
+
+
+def build_cards(rows, role, reason=''):
+    """generate_ssm_card arguments for each selected member
+
+    Drivers need a plate and model, so members without a vehicle are left
+    out of DRIVER batches; returns (cards, skipped member IDs).
+    """
+    preload_variants([row[6] for row in rows])
+    cards, skipped = [], []
+    for member_id, first_name, last_name, make, model, plate, photo in rows:
+        if role == 'DRIVER' and not (plate and model):
+            skipped.append(member_id)
+            continue
+        cards.append({
+            'role': role,
+            'member_name': f"{first_name} {last_name}",
+            'signature': '',
+            'birthdate': '',
+            'member_id': f"SSM-{member_id:04d}",
+            'car_photo': _photo_path(photo),
+            'plate': plate or '',
+            'model': ' '.join(part for part in (make, model) if part),
+            'reason': reason,
+        })
+    return cards, skipped
+
+
+def render_cards(cards, workers=RENDER_WORKERS):
+    """Yield (member ID, front PNG, back PNG) in order, as cards are rendered"""
+    if len(cards) < POOL_THRESHOLD or workers <= 1:
+        yield from map(render_member_card, cards)
+        return
+    window = workers * WINDOW_PER_WORKER
+    # Spawned, not forked: a fork of the threaded server could inherit locks
+    # (connection pool, logging, the image variant executor) held mid-use
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        for start in range(0, len(cards), window):
+            yield from executor.map(render_member_card, cards[start:start + window], chunksize=WINDOW_PER_WORKER)
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only file collecting ZIP output until it is taken for streaming"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_cards_zip(rendered):
+    """Yield ZIP bytes as each card pair is added
+
+    The output is never seeked, so zipfile writes data descriptors and the
+    archive can be sent while later cards are still rendering.
+    """
+    buffer = _StreamBuffer()
+    # PNGs are already compressed; storing them avoids a second deflate pass
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for member_id, front, back in rendered:
+            archive.writestr(f"{member_id}_front.png", front)
+            archive.writestr(f"{member_id}_back.png", back)
+            yield buffer.take()
+    yield buffer.take()
+
+
+def _pdf_object(number, body, stream=None):
+    """Bytes of one numbered PDF object, with an optional stream"""
+    if stream is None:
+        return b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    return b"%d 0 obj\n%s\nstream\n%s\nendstream\nendobj\n" % (number, body, stream)
+
+
+def _pdf_page(number, page):
+    """Objects for one sheet: its JPEG image, drawing instructions and page
+
+    Takes three object numbers starting at number; the page is the last.
+    """
+    buffer = io.BytesIO()
+    page.save(buffer, format='JPEG', quality=PDF_JPEG_QUALITY)
+    width, height = (round(pixels * 72 / PDF_DPI, 2) for pixels in PAGE_SIZE)
+    content = b"q %.2f 0 0 %.2f 0 0 cm /Im0 Do Q" % (width, height)
+    return [
+        _pdf_object(number, b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+                            b"/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>" % (*PAGE_SIZE, buffer.tell()),
+                    buffer.getvalue()),
+        _pdf_object(number + 1, b"<< /Length %d >>" % len(content), content),
+        _pdf_object(number + 2, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+                                b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>"
+                                % (width, height, number, number + 1)),
+    ]
+
+
+def stream_cards_pdf(rendered):
+    """Yield a print-ready PDF a sheet at a time
+
+    Every sheet is a page of fronts followed by the same cards' backs,
+    mirrored for duplex printing. Each pair of pages is written out as soon
+    as its ten cards are in, so only the sheets being filled are held in
+    memory. The page tree, whose size is only known at the end, is written
+    last.
+    """
+    per_page = PAGE_COLUMNS * PAGE_ROWS
+    gap_x = (PAGE_SIZE[0] - PAGE_COLUMNS * CARD_WIDTH) // (PAGE_COLUMNS + 1)
+    gap_y = (PAGE_SIZE[1] - PAGE_ROWS * CARD_HEIGHT) // (PAGE_ROWS + 1)
+
+    def position(slot, mirrored):
+        column, row = slot % PAGE_COLUMNS, slot // PAGE_COLUMNS
+        if mirrored:
+            column = PAGE_COLUMNS - 1 - column
+        return gap_x + column * (CARD_WIDTH + gap_x), gap_y + row * (CARD_HEIGHT + gap_y)
+
+    offset = 0
+    offsets = []
+    page_numbers = []
+
+    def write(objects):
+        nonlocal offset
+        for data in objects:
+            offsets.append(offset)
+            offset += len(data)
+        return b''.join(objects)
+
+    def write_sheets(fronts, backs):
+        chunk = b''
+        for page in (fronts, backs):
+            number = len(offsets) + 1
+            chunk += write(_pdf_page(number, page))
+            page_numbers.append(number + 2)
+        return chunk
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    offset = len(header)
+    yield header + write([_pdf_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")])
+    # Object 2 is the page tree, written once every page is known
+    offsets.append(None)
+
+    fronts = backs = None
+    for index, (_, front, back) in enumerate(rendered):
+        slot = index % per_page
+        if slot == 0:
+            if fronts is not None:
+                yield write_sheets(fronts, backs)
+            fronts = Image.new('RGB', PAGE_SIZE, 'white')
+            backs = Image.new('RGB', PAGE_SIZE, 'white')
+        fronts.paste(Image.open(io.BytesIO(front)), position(slot, False))
+        backs.paste(Image.open(io.BytesIO(back)), position(slot, True))
+    if fronts is not None:
+        yield write_sheets(fronts, backs)
+
+    kids = b' '.join(b"%d 0 R" % number for number in page_numbers)
+    pages = _pdf_object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_numbers)))
+    offsets[1] = offset
+    xref_offset = offset + len(pages)
+    xref = b''.join([b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)]
+                    + [b"%010d 00000 n \n" % at for at in offsets])
+    yield pages + xref + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref_offset)
+
+
+def _update_job(job_id, done, status):
+    db_manager.execute_query(
+        "UPDATE card_jobs SET Done = ?, Status = ?, UpdatedAt = ? WHERE JobID = ?",
+        [done, status, time.time(), job_id]
+    )
+
+
+def _tracked(job_id, rendered):
+    """Pass rendered cards through, recording progress every PROGRESS_EVERY cards
+
+    The job ends as 'done', 'failed', or 'cancelled' if the stream is closed
+    before the last card.
+    """
+    done = 0
+    _update_job(job_id, done, 'running')
+    try:
+        for card in rendered:
+            yield card
+            done += 1
+            if done % PROGRESS_EVERY == 0:
+                _update_job(job_id, done, 'running')
+    except GeneratorExit:
+        # The download was closed, usually by the client going away
+        _update_job(job_id, done, 'cancelled')
+        raise
+    except Exception:
+        _update_job(job_id, done, 'failed')
+        raise
+    _update_job(job_id, done, 'done')
+
+
+def _job_cards(params):
+    rows = select_members(params['scope'], params['query'], params.get('member_ids'),
+                          member_role=params.get('member_role', ''))
+    return build_cards(rows, params['role'], params['reason'])
+
+
+def _job_params(data):
+    """Validated job parameters from a request's form or JSON"""
+    role = data.get('role', 'OWNER')
+    if role not in ROLE_ACCENTS:
+        raise ValueError('Unknown card role')
+    scope = data.get('scope', 'all')
+    if scope not in SCOPES:
+        raise ValueError('Unknown member scope')
+    member_role = data.get('member_role') or ''
+    if member_role and member_role not in MEMBER_ROLES:
+        raise ValueError('Unknown member role')
+    output = data.get('format', 'zip')
+    if output not in FORMATS:
+        raise ValueError('Format must be zip or pdf')
+    reason = (data.get('reason') or '').strip()
+    if role == 'HONORARY_GUEST' and not reason:
+        raise ValueError('Reason is required for guest cards')
+    member_ids = data.get('member_ids') or []
+    if isinstance(member_ids, str):
+        member_ids = [part for part in member_ids.replace(',', ' ').split()]
+    return {
+        'role': role,
+        'scope': scope,
+        'member_role': member_role,
+        'query': (data.get('q') or '').strip(),
+        'member_ids': [int(member_id) for member_id in member_ids],
+        'reason': reason,
+        'format': output,
+    }
+
+
+def _job_row(job_id):
+    rows = db_manager.execute_query(
+        "SELECT CreatedBy, Params, Total, Done, Status FROM card_jobs WHERE JobID = ?",
+        [job_id]
+    )
+    return rows[0] if rows else None
+
+
+@card_jobs_bp.route('/cards/bulk')
+@require_admin
+def bulk_cards_page():
+    """Form for printing cards for many members at once"""
+    return render_template('bulk_cards.html', roles=list(ROLE_ACCENTS), max_cards=MAX_BATCH_CARDS)
+
+
+@card_jobs_bp.route('/api/cards/jobs', methods=['POST'])
+@require_admin
+def create_card_job():
+    """Select members and open a card job; the cards are rendered on download"""
+    try:
+        params = _job_params(request.get_json(silent=True) or request.form)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        cards, skipped = _job_cards(params)
+        if not cards:
+            return jsonify({'success': False, 'error': 'No members match the selection', 'skipped': skipped}), 400
+        job_id = uuid.uuid4().hex
+        db_manager.execute_query(
+            "INSERT INTO card_jobs (JobID, CreatedBy, Params, Total, UpdatedAt) VALUES (?, ?, ?, ?, ?)",
+            [job_id, session['user_id'], json.dumps(params), len(cards), time.time()]
+        )
+        return jsonify({'success': True, 'job_id': job_id, 'total': len(cards), 'skipped': skipped})
+    except Exception as e:
+        logger.error(f"Create card job error: {e}")
+        return jsonify({'success': False, 'error': 'Server error'}), 500
+
+
+@card_jobs_bp.route('/api/cards/jobs/<job_id>')
+@require_admin
+def card_job_progress(job_id):
+    """Cards rendered so far for a job"""
+    row = _job_row(job_id)
+    if not row:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job_id': job_id, 'total': row[2], 'done': row[3], 'status': row[4]})
+
+
+@card_jobs_bp.route('/api/cards/jobs/<job_id>/download')
+@require_admin
+def download_card_job(job_id):
+    """Render a job's cards, streaming the ZIP or PDF while they are produced"""
+    row = _job_row(job_id)
+    if not row:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    params = json.loads(row[1])
+    try:
+        cards, _ = _job_cards(params)
+    except Exception as e:
+        logger.error(f"Card job selection error: {e}")
+        return jsonify({'success': False, 'error': 'Server error'}), 500
+    rendered = _tracked(job_id, render_cards(cards[:row[2]]))
+
+    if params['format'] == 'pdf':
+        return Response(stream_with_context(stream_cards_pdf(rendered)), mimetype='application/pdf',
+                        headers={'Content-Disposition': 'attachment; filename=ssm_cards.pdf'})
+    return Response(stream_with_context(stream_cards_zip(rendered)), mimetype='application/zip',
+                    headers={'Content-Disposition': 'attachment; filename=ssm_cards.zip'})
+
+
+def init_app(app):
+    """Initialize the bulk card blueprint"""
+    install_card_jobs()
+    app.register_blueprint(card_jobs_bp)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render SSM cards for many members")
+    parser.add_argument('--role', default='OWNER', choices=list(ROLE_ACCENTS), help="Card role for every member")
+    parser.add_argument('--scope', default='all', choices=SCOPES, help="Which members to include")
+    parser.add_argument('--member-role', default='', choices=list(MEMBER_ROLES), help="Only admins, moderators or plain members")
+    parser.add_argument('--query', default='', help="Only members matching this search")
+    parser.add_argument('--reason', default='', help="Reason printed on guest cards")
+    parser.add_argument('--format', default='zip', choices=FORMATS, help="Output format")
+    parser.add_argument('--out', required=True, help="Path of the file to write")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    cards, skipped = build_cards(select_members(args.scope, args.query, member_role=args.member_role),
+                                 args.role, args.reason)
+    stream = stream_cards_pdf if args.format == 'pdf' else stream_cards_zip
+    with open(args.out, 'wb') as f:
+        for chunk in stream(render_cards(cards)):
+            f.write(chunk)
+    print(f"Rendered {len(cards)} cards to {args.out} in {time.perf_counter() - started:.2f}s"
+          + (f", skipped {len(skipped)} members without a vehicle" if skipped else ""))
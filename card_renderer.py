@@ -0,0 +1,148 @@
+"""
+SSM membership card rendering
+
+Fonts and the static parts of each card (background, accent stripe, role
+title, watermark) are rendered once per process and copied for every card,
+so a card only draws its member details and pastes the car photo. The photo
+is decoded with Image.draft, which lets JPEG decoding scale down on the fly
+instead of decoding every pixel of a camera-sized original. Cards are
+encoded straight into memory buffers and zipped there; nothing touches disk.
+"""
+
+import io
+import time
+import logging
+import zipfile
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+from image_checks import open_image
+
+logger = logging.getLogger(__name__)
+
+# Card dimensions (standard ID card proportions)
+CARD_WIDTH, CARD_HEIGHT = 300, 180
+PHOTO_SIZE = (int(CARD_WIDTH * 0.6), int(CARD_HEIGHT * 0.6))
+ROLE_ACCENTS = {
+    'OWNER': (255, 215, 0),  # Gold
+    'DRIVER': (192, 192, 192),  # Silver
+    'HONORARY_GUEST': (50, 205, 50),  # Green
+}
+# PNGs of flat artwork compress well even at the fastest level
+PNG_COMPRESS_LEVEL = 1
+
+
+@lru_cache(maxsize=None)
+def card_fonts():
+    """(title font, text font), loaded once per process"""
+    try:
+        return ImageFont.truetype("Orbitron-Bold.ttf", 24), ImageFont.truetype("arial.ttf", 12)
+    except OSError:
+        default = ImageFont.load_default()
+        return default, default
+
+
+@lru_cache(maxsize=None)
+def _front_template(role):
+    card = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), 'black')
+    draw = ImageDraw.Draw(card)
+    title_font, _ = card_fonts()
+    # Unknown roles get the guest accent, as before
+    draw.rectangle([0, 0, CARD_WIDTH, 30], fill=ROLE_ACCENTS.get(role, ROLE_ACCENTS['HONORARY_GUEST']))
+    draw.text((CARD_WIDTH // 2, 45), role.replace('_', ' '), fill='white', font=title_font, anchor='mm')
+    return card
+
+
+@lru_cache(maxsize=None)
+def _back_template():
+    card = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), (20, 20, 20))
+    title_font, _ = card_fonts()
+    ImageDraw.Draw(card).text((CARD_WIDTH - 30, 10), 'SSM', fill=(255, 255, 255, 50), font=title_font)
+    return card
+
+
+def load_card_photo(source):
+    """Car photo scaled to the card's photo area
+
+    source is a path or file object. Raises InvalidImage for files that are
+    not acceptable images.
+    """
+    with open_image(source) as image:
+        # JPEG decoding scales by up to 1/8 while reading; other formats ignore this
+        image.draft('RGB', PHOTO_SIZE)
+        return image.convert('RGB').resize(PHOTO_SIZE, reducing_gap=2.0)
+
+
+def generate_ssm_card(role, member_name, signature, birthdate, member_id, car_photo, plate='', model='', reason=''):
+    """Generate SSM card images using PIL"""
+    title_font, text_font = card_fonts()
+
+    front_card = _front_template(role).copy()
+    front_draw = ImageDraw.Draw(front_card)
+    front_draw.text((CARD_WIDTH // 2, CARD_HEIGHT - 20), f"Signature: {signature}", fill='white', font=text_font, anchor='mm')
+
+    back_card = _back_template().copy()
+    back_draw = ImageDraw.Draw(back_card)
+
+    # Process car photo
+    if car_photo:
+        try:
+            back_card.paste(car_photo if isinstance(car_photo, Image.Image) else load_card_photo(car_photo), (10, 10))
+        except Exception as e:
+            logger.error(f"Error processing car photo: {e}")
+
+    # Member information based on role
+    info_y = CARD_HEIGHT - 80
+    back_draw.text((10, info_y), f"Name: {member_name}", fill='white', font=text_font)
+    info_y += 15
+    back_draw.text((10, info_y), f"Birthdate: {birthdate}", fill='white', font=text_font)
+    info_y += 15
+    back_draw.text((10, info_y), f"ID: {member_id}", fill='white', font=text_font)
+
+    if role == 'DRIVER':
+        info_y += 15
+        back_draw.text((10, info_y), f"Plate: {plate}", fill='white', font=text_font)
+        info_y += 15
+        back_draw.text((10, info_y), f"Model: {model}", fill='white', font=text_font)
+    elif role == 'HONORARY_GUEST':
+        info_y += 15
+        back_draw.text((10, info_y), f"Reason: {reason}", fill='white', font=text_font)
+
+    return front_card, back_card
+
+
+def card_png(card):
+    """PNG bytes of a rendered card"""
+    buffer = io.BytesIO()
+    card.save(buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+    return buffer.getvalue()
+
+
+def render_card_pngs(**card):
+    """(front PNG bytes, back PNG bytes) for generate_ssm_card's arguments"""
+    started = time.perf_counter()
+    front, back = generate_ssm_card(**card)
+    pngs = card_png(front), card_png(back)
+    logger.debug(f"Rendered SSM card in {(time.perf_counter() - started) * 1000:.1f}ms")
+    return pngs
+
+
+def render_member_card(card):
+    """(member ID, front PNG bytes, back PNG bytes) for one bulk card
+
+    Worker entry point for bulk rendering. Nothing this module imports
+    touches the database, so spawned render workers only load Pillow.
+    """
+    front, back = render_card_pngs(**card)
+    return card['member_id'], front, back
+
+
+def cards_zip(files):
+    """ZIP archive bytes of (name, bytes) pairs, built in memory
+
+    PNGs are already compressed, so they are stored rather than deflated.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+    return buffer.getvalue()
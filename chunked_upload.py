@@ -0,0 +1,326 @@
+"""
+Streaming, resumable uploads for large photos
+
+A client opens an upload session with the file's kind and size, then PUTs
+the file in pieces with Content-Range headers. Each piece is streamed from
+the request into a temp file in the upload store and, once its offset is
+claimed, copied into the upload's part file and hashed, so worker memory
+stays flat however large the photo is. The first piece must start with
+image magic bytes and sizes are checked against UPLOAD_LIMITS before
+anything is read. An interrupted upload resumes from the offset reported by
+GET. The finished file is moved into the upload
+store; a form then claims it by upload_id, taking over its reference.
+"""
+
+import os
+import re
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from flask import Blueprint, jsonify, request, session, flash, redirect, url_for
+from database_manager_hybrid import db_manager
+from upload_store import upload_store, UPLOAD_LIMITS, CHUNK_SIZE
+from image_pipeline import schedule_variants
+from image_checks import open_image, sniff_image_format, InvalidImage, IMAGE_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Request bodies above this are refused before they are read
+MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+# Piece size suggested to clients; each PUT must fit in MAX_CONTENT_LENGTH
+UPLOAD_PIECE_SIZE = 2 * 1024 * 1024
+# Unfinished or unclaimed uploads are discarded after this many seconds
+UPLOAD_EXPIRY_SECONDS = 24 * 3600
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+MAGIC_BYTES = 12
+
+uploads_bp = Blueprint('uploads', __name__)
+
+_hash_lock = threading.Lock()
+# upload id -> (bytes hashed, running SHA-256) for uploads this process received
+_hashers = {}
+
+
+def install_upload_sessions():
+    """Create the upload_sessions table"""
+    if db_manager.db_type == 'sqlite':
+        statement = '''
+            CREATE TABLE IF NOT EXISTS upload_sessions (
+                UploadID TEXT PRIMARY KEY,
+                UserID INTEGER NOT NULL,
+                Kind TEXT NOT NULL,
+                Size INTEGER NOT NULL,
+                Received INTEGER NOT NULL DEFAULT 0,
+                URL TEXT,
+                UpdatedAt REAL NOT NULL
+            )
+        '''
+    else:
+        statement = '''
+            CREATE TABLE IF NOT EXISTS upload_sessions (
+                "UploadID" TEXT PRIMARY KEY,
+                "UserID" INTEGER NOT NULL,
+                "Kind" TEXT NOT NULL,
+                "Size" BIGINT NOT NULL,
+                "Received" BIGINT NOT NULL DEFAULT 0,
+                "URL" TEXT,
+                "UpdatedAt" DOUBLE PRECISION NOT NULL
+            )
+        '''
+    try:
+        with db_manager.get_db_connection() as conn:
+            conn.cursor().execute(statement)
+            conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Error creating upload_sessions table: {e}")
+        return False
+
+
+def _part_path(upload_id):
+    return os.path.join(upload_store.directory, 'tmp', f"{upload_id}.part")
+
+
+def _session_row(upload_id):
+    rows = db_manager.execute_query(
+        "SELECT UserID, Kind, Size, Received, URL FROM upload_sessions WHERE UploadID = ?",
+        [upload_id]
+    )
+    return rows[0] if rows else None
+
+
+def _hasher_at(upload_id, offset):
+    """Running hash of the first offset bytes of an upload
+
+    Rebuilt from the part file when the earlier pieces went to another
+    worker process.
+    """
+    with _hash_lock:
+        state = _hashers.pop(upload_id, None)
+    if state and state[0] == offset:
+        return state[1]
+    hasher = hashlib.sha256()
+    remaining = offset
+    with open(_part_path(upload_id), 'rb') as f:
+        while remaining:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ValueError("Upload data is missing")
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+def expire_uploads(max_age=UPLOAD_EXPIRY_SECONDS):
+    """Discard uploads that were abandoned or never claimed"""
+    rows = db_manager.execute_query(
+        "DELETE FROM upload_sessions WHERE UpdatedAt < ? RETURNING UploadID, URL",
+        [time.time() - max_age]
+    ) or []
+    for upload_id, url in rows:
+        if url:
+            upload_store.release(url)
+        try:
+            os.remove(_part_path(upload_id))
+        except FileNotFoundError:
+            pass
+        with _hash_lock:
+            _hashers.pop(upload_id, None)
+    return len(rows)
+
+
+def claim_upload(upload_id, user_id, kind):
+    """URL of a finished upload, handing its reference to the caller
+
+    Returns None unless the upload is complete and belongs to user_id.
+    """
+    rows = db_manager.execute_query(
+        "DELETE FROM upload_sessions WHERE UploadID = ? AND UserID = ? AND Kind = ? AND URL IS NOT NULL RETURNING URL",
+        [upload_id, user_id, kind]
+    )
+    return rows[0][0] if rows else None
+
+
+def check_image_upload(file, kind):
+    """Validate a form-posted image against its kind's size limit and formats
+
+    Raises InvalidImage; the stream is left at the start for the caller.
+    """
+    stream = file.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    if size > UPLOAD_LIMITS[kind]:
+        raise InvalidImage(f"Image is larger than {UPLOAD_LIMITS[kind] // (1024 * 1024)} MB")
+    open_image(stream)
+    stream.seek(0)
+
+
+def _error(message, status):
+    return jsonify({'success': False, 'error': message}), status
+
+
+def _finish(upload_id, kind, size, hasher):
+    """Validate a complete upload and move it into the upload store"""
+    part_path = _part_path(upload_id)
+    try:
+        with open_image(part_path) as image:
+            ext = IMAGE_EXTENSIONS[image.format]
+    except InvalidImage:
+        db_manager.execute_query("DELETE FROM upload_sessions WHERE UploadID = ?", [upload_id])
+        os.remove(part_path)
+        raise
+    url = upload_store.commit_temp(part_path, hasher.hexdigest(), ext, size)
+    db_manager.execute_query(
+        "UPDATE upload_sessions SET URL = ?, UpdatedAt = ? WHERE UploadID = ?",
+        [url, time.time(), upload_id]
+    )
+    schedule_variants(upload_store.local_path(url), url)
+    return url
+
+
+@uploads_bp.route('/api/uploads', methods=['POST'])
+def create_upload():
+    """Open an upload session: JSON {kind, size}"""
+    if 'user_id' not in session:
+        return _error('Login required', 401)
+    data = request.get_json(silent=True) or {}
+    kind = data.get('kind')
+    if kind not in UPLOAD_LIMITS:
+        return _error('Unknown upload kind', 400)
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return _error('size is required', 400)
+    if size <= 0:
+        return _error('size must be positive', 400)
+    if size > UPLOAD_LIMITS[kind]:
+        return _error(f"File is larger than {UPLOAD_LIMITS[kind] // (1024 * 1024)} MB", 413)
+
+    try:
+        expire_uploads()
+        upload_id = uuid.uuid4().hex
+        os.makedirs(os.path.dirname(_part_path(upload_id)), exist_ok=True)
+        open(_part_path(upload_id), 'wb').close()
+        db_manager.execute_query(
+            "INSERT INTO upload_sessions (UploadID, UserID, Kind, Size, UpdatedAt) VALUES (?, ?, ?, ?, ?)",
+            [upload_id, session['user_id'], kind, size, time.time()]
+        )
+        return jsonify({'success': True, 'upload_id': upload_id, 'received': 0,
+                        'piece_size': min(UPLOAD_PIECE_SIZE, MAX_CONTENT_LENGTH)}), 201
+    except Exception as e:
+        logger.error(f"Create upload error: {e}")
+        return _error('Server error', 500)
+
+
+@uploads_bp.route('/api/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Bytes received so far, for resuming an interrupted upload"""
+    row = _session_row(upload_id)
+    if not row or row[0] != session.get('user_id'):
+        return _error('Upload not found', 404)
+    return jsonify({'success': True, 'upload_id': upload_id, 'size': row[2], 'received': row[3],
+                    'complete': row[4] is not None, 'url': row[4]})
+
+
+@uploads_bp.route('/api/uploads/<upload_id>', methods=['PUT'])
+def upload_piece(upload_id):
+    """Append one piece: body bytes at Content-Range: bytes start-end/size"""
+    row = _session_row(upload_id)
+    if not row or row[0] != session.get('user_id'):
+        return _error('Upload not found', 404)
+    _, kind, size, received, url = row
+    if url:
+        return jsonify({'success': True, 'received': size, 'complete': True, 'url': url})
+
+    match = CONTENT_RANGE_RE.match(request.headers.get('Content-Range', ''))
+    if not match:
+        return _error('Content-Range header is required', 400)
+    start, end, total = map(int, match.groups())
+    length = end - start + 1
+    if total != size or end < start or end >= size:
+        return _error('Content-Range does not match the upload', 416)
+    if start != received:
+        # Tell the client where to resume from
+        return jsonify({'success': False, 'error': 'Unexpected offset', 'received': received}), 409
+    if request.content_length is not None and request.content_length != length:
+        return _error('Body length does not match Content-Range', 400)
+
+    # The piece goes to a file of its own first; only the request that then
+    # claims the offset copies it into the shared part file, so two requests
+    # for the same offset never write the same bytes
+    piece_path, piece_file = upload_store.open_temp()
+    try:
+        written = 0
+        with piece_file:
+            while written < length:
+                chunk = request.stream.read(min(CHUNK_SIZE, length - written))
+                if not chunk:
+                    break
+                if start == 0 and written == 0 and sniff_image_format(chunk[:MAGIC_BYTES]) is None:
+                    db_manager.execute_query("DELETE FROM upload_sessions WHERE UploadID = ?", [upload_id])
+                    os.remove(_part_path(upload_id))
+                    return _error('Only JPEG, PNG, WebP or GIF images can be uploaded', 415)
+                piece_file.write(chunk)
+                written += len(chunk)
+        if written != length:
+            return jsonify({'success': False, 'error': 'Incomplete piece', 'received': received}), 400
+
+        # Only one of two racing requests for the same offset moves it on
+        moved = db_manager.execute_query(
+            "UPDATE upload_sessions SET Received = ?, UpdatedAt = ? WHERE UploadID = ? AND Received = ?",
+            [end + 1, time.time(), upload_id, start]
+        )
+        if not moved:
+            return jsonify({'success': False, 'error': 'Unexpected offset', 'received': _session_row(upload_id)[3]}), 409
+
+        hasher = _hasher_at(upload_id, start)
+        with open(piece_path, 'rb') as piece, open(_part_path(upload_id), 'r+b') as f:
+            f.seek(start)
+            while True:
+                chunk = piece.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                hasher.update(chunk)
+
+        if end + 1 < size:
+            with _hash_lock:
+                _hashers[upload_id] = (end + 1, hasher)
+            return jsonify({'success': True, 'received': end + 1, 'complete': False})
+
+        url = _finish(upload_id, kind, size, hasher)
+        return jsonify({'success': True, 'received': size, 'complete': True, 'url': url, 'upload_id': upload_id})
+
+    except InvalidImage as e:
+        return _error(str(e), 415)
+    except Exception as e:
+        logger.error(f"Upload piece error: {e}")
+        return _error('Server error', 500)
+    finally:
+        if os.path.exists(piece_path):
+            os.remove(piece_path)
+
+
+def init_app(app):
+    """Initialize size limits and the chunked upload API"""
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+    install_upload_sessions()
+    app.register_blueprint(uploads_bp)
+
+    @app.before_request
+    def refuse_oversized_request():
+        # Refuse from the Content-Length header, before the body is read
+        if request.content_length and request.content_length > MAX_CONTENT_LENGTH:
+            return request_too_large(None)
+
+    @app.errorhandler(413)
+    def request_too_large(error):
+        limit_mb = MAX_CONTENT_LENGTH // (1024 * 1024)
+        if request.path.startswith('/api/'):
+            return _error(f"Request is larger than {limit_mb} MB", 413)
+        flash(f"Upload is too large (limit {limit_mb} MB)", 'error')
+        return redirect(request.referrer or url_for('dashboard'))
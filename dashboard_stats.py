@@ -0,0 +1,144 @@
+import os
+import time
+import threading
+import logging
+from database_manager_hybrid import db_manager
+from stats_counters import read_counters
+
+logger = logging.getLogger(__name__)
+
+# Seconds dashboard counters are served from memory before being recomputed
+STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', 30))
+
+# One pass per table; every counter a dashboard shows comes from these rows.
+# members has no LastLogin column, so JoinDate is the proxy for active users.
+MEMBER_STATS_QUERY = """
+    SELECT COUNT(*),
+           SUM(CASE WHEN JoinDate >= date('now', '-30 days') THEN 1 ELSE 0 END)
+    FROM members
+"""
+
+EVENT_STATS_QUERY = """
+    SELECT COUNT(*),
+           SUM(CASE WHEN EventDate >= date('now') THEN 1 ELSE 0 END)
+    FROM events
+"""
+
+VEHICLE_STATS_QUERY = "SELECT COUNT(*) FROM vehicles"
+
+# Date-window counters cannot be kept by triggers; these are index range scans
+ACTIVE_MEMBERS_QUERY = "SELECT COUNT(*) FROM members WHERE JoinDate >= date('now', '-30 days')"
+UPCOMING_EVENTS_QUERY = "SELECT COUNT(*) FROM events WHERE EventDate >= date('now')"
+
+TICKET_STATS_QUERY = """
+    SELECT COUNT(*),
+           SUM(CASE WHEN Status = 'valid' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN Status = 'used' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN Status = 'expired' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN Status IN ('valid', 'used') THEN Price ELSE 0 END)
+    FROM tickets
+"""
+
+
+class DashboardStats:
+    """
+    Counters shared by the admin, ticket and analytics dashboards.
+
+    Totals come from the trigger-maintained stats_counters table when it is
+    installed, otherwise from one aggregate query per table. Results are
+    cached for a short TTL, so concurrent dashboard views cost one round of
+    queries per TTL instead of a dozen scans each.
+    """
+
+    def __init__(self, db, ttl=STATS_CACHE_TTL):
+        self.db = db
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = None
+        self._expires_at = 0.0
+        self._known_tables = set()
+
+    def table_exists(self, table_name):
+        """table_exists that remembers tables once they have been seen"""
+        if table_name in self._known_tables:
+            return True
+        if self.db.table_exists(table_name):
+            self._known_tables.add(table_name)
+            return True
+        return False
+
+    def get(self):
+        """Current counters, recomputed when the cached copy has expired"""
+        with self._lock:
+            if self._stats is None or time.monotonic() >= self._expires_at:
+                self._stats = self._compute()
+                self._expires_at = time.monotonic() + self.ttl
+            return dict(self._stats)
+
+    def invalidate(self):
+        """Force the next get() to recompute"""
+        with self._lock:
+            self._stats = None
+
+    def _compute(self):
+        if self.table_exists('stats_counters'):
+            return self._from_counters()
+        return self._from_tables()
+
+    def _from_counters(self):
+        """Totals from the trigger-maintained stats_counters table"""
+        counters = read_counters()
+        active_members = self.db.execute_query(ACTIVE_MEMBERS_QUERY)[0][0]
+        upcoming_events = self.db.execute_query(UPCOMING_EVENTS_QUERY)[0][0]
+        return {
+            'total_members': counters['members'],
+            'active_members': active_members,
+            'total_events': counters['events'],
+            'upcoming_events': upcoming_events,
+            'past_events': counters['events'] - upcoming_events,
+            'total_vehicles': counters['vehicles'],
+            'total_tickets': counters['tickets_total'],
+            'valid_tickets': counters['tickets_valid'],
+            'used_tickets': counters['tickets_used'],
+            'expired_tickets': counters['tickets_expired'],
+            'sold_tickets': counters['tickets_valid'] + counters['tickets_used'],
+            'total_revenue': counters['revenue'],
+        }
+
+    def _from_tables(self):
+        """Totals aggregated from the base tables"""
+        members = self.db.execute_query(MEMBER_STATS_QUERY)[0]
+        events = self.db.execute_query(EVENT_STATS_QUERY)[0]
+        total_vehicles = self.db.execute_query(VEHICLE_STATS_QUERY)[0][0]
+
+        stats = {
+            'total_members': members[0],
+            'active_members': members[1] or 0,
+            'total_events': events[0],
+            'upcoming_events': events[1] or 0,
+            'past_events': events[0] - (events[1] or 0),
+            'total_vehicles': total_vehicles,
+            'total_tickets': 0,
+            'valid_tickets': 0,
+            'used_tickets': 0,
+            'expired_tickets': 0,
+            'sold_tickets': 0,
+            'total_revenue': 0,
+        }
+
+        if self.table_exists('tickets'):
+            tickets = self.db.execute_query(TICKET_STATS_QUERY)[0]
+            stats.update({
+                'total_tickets': tickets[0],
+                'valid_tickets': tickets[1] or 0,
+                'used_tickets': tickets[2] or 0,
+                'expired_tickets': tickets[3] or 0,
+                'total_revenue': tickets[4] or 0,
+            })
+            stats['sold_tickets'] = stats['valid_tickets'] + stats['used_tickets']
+
+        return stats
+
+
+# Global dashboard stats instance
+dashboard_stats = DashboardStats(db_manager)
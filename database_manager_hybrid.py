@@ -1,6 +1,10 @@
 import os
+import time
 import logging
 from contextlib import contextmanager
+from database_session import get_request_session
+from sql_dialect import translate_query
+from query_metrics import record_query
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,8 +45,47 @@ class HybridDatabaseManager:
             logger.info("Using SQLite database manager (development)")
 
     def execute_query(self, query, params=None):
-        """Execute a query using the appropriate database manager"""
-        return self.db_manager.execute_query(query, params)
+        """Execute a query using the appropriate database manager
+
+        Queries are written in SQLite style and translated for the active
+        backend (see sql_dialect); rows always come back as tuples. Inside a
+        Flask request the query joins the request's unit of work (see
+        database_session); elsewhere it runs and commits on its own. Every
+        call is timed and recorded by query_metrics.
+        """
+        started = time.perf_counter()
+        sql = query
+        options = {}
+        if self.db_type == 'postgres':
+            sql = translate_query(query, 'postgres', escape_percent=bool(params))
+            options['as_dict'] = False
+
+        session = get_request_session(self)
+        if session is not None:
+            result = session.execute_query(sql, params, **options)
+        else:
+            result = self.db_manager.execute_query(sql, params, **options)
+        record_query(query, started, result)
+        return result
+
+    def execute_many(self, query, seq_of_params):
+        """Execute one statement for many parameter sets in a single transaction
+
+        Uses executemany on SQLite and multi-row VALUES lists on PostgreSQL;
+        returns the number of rows written.
+        """
+        started = time.perf_counter()
+        sql = query
+        if self.db_type == 'postgres':
+            sql = translate_query(query, 'postgres')
+
+        session = get_request_session(self)
+        if session is not None:
+            result = session.execute_many(sql, seq_of_params)
+        else:
+            result = self.db_manager.execute_many(sql, seq_of_params)
+        record_query(query, started, result)
+        return result
 
     def check_table_exists(self, table_name):
         """Check if a table exists"""
@@ -57,11 +100,17 @@ class HybridDatabaseManager:
         return self.db_manager.register_user(username, email, password, first_name, last_name)
 
     @contextmanager
-    def get_db_connection(self):
+    def get_db_connection(self, readonly=False):
         """Get database connection"""
-        with self.db_manager.get_db_connection() as conn:
+        with self.db_manager.get_db_connection(readonly=readonly) as conn:
             yield conn
 
+    def get_pool_stats(self):
+        """Connection pool statistics for the active backend"""
+        stats = self.db_manager.get_pool_stats()
+        stats['db_type'] = self.db_type
+        return stats
+
     # Enhanced methods for new features
     def get_vehicle_photos(self, vehicle_id):
         """Get photos for a specific vehicle"""
@@ -1,17 +1,24 @@
 import psycopg2
 import psycopg2.extras
 import os
+import re
 import logging
 from contextlib import contextmanager
 from datetime import datetime
 from urllib.parse import urlparse
+from database_pool import PostgreSQLConnectionPool, pool_settings_from_env
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# INSERT ... VALUES (...) [ON CONFLICT ...], split so the row template can be
+# handed to execute_values and sent as multi-row VALUES lists
+INSERT_VALUES_RE = re.compile(r'^(\s*INSERT\s.*?\bVALUES\s*)(\(.*\))(\s*(?:ON\s+CONFLICT\b.*|RETURNING\b.*)?)$',
+                              re.IGNORECASE | re.DOTALL)
+
 class PostgreSQLDatabaseManager:
-    def __init__(self, database_url=None):
+    def __init__(self, database_url=None, pool_settings=None):
         self.database_url = database_url or os.environ.get('DATABASE_URL') or os.environ.get('NETLIFY_DATABASE_URL')
         if not self.database_url:
             raise ValueError("DATABASE_URL or NETLIFY_DATABASE_URL environment variable is required for PostgreSQL")
@@ -26,6 +33,7 @@ class PostgreSQLDatabaseManager:
             'database': parsed.path.lstrip('/')
         }
 
+        self.pool = PostgreSQLConnectionPool(self._connect, name='postgres', **(pool_settings or pool_settings_from_env()))
         self.initialize_database()
 
     def initialize_database(self):
@@ -134,44 +142,110 @@ class PostgreSQLDatabaseManager:
             conn.commit()
             logger.info("PostgreSQL database tables initialized successfully")
 
+    def _connect(self):
+        """Open a new physical connection for the pool"""
+        conn = psycopg2.connect(**self.db_config)
+        logger.debug("PostgreSQL database connection established")
+        return conn
+
+    @property
+    def read_pool(self):
+        return self.pool
+
+    @property
+    def write_pool(self):
+        return self.pool
+
     @contextmanager
-    def get_db_connection(self):
-        """Context manager for database connections"""
-        conn = None
+    def get_db_connection(self, readonly=False):
+        """Context manager for pooled database connections"""
         try:
-            conn = psycopg2.connect(**self.db_config)
-            logger.info("PostgreSQL database connection established")
-            yield conn
+            with self.pool.connection() as conn:
+                yield conn
         except Exception as e:
             logger.error(f"Database connection error: {e}")
             raise
-        finally:
-            if conn:
-                conn.close()
-                logger.info("Database connection closed")
 
-    def execute_query(self, query, params=None):
-        """Execute a query with proper error handling"""
+    def get_pool_stats(self):
+        """Connection pool statistics"""
+        return self.pool.stats()
+
+    def execute_query(self, query, params=None, connection=None, as_dict=True):
+        """Execute a query with proper error handling
+
+        When a connection is passed the statement joins that connection's
+        transaction and committing is left to the caller. Rows are dicts
+        unless as_dict is False, in which case they are tuples like SQLite's.
+        """
         try:
+            if connection is not None:
+                return self._run_query(connection, query, params, as_dict)
+
             with self.get_db_connection() as conn:
-                cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
-
-                if query.strip().upper().startswith('SELECT'):
-                    result = cursor.fetchall()
-                    # Convert to list of dicts for consistency with SQLite
-                    return [dict(row) for row in result]
-                else:
+                result = self._run_query(conn, query, params, as_dict)
+                if not query.strip().upper().startswith('SELECT'):
                     conn.commit()
-                    return cursor.rowcount > 0
+                return result
 
         except Exception as e:
             logger.error(f"Query execution error: {e}")
             raise
 
+    def execute_many(self, query, seq_of_params, connection=None, page_size=1000):
+        """Run one statement for every parameter set in a single transaction
+
+        INSERT ... VALUES statements are sent as multi-row VALUES lists with
+        execute_values; anything else is batched with execute_batch. Returns
+        the number of parameter sets executed.
+        """
+        seq_of_params = list(seq_of_params)
+        try:
+            if connection is not None:
+                self._run_many(connection, query, seq_of_params, page_size)
+                return len(seq_of_params)
+
+            with self.get_db_connection() as conn:
+                try:
+                    self._run_many(conn, query, seq_of_params, page_size)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                return len(seq_of_params)
+
+        except Exception as e:
+            logger.error(f"Bulk execution error: {e}")
+            raise
+
+    def _run_many(self, conn, query, seq_of_params, page_size):
+        cursor = conn.cursor()
+        match = INSERT_VALUES_RE.match(query)
+        if match:
+            head, template, tail = match.groups()
+            psycopg2.extras.execute_values(cursor, f"{head}%s{tail}", seq_of_params,
+                                           template=template, page_size=page_size)
+        else:
+            psycopg2.extras.execute_batch(cursor, query, seq_of_params, page_size=page_size)
+
+    def _run_query(self, conn, query, params=None, as_dict=True):
+        """Run one statement on the given connection without committing"""
+        if as_dict:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        else:
+            cursor = conn.cursor()
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+
+        # SELECT, or DML with RETURNING: rows must be read before commit
+        if cursor.description is not None:
+            result = cursor.fetchall()
+            if as_dict:
+                return [dict(row) for row in result]
+            return result
+        return cursor.rowcount > 0
+
     def table_exists(self, table_name):
         """Check if a table exists"""
         try:
@@ -3,19 +3,50 @@ import os
 import logging
 from contextlib import contextmanager
 from datetime import datetime
+from database_pool import SQLiteConnectionPool, pool_settings_from_env
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def sqlite_settings_from_env():
+    """Read the SQLite tuning profile from environment variables
+
+    The 'wal' profile switches to write-ahead logging with one serialized
+    writer connection and a pool of read-only connections, so readers no
+    longer block on writers. The 'default' profile keeps SQLite's rollback
+    journal and a single shared pool.
+    """
+    default_profile = 'wal' if os.environ.get('FLASK_ENV') == 'production' else 'default'
+    return {
+        'profile': os.environ.get('SQLITE_PROFILE', default_profile).lower(),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 268435456)),
+    }
+
 class SQLiteDatabaseManager:
-    def __init__(self):
+    def __init__(self, db_path=None, pool_settings=None, sqlite_settings=None):
         self.current_dir = os.path.dirname(os.path.abspath(__file__))
-        # Use local AppData directory instead of OneDrive to avoid sync issues
-        local_appdata = os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
-        db_dir = os.path.join(local_appdata, 'CarMeetCommunity')
-        os.makedirs(db_dir, exist_ok=True)
-        self.db_path = os.path.join(db_dir, 'carmeet_community.db')
+        db_path = db_path or os.environ.get('SQLITE_DB_PATH')
+        if not db_path:
+            # Use local AppData directory instead of OneDrive to avoid sync issues
+            local_appdata = os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+            db_dir = os.path.join(local_appdata, 'CarMeetCommunity')
+            os.makedirs(db_dir, exist_ok=True)
+            db_path = os.path.join(db_dir, 'carmeet_community.db')
+        self.db_path = db_path
+        self.settings = sqlite_settings or sqlite_settings_from_env()
+        pool_settings = pool_settings or pool_settings_from_env()
+
+        if self.settings['profile'] == 'wal':
+            # The writer is created first so WAL mode is set before any reader opens
+            writer_settings = dict(pool_settings, min_size=1, max_size=1)
+            self.write_pool = SQLiteConnectionPool(self._connect_writer, name='sqlite-writer', **writer_settings)
+            self.pool = SQLiteConnectionPool(self._connect_reader, name='sqlite', **pool_settings)
+        else:
+            self.pool = SQLiteConnectionPool(self._connect, name='sqlite', **pool_settings)
+            self.write_pool = self.pool
         self.initialize_database()
 
     def initialize_database(self):
@@ -132,45 +163,128 @@ class SQLiteDatabaseManager:
             conn.commit()
             logger.info("Database tables initialized successfully")
 
+    def _connect(self):
+        """Open a new physical connection for the pool"""
+        # Pooled connections are handed to whichever thread checks them out next
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # Enable foreign keys for this connection
+        conn.execute("PRAGMA foreign_keys = ON")
+        logger.debug("SQLite database connection established")
+        return conn
+
+    def _apply_tuning(self, conn):
+        """Pragmas shared by reader and writer connections of the WAL profile"""
+        conn.execute(f"PRAGMA busy_timeout = {int(self.settings['busy_timeout'])}")
+        conn.execute(f"PRAGMA cache_size = {int(self.settings['cache_size'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.settings['mmap_size'])}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+
+    def _connect_writer(self):
+        """Open the single writer connection"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               timeout=self.settings['busy_timeout'] / 1000)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        self._apply_tuning(conn)
+        logger.debug("SQLite writer connection established (WAL)")
+        return conn
+
+    def _connect_reader(self):
+        """Open a read-only connection; writes on it fail instead of contending for the lock"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               timeout=self.settings['busy_timeout'] / 1000)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA query_only = ON")
+        self._apply_tuning(conn)
+        logger.debug("SQLite reader connection established (WAL)")
+        return conn
+
+    @property
+    def read_pool(self):
+        return self.pool
+
     @contextmanager
-    def get_db_connection(self):
-        """Context manager for database connections"""
-        conn = None
+    def get_db_connection(self, readonly=False):
+        """Context manager for pooled database connections
+
+        Read-only callers get a reader connection, unless this thread already
+        holds the writer and must see its own uncommitted changes.
+        """
+        if readonly and self.write_pool.held_connection() is None:
+            pool = self.pool
+        else:
+            pool = self.write_pool
         try:
-            conn = sqlite3.connect(self.db_path)
-            # Enable foreign keys for this connection
-            conn.execute("PRAGMA foreign_keys = ON")
-            logger.info("SQLite database connection established")
-            yield conn
+            with pool.connection() as conn:
+                yield conn
         except Exception as e:
             logger.error(f"Database connection error: {e}")
             raise
-        finally:
-            if conn:
-                conn.close()
-                logger.info("Database connection closed")
 
-    def execute_query(self, query, params=None):
-        """Execute a query with proper error handling"""
+    def get_pool_stats(self):
+        """Connection pool statistics"""
+        stats = self.pool.stats()
+        if self.write_pool is not self.pool:
+            stats['writer'] = self.write_pool.stats()
+        return stats
+
+    def execute_query(self, query, params=None, connection=None):
+        """Execute a query with proper error handling
+
+        When a connection is passed the statement joins that connection's
+        transaction and committing is left to the caller.
+        """
         try:
-            with self.get_db_connection() as conn:
-                cursor = conn.cursor()
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
-
-                if query.strip().upper().startswith('SELECT'):
-                    result = cursor.fetchall()
-                    return result
-                else:
+            if connection is not None:
+                return self._run_query(connection, query, params)
+
+            is_select = query.strip().upper().startswith('SELECT')
+            with self.get_db_connection(readonly=is_select) as conn:
+                result = self._run_query(conn, query, params)
+                if not is_select:
                     conn.commit()
-                    return cursor.rowcount > 0
+                return result
 
         except Exception as e:
             logger.error(f"Query execution error: {e}")
             raise
 
+    def execute_many(self, query, seq_of_params, connection=None):
+        """Run one statement for every parameter set in a single transaction
+
+        Returns the number of rows written.
+        """
+        try:
+            if connection is not None:
+                return connection.executemany(query, seq_of_params).rowcount
+
+            with self.get_db_connection() as conn:
+                try:
+                    rowcount = conn.executemany(query, seq_of_params).rowcount
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                return rowcount
+
+        except Exception as e:
+            logger.error(f"Bulk execution error: {e}")
+            raise
+
+    def _run_query(self, conn, query, params=None):
+        """Run one statement on the given connection without committing"""
+        cursor = conn.cursor()
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+
+        # SELECT, or DML with RETURNING: rows must be read before commit
+        if cursor.description is not None:
+            return cursor.fetchall()
+        return cursor.rowcount > 0
+
     def table_exists(self, table_name):
         """Check if a table exists"""
         try:
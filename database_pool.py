@@ -0,0 +1,265 @@
+import os
+import time
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the pool timeout"""
+
+
+def pool_settings_from_env():
+    """Read connection pool settings from environment variables"""
+    return {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'validate_after': float(os.environ.get('DB_POOL_VALIDATE_AFTER', 30)),
+        'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+    }
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe connection pool.
+
+    A thread that already holds a connection gets the same connection back on
+    nested checkouts, so helpers that call execute_query from inside another
+    database call share one connection instead of opening a second one.
+    """
+
+    def __init__(self, connect, name='db', min_size=1, max_size=10, timeout=30,
+                 validate_after=30, max_lifetime=3600):
+        if max_size < 1:
+            raise ValueError("Connection pool max_size must be at least 1")
+        self._connect = connect
+        self.name = name
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self.max_lifetime = max_lifetime
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._local = threading.local()
+        self._created_at = {}
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'validation_failures': 0,
+            'timeouts': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+        }
+
+        for _ in range(self.min_size):
+            self._idle.put((self._new_connection(), time.monotonic()))
+
+    # Hooks for backend specific behaviour
+    def ping(self, conn):
+        """Return True if the connection is still usable"""
+        return True
+
+    def reset(self, conn):
+        """Return a connection to a clean state before it goes back to the pool"""
+        conn.rollback()
+
+    def close_connection(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _new_connection(self):
+        conn = self._connect()
+        with self._lock:
+            self._size += 1
+            self._stats['connections_created'] += 1
+            self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn):
+        self.close_connection(conn)
+        with self._lock:
+            self._size -= 1
+            self._stats['connections_discarded'] += 1
+            self._created_at.pop(id(conn), None)
+
+    def _is_expired(self, conn):
+        created = self._created_at.get(id(conn))
+        return created is not None and time.monotonic() - created > self.max_lifetime
+
+    def _acquire(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PoolTimeout(
+                f"Timed out after {self.timeout}s waiting for a connection from the {self.name} pool "
+                f"(max_size={self.max_size})"
+            )
+
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    conn, idle_since = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._new_connection()
+                    break
+
+                if self._is_expired(conn):
+                    self._discard(conn)
+                    conn = None
+                elif time.monotonic() - idle_since > self.validate_after and not self.ping(conn):
+                    with self._lock:
+                        self._stats['validation_failures'] += 1
+                    logger.warning(f"Discarding stale connection from the {self.name} pool")
+                    self._discard(conn)
+                    conn = None
+        except Exception:
+            self._slots.release()
+            raise
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+            self._stats['total_wait_time'] += waited
+            self._stats['max_wait_time'] = max(self._stats['max_wait_time'], waited)
+        return conn
+
+    def _release(self, conn, broken=False):
+        try:
+            if not broken and not self._closed:
+                try:
+                    self.reset(conn)
+                except Exception as e:
+                    logger.warning(f"Could not reset connection for the {self.name} pool: {e}")
+                    broken = True
+
+            if broken or self._closed or self._is_expired(conn):
+                self._discard(conn)
+            else:
+                self._idle.put((conn, time.monotonic()))
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def held_connection(self):
+        """Connection currently checked out by this thread, if any"""
+        return getattr(self._local, 'conn', None)
+
+    def checkout(self):
+        """Check out a connection; pair every call with checkin()"""
+        conn = self.held_connection()
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def checkin(self, conn, broken=False):
+        """Return a connection obtained from checkout()"""
+        if self.held_connection() is not conn:
+            raise ValueError(f"Connection was not checked out from the {self.name} pool by this thread")
+
+        self._local.depth -= 1
+        if broken:
+            self._local.broken = True
+        if self._local.depth > 0:
+            return
+
+        broken = getattr(self._local, 'broken', False)
+        self._local.conn = None
+        self._local.broken = False
+        self._release(conn, broken=broken)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and back in"""
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            # A connection that failed mid-statement is rolled back by reset()
+            # on release and discarded if even that fails.
+            self.checkin(conn)
+
+    def stats(self):
+        """Snapshot of pool usage, for monitoring saturation"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'name': self.name,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'saturation': round(self._in_use / self.max_size, 3),
+            })
+        checkouts = stats['checkouts']
+        stats['avg_wait_time'] = stats['total_wait_time'] / checkouts if checkouts else 0.0
+        return stats
+
+    def close(self):
+        """Close all idle connections and stop pooling returned ones"""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+class SQLiteConnectionPool(ConnectionPool):
+    """Connection pool for SQLite; connections may move between threads"""
+
+    def ping(self, conn):
+        try:
+            conn.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def reset(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+
+
+class PostgreSQLConnectionPool(ConnectionPool):
+    """Connection pool for psycopg2 connections"""
+
+    def ping(self, conn):
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def reset(self, conn):
+        if conn.closed:
+            raise ValueError("connection already closed")
+        conn.rollback()
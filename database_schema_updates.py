@@ -4,8 +4,11 @@ This script handles the migration to add new tables and columns for enhanced fea
 """
 
 import os
+import sys
 import logging
 from database_manager_hybrid import db_manager
+from sql_dialect import translate_query
+from pagination import date_key
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -417,6 +420,102 @@ def add_columns_to_existing_tables():
                 logger.error(f"Error adding column {column} to {table}: {e}")
         conn.commit()
 
+# Secondary indexes for hot lookup columns: (index name, table, columns), where
+# a column may also be an expression such as a pagination sort key.
+# event_attendees.EventID is already covered by its UNIQUE(EventID, MemberID)
+# constraint, so it has no separate index.
+INDEXES = [
+    ('idx_tickets_event_status', 'tickets', ['EventID', 'Status']),
+    ('idx_tickets_status', 'tickets', ['Status']),
+    ('idx_tickets_purchase', 'tickets', ['PurchaseDate', 'TicketID']),
+    ('idx_tickets_event_purchase', 'tickets', ['EventID', 'PurchaseDate', 'TicketID']),
+    ('idx_events_event_date', 'events', ['EventDate']),
+    ('idx_members_join_date', 'members', ['JoinDate']),
+    # Sort keys of the keyset-paginated list pages
+    ('idx_members_join_key', 'members', [date_key('JoinDate'), 'MemberID']),
+    ('idx_events_date_event', 'events', ['EventDate', 'EventID']),
+    ('idx_places_name', 'places', ['Name', 'PlaceID']),
+    ('idx_likes_post', 'likes', ['PostType', 'PostID']),
+    ('idx_comments_post', 'comments', ['PostType', 'PostID']),
+    ('idx_notifications_user_read', 'notifications', ['UserID', 'IsRead']),
+    ('idx_permissions_member', 'permissions', ['MemberID']),
+    ('idx_vehicles_member', 'vehicles', ['MemberID']),
+]
+
+# Hot queries whose plans must use an index: (description, SQLite-style SQL, params)
+HOT_QUERIES = [
+    ('tickets by event', "SELECT COUNT(*) FROM tickets WHERE EventID = ?", [1]),
+    ('tickets by status', "SELECT COUNT(*) FROM tickets WHERE Status = ?", ['valid']),
+    ('attendees by event', "SELECT COUNT(*) FROM event_attendees WHERE EventID = ?", [1]),
+    ('upcoming events', "SELECT COUNT(*) FROM events WHERE EventDate >= DATE()", []),
+    ('recently joined members', "SELECT COUNT(*) FROM members WHERE JoinDate >= date('now', '-30 days')", []),
+    ('likes for a post', "SELECT COUNT(*) FROM likes WHERE PostType = ? AND PostID = ?", ['vehicle', 1]),
+    ('comments for a post', "SELECT CommentID FROM comments WHERE PostType = ? AND PostID = ?", ['vehicle', 1]),
+    ('unread notifications', "SELECT NotificationID FROM notifications WHERE UserID = ? AND IsRead = 0", [1]),
+    ('permissions for a member', "SELECT * FROM permissions WHERE MemberID = ?", [1]),
+    ('vehicles for a member', "SELECT * FROM vehicles WHERE MemberID = ?", [1]),
+]
+
+def _existing_indexes(cursor):
+    """Names of the indexes that exist in the database"""
+    if db_manager.db_type == 'sqlite':
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    else:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()")
+    return {row[0] for row in cursor.fetchall()}
+
+def create_indexes():
+    """Create the secondary indexes declared in INDEXES, skipping missing tables"""
+    with db_manager.get_db_connection() as conn:
+        cursor = conn.cursor()
+        for index_name, table, columns in INDEXES:
+            if not db_manager.table_exists(table):
+                logger.info(f"Skipping index {index_name}: table {table} does not exist")
+                continue
+            if db_manager.db_type == 'sqlite':
+                column_list = ', '.join(columns)
+            else:
+                # Expressions are written SQLite-style, like queries
+                column_list = ', '.join(f"({translate_query(column, 'postgres', escape_percent=False)})"
+                                        if '(' in column else f'"{column}"' for column in columns)
+            try:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({column_list})")
+            except Exception as e:
+                logger.error(f"Error creating index {index_name}: {e}")
+        conn.commit()
+
+def check_indexes():
+    """Return the declared indexes that are missing, as (index name, table) pairs"""
+    with db_manager.get_db_connection(readonly=True) as conn:
+        existing = _existing_indexes(conn.cursor())
+    return [(index_name, table) for index_name, table, _ in INDEXES if index_name not in existing]
+
+def verify_index_usage():
+    """EXPLAIN every hot query and report whether its plan uses an index
+
+    Returns a list of (description, uses_index, plan) tuples. PostgreSQL may
+    still choose a sequential scan on very small tables.
+    """
+    results = []
+    with db_manager.get_db_connection(readonly=True) as conn:
+        cursor = conn.cursor()
+        for description, query, params in HOT_QUERIES:
+            try:
+                if db_manager.db_type == 'sqlite':
+                    cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+                    plan = '; '.join(row[-1] for row in cursor.fetchall())
+                    uses_index = 'USING INDEX' in plan or 'USING COVERING INDEX' in plan
+                else:
+                    cursor.execute(f"EXPLAIN {translate_query(query, 'postgres', escape_percent=bool(params))}", params or None)
+                    plan = '; '.join(row[0] for row in cursor.fetchall())
+                    uses_index = 'Index' in plan
+            except Exception as e:
+                conn.rollback()
+                plan = f"error: {e}"
+                uses_index = False
+            results.append((description, uses_index, plan))
+    return results
+
 def run_migration():
     """Run the complete database migration"""
     logger.info("Starting database schema migration...")
@@ -424,6 +523,7 @@ def run_migration():
     try:
         add_new_tables()
         add_columns_to_existing_tables()
+        create_indexes()
         logger.info("Database schema migration completed successfully!")
         return True
     except Exception as e:
@@ -431,4 +531,11 @@ def run_migration():
         return False
 
 if __name__ == "__main__":
+    if '--check-indexes' in sys.argv:
+        missing = check_indexes()
+        for index_name, table in missing:
+            print(f"MISSING  {index_name} on {table}")
+        for description, uses_index, plan in verify_index_usage():
+            print(f"{'INDEXED' if uses_index else 'SCAN   '}  {description}: {plan}")
+        sys.exit(1 if missing else 0)
     run_migration()
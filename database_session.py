@@ -0,0 +1,205 @@
+import os
+import logging
+from flask import g, has_request_context, current_app
+
+logger = logging.getLogger(__name__)
+
+
+class RequestSession:
+    """
+    Unit of work for a single Flask request.
+
+    The connection is checked out of the pool on the first query and every
+    later query in the request runs on it. Writes share one transaction that
+    is committed (or rolled back) once when the request finishes. Each write
+    runs under a savepoint, so a statement that fails and is handled by the
+    route does not take the rest of the request's work down with it.
+
+    When the backend keeps separate reader and writer pools (SQLite WAL
+    profile), reads use a reader until the first write; from then on the
+    request stays on the writer so it sees its own uncommitted changes.
+
+    Work that must only happen once the changes are visible to other
+    requests, such as dropping a cache entry, is queued with after_commit;
+    work that undoes a side effect of changes that never land, with
+    after_rollback.
+    """
+
+    SAVEPOINT = 'request_statement'
+
+    def __init__(self, manager, db_type):
+        self.manager = manager
+        self.db_type = db_type
+        self.read_conn = None
+        self.write_conn = None
+        self.commit_callbacks = []
+        self.rollback_callbacks = []
+
+    def connection(self, write=False):
+        """Connection for this request, checked out on first use"""
+        if write or self.write_conn is not None:
+            if self.write_conn is None:
+                self.write_conn = self.manager.write_pool.checkout()
+            return self.write_conn
+        if self.read_conn is None:
+            self.read_conn = self.manager.read_pool.checkout()
+        return self.read_conn
+
+    def _begin_write(self, conn):
+        # sqlite3 only opens a transaction implicitly for DML; open it
+        # explicitly so the savepoint below does not become the outer
+        # transaction and commit on release. IMMEDIATE takes the write lock
+        # up front instead of failing on a lock upgrade later.
+        if self.db_type == 'sqlite' and not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+
+    def execute_query(self, query, params=None, **options):
+        """Run a statement inside the request transaction"""
+        is_select = query.strip().upper().startswith('SELECT')
+        return self._execute(
+            lambda conn: self.manager.execute_query(query, params, connection=conn, **options),
+            write=not is_select
+        )
+
+    def execute_many(self, query, seq_of_params):
+        """Run a bulk statement inside the request transaction"""
+        return self._execute(
+            lambda conn: self.manager.execute_many(query, seq_of_params, connection=conn),
+            write=True
+        )
+
+    def _execute(self, run, write):
+        conn = self.connection(write=write)
+
+        # A failed SELECT leaves a SQLite transaction usable but aborts a
+        # PostgreSQL one, so only PostgreSQL needs a savepoint for reads.
+        if not write and self.db_type == 'sqlite':
+            return run(conn)
+
+        if write:
+            self._begin_write(conn)
+
+        cursor = conn.cursor()
+        cursor.execute(f"SAVEPOINT {self.SAVEPOINT}")
+        try:
+            result = run(conn)
+        except Exception:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {self.SAVEPOINT}")
+            cursor.execute(f"RELEASE SAVEPOINT {self.SAVEPOINT}")
+            raise
+        cursor.execute(f"RELEASE SAVEPOINT {self.SAVEPOINT}")
+        return result
+
+    def close(self, commit=True):
+        """Finish the unit of work and return the connections to their pools"""
+        write_conn, read_conn = self.write_conn, self.read_conn
+        callbacks, self.commit_callbacks = self.commit_callbacks, []
+        undo_callbacks, self.rollback_callbacks = self.rollback_callbacks, []
+        self.write_conn = self.read_conn = None
+        committed = False
+        try:
+            if write_conn is not None:
+                broken = False
+                try:
+                    if commit:
+                        write_conn.commit()
+                        committed = True
+                    else:
+                        write_conn.rollback()
+                except Exception:
+                    broken = True
+                    raise
+                finally:
+                    self.manager.write_pool.checkin(write_conn, broken=broken)
+                    if not committed:
+                        _run_callbacks(undo_callbacks, 'after-rollback')
+        finally:
+            # Readers never hold changes; releasing them ends the read transaction
+            if read_conn is not None:
+                self.manager.read_pool.checkin(read_conn)
+        # Rolled back changes never happened, so their callbacks are dropped
+        if commit:
+            _run_callbacks(callbacks, 'after-commit')
+
+
+def _run_callbacks(callbacks, kind):
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Error in {kind} callback: {e}")
+
+
+def get_request_session(db_manager):
+    """Request session for the current request, created lazily"""
+    # Only while the request is being dispatched; contexts kept alive
+    # afterwards (e.g. by the test client) fall back to autocommit.
+    if not has_request_context() or not g.get('db_session_open', False):
+        return None
+    session = g.get('db_session')
+    if session is None:
+        session = RequestSession(db_manager.db_manager, db_manager.db_type)
+        g.db_session = session
+    return session
+
+
+def after_commit(callback):
+    """Run callback once the current request's writes are committed
+
+    Outside a request, or when the request has not written anything, there
+    is nothing pending and the callback runs at once.
+    """
+    session = g.get('db_session') if has_request_context() else None
+    if session is None or session.write_conn is None:
+        callback()
+    else:
+        session.commit_callbacks.append(callback)
+
+
+def after_rollback(callback):
+    """Run callback if the current request's writes are rolled back
+
+    For undoing work done outside the database, such as a file placed for a
+    row that never lands. Outside a request, or when the request has not
+    written anything, there is nothing left to roll back and the callback
+    is dropped.
+    """
+    session = g.get('db_session') if has_request_context() else None
+    if session is not None and session.write_conn is not None:
+        session.rollback_callbacks.append(callback)
+
+
+def init_app(app):
+    """Register request session hooks on the Flask app"""
+    app.config.setdefault(
+        'DB_REQUEST_SESSION',
+        os.environ.get('DB_REQUEST_SESSION', 'True').lower() == 'true'
+    )
+
+    @app.before_request
+    def open_request_session():
+        g.db_session_open = current_app.config['DB_REQUEST_SESSION']
+
+    @app.after_request
+    def commit_request_session(response):
+        g.db_session_open = False
+        session = g.pop('db_session', None)
+        if session is None:
+            return response
+        try:
+            session.close(commit=response.status_code < 500)
+        except Exception as e:
+            logger.error(f"Error committing request transaction: {e}")
+            return current_app.response_class("Error saving changes", status=500, mimetype='text/plain')
+        return response
+
+    @app.teardown_request
+    def close_request_session(error=None):
+        # Only reached with an open session when after_request never ran
+        g.db_session_open = False
+        session = g.pop('db_session', None)
+        if session is not None:
+            try:
+                session.close(commit=error is None)
+            except Exception as e:
+                logger.error(f"Error closing request transaction: {e}")
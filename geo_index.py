@@ -0,0 +1,239 @@
+"""
+Geospatial lookups for places
+
+Places with coordinates are indexed for bounding-box queries: on SQLite in an
+R*-tree virtual table kept in sync by triggers, on PostgreSQL with a B-tree
+on (Latitude, Longitude). A "near me" query takes the bounding box of the
+search circle from the index and refines it with the haversine distance.
+"""
+
+import math
+import logging
+from flask import Blueprint, jsonify, request
+from database_manager_hybrid import db_manager
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+DEFAULT_RADIUS_KM = 25.0
+MAX_RADIUS_KM = 500.0
+NEARBY_LIMIT = 50
+BBOX_LIMIT = 500
+
+PLACE_COLUMNS = "p.PlaceID, p.Name, p.Address, p.Type, p.Latitude, p.Longitude"
+
+geo_bp = Blueprint('geo', __name__)
+
+_rtree_ready = False
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) enclosing a circle
+
+    Near the poles or across the antimeridian the box spans every longitude.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(-90.0, lat - delta_lat), min(90.0, lat + delta_lat)
+    if min_lat == -90.0 or max_lat == 90.0:
+        return min_lat, max_lat, -180.0, 180.0
+    delta_lon = delta_lat / math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if lon - delta_lon < -180.0 or lon + delta_lon > 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lon - delta_lon, lon + delta_lon
+
+
+def _sqlite_statements():
+    return [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS places_geo USING rtree(PlaceID, MinLat, MaxLat, MinLon, MaxLon)",
+        '''
+            CREATE TRIGGER IF NOT EXISTS geo_places_insert AFTER INSERT ON places
+            WHEN NEW.Latitude IS NOT NULL AND NEW.Longitude IS NOT NULL
+            BEGIN
+                INSERT INTO places_geo VALUES (NEW.PlaceID, NEW.Latitude, NEW.Latitude, NEW.Longitude, NEW.Longitude);
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS geo_places_update AFTER UPDATE OF Latitude, Longitude ON places
+            BEGIN
+                DELETE FROM places_geo WHERE PlaceID = OLD.PlaceID;
+                INSERT INTO places_geo
+                SELECT NEW.PlaceID, NEW.Latitude, NEW.Latitude, NEW.Longitude, NEW.Longitude
+                WHERE NEW.Latitude IS NOT NULL AND NEW.Longitude IS NOT NULL;
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS geo_places_delete AFTER DELETE ON places
+            BEGIN
+                DELETE FROM places_geo WHERE PlaceID = OLD.PlaceID;
+            END
+        ''',
+    ]
+
+
+def _rebuild_rtree(cursor):
+    cursor.execute("DELETE FROM places_geo")
+    cursor.execute('''
+        INSERT INTO places_geo
+        SELECT PlaceID, Latitude, Latitude, Longitude, Longitude FROM places
+        WHERE Latitude IS NOT NULL AND Longitude IS NOT NULL
+    ''')
+
+
+def install_geo_index():
+    """Create the places geospatial index
+
+    The R*-tree is rebuilt whenever its triggers had to be added, since
+    places written before then were not indexed.
+    """
+    global _rtree_ready
+    if not db_manager.table_exists('places'):
+        return False
+    with db_manager.get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            if db_manager.db_type == 'sqlite':
+                cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'geo_places_%'")
+                triggers_before = cursor.fetchone()[0]
+                for statement in _sqlite_statements():
+                    cursor.execute(statement)
+                if triggers_before < 3:
+                    _rebuild_rtree(cursor)
+                    logger.info("Built places R*-tree index")
+            else:
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_places_lat_lon ON places ("Latitude", "Longitude")')
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error installing geo index: {e}")
+            return False
+    _rtree_ready = db_manager.db_type == 'sqlite'
+    return True
+
+
+def _use_rtree():
+    global _rtree_ready
+    if not _rtree_ready and db_manager.db_type == 'sqlite':
+        _rtree_ready = db_manager.table_exists('places_geo')
+    return _rtree_ready
+
+
+def places_in_box(min_lat, max_lat, min_lon, max_lon, limit=BBOX_LIMIT):
+    """Place rows (see PLACE_COLUMNS) inside a bounding box; limit None means all"""
+    if _use_rtree():
+        # R*-tree coordinates are stored as 32-bit floats, so test for overlap
+        query = f"""
+            SELECT {PLACE_COLUMNS} FROM places_geo g JOIN places p ON p.PlaceID = g.PlaceID
+            WHERE g.MaxLat >= ? AND g.MinLat <= ? AND g.MaxLon >= ? AND g.MinLon <= ?
+        """
+    else:
+        query = f"""
+            SELECT {PLACE_COLUMNS} FROM places p
+            WHERE p.Latitude BETWEEN ? AND ? AND p.Longitude BETWEEN ? AND ?
+        """
+    params = [min_lat, max_lat, min_lon, max_lon]
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return db_manager.execute_query(query, params)
+
+
+def place_dict(row, distance_km=None):
+    place = {
+        'id': row[0],
+        'name': row[1],
+        'address': row[2],
+        'type': row[3],
+        'latitude': row[4],
+        'longitude': row[5],
+        'map_link': f"https://www.google.com/maps?q={row[4]},{row[5]}",
+    }
+    if distance_km is not None:
+        place['distance_km'] = round(distance_km, 3)
+    return place
+
+
+def nearby_places(lat, lon, radius_km=DEFAULT_RADIUS_KM, limit=NEARBY_LIMIT):
+    """Places within radius_km of a point, nearest first"""
+    # Every candidate in the box is needed to find the nearest ones
+    candidates = places_in_box(*bounding_box(lat, lon, radius_km), limit=None)
+    nearby = []
+    for row in candidates:
+        distance = haversine_km(lat, lon, row[4], row[5])
+        if distance <= radius_km:
+            nearby.append((distance, row))
+    nearby.sort(key=lambda item: item[0])
+    return [place_dict(row, distance) for distance, row in nearby[:limit]]
+
+
+def _float_arg(name, low, high, default=None):
+    value = request.args.get(name, default)
+    if value is None:
+        raise ValueError(f"{name} is required")
+    value = float(value)
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+
+@geo_bp.route('/api/places/nearby')
+def places_nearby():
+    """Places near a point: ?lat=&lon=&radius= (km)"""
+    try:
+        lat = _float_arg('lat', -90, 90)
+        lon = _float_arg('lon', -180, 180)
+        radius = _float_arg('radius', 0, MAX_RADIUS_KM, DEFAULT_RADIUS_KM)
+        limit = min(max(int(request.args.get('limit', NEARBY_LIMIT)), 1), BBOX_LIMIT)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        places = nearby_places(lat, lon, radius, limit)
+        return jsonify({'success': True, 'places': places})
+    except Exception as e:
+        logger.error(f"Nearby places error: {e}")
+        return jsonify({'success': False, 'error': 'Server error'}), 500
+
+
+@geo_bp.route('/api/places/bbox')
+def places_bbox():
+    """Places inside a map viewport: ?min_lat=&min_lon=&max_lat=&max_lon="""
+    try:
+        min_lat = _float_arg('min_lat', -90, 90)
+        max_lat = _float_arg('max_lat', -90, 90)
+        min_lon = _float_arg('min_lon', -180, 180)
+        max_lon = _float_arg('max_lon', -180, 180)
+        limit = min(max(int(request.args.get('limit', BBOX_LIMIT)), 1), BBOX_LIMIT)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if min_lat > max_lat:
+        return jsonify({'success': False, 'error': 'min_lat must not exceed max_lat'}), 400
+
+    try:
+        if min_lon <= max_lon:
+            rows = places_in_box(min_lat, max_lat, min_lon, max_lon, limit)
+        else:
+            # Viewport crossing the antimeridian
+            rows = places_in_box(min_lat, max_lat, min_lon, 180.0, limit)
+            rows += places_in_box(min_lat, max_lat, -180.0, max_lon, limit - len(rows))
+        return jsonify({
+            'success': True,
+            'places': [place_dict(row) for row in rows],
+            'truncated': len(rows) >= limit,
+        })
+    except Exception as e:
+        logger.error(f"Places in viewport error: {e}")
+        return jsonify({'success': False, 'error': 'Server error'}), 500
+
+
+def init_app(app):
+    """Initialize the places geo API blueprint"""
+    app.register_blueprint(geo_bp)
@@ -0,0 +1,55 @@
+"""
+Upload image checks for SuliStreetMeet Platform
+
+Format sniffing and header validation shared by the upload paths and the
+card renderer. Only Pillow is imported here, never the database, so render
+workers can use it without setting up the app.
+"""
+
+import logging
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Allowed Pillow formats and the extension each is stored under
+IMAGE_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+# Refuse decompression bombs well before Pillow's own limit
+MAX_IMAGE_PIXELS = 40_000_000
+
+
+class InvalidImage(ValueError):
+    """Upload is not an acceptable image; the message can be shown to the user"""
+
+
+def sniff_image_format(head):
+    """Pillow format named by an upload's first bytes, or None
+
+    Lets a streamed upload be refused from its first chunk; open_image still
+    checks the complete file.
+    """
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'JPEG'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'PNG'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'GIF'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def open_image(source):
+    """Open an upload (path or file object) and check it is an allowed image
+
+    Only the header is read; raises InvalidImage for anything else.
+    """
+    try:
+        image = Image.open(source)
+    except Exception as e:
+        logger.info(f"Rejected upload that is not an image: {e}")
+        raise InvalidImage("File is not a readable image")
+    if image.format not in IMAGE_EXTENSIONS:
+        raise InvalidImage("Only JPEG, PNG, WebP or GIF images can be uploaded")
+    if image.width * image.height > MAX_IMAGE_PIXELS:
+        raise InvalidImage("Image dimensions are too large")
+    return image
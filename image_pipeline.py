@@ -0,0 +1,252 @@
+"""
+Responsive image variants for uploaded photos
+
+Uploaded images (profile pictures, vehicle photos) are decoded once with
+Pillow in a background worker pool and scaled down into a fixed set of WebP
+variants, largest first, each one resized from the previous. Variants are
+recorded in the image_variants table against the URL stored in
+vehicle_photos.PhotoURL or members.ProfilePicture. Templates ask for a size
+class with ``image_url(url, 'thumb')`` or ``image_srcset(url)``. Until the
+variants of an image exist, both fall back to the original.
+"""
+
+import os
+import io
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+from database_manager_hybrid import db_manager
+from upload_store import upload_store, parse_blob_url, UPLOAD_LIMITS, UploadTooLarge
+from image_checks import InvalidImage, IMAGE_EXTENSIONS, open_image
+
+logger = logging.getLogger(__name__)
+
+# Size classes and the longest edge of each, largest first
+VARIANT_SIZES = [('large', 1600), ('medium', 800), ('small', 400), ('thumb', 160)]
+WEBP_QUALITY = 80
+
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+# Seconds an image without variants is remembered before checking the database again
+PENDING_RECHECK_SECONDS = 30
+# Images whose variants are kept in memory, least recently used dropped first
+VARIANT_CACHE_SIZE = int(os.environ.get('VARIANT_CACHE_SIZE', 10000))
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+VARIANT_DIR = os.path.join(STATIC_DIR, 'uploads', 'variants')
+VARIANT_URL = '/static/uploads/variants'
+
+_executor = None
+_executor_lock = threading.Lock()
+_cache_lock = threading.Lock()
+# LRU of source URL -> {size: (url, width)}, or (None, checked_at) while pending
+_variants = OrderedDict()
+
+
+def install_image_variants():
+    """Create the image_variants table"""
+    if db_manager.db_type == 'sqlite':
+        statement = '''
+            CREATE TABLE IF NOT EXISTS image_variants (
+                SourceURL TEXT NOT NULL,
+                Size TEXT NOT NULL,
+                URL TEXT NOT NULL,
+                Width INTEGER NOT NULL,
+                Height INTEGER NOT NULL,
+                PRIMARY KEY (SourceURL, Size)
+            )
+        '''
+    else:
+        statement = '''
+            CREATE TABLE IF NOT EXISTS image_variants (
+                "SourceURL" TEXT NOT NULL,
+                "Size" TEXT NOT NULL,
+                "URL" TEXT NOT NULL,
+                "Width" INTEGER NOT NULL,
+                "Height" INTEGER NOT NULL,
+                PRIMARY KEY ("SourceURL", "Size")
+            )
+        '''
+    try:
+        with db_manager.get_db_connection() as conn:
+            conn.cursor().execute(statement)
+            conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Error creating image_variants table: {e}")
+        return False
+
+
+def render_variants(image):
+    """WebP bytes for every size class: {size: (bytes, width, height)}
+
+    The image is decoded once; each variant is scaled from the previous,
+    larger one, so the full-size pixels are only resampled a single time.
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = {}
+    current = image
+    for size, edge in VARIANT_SIZES:
+        if max(current.size) > edge:
+            current = current.copy()
+            current.thumbnail((edge, edge), Image.LANCZOS)
+        buffer = io.BytesIO()
+        current.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=4)
+        variants[size] = (buffer.getvalue(), current.width, current.height)
+    return variants
+
+
+def _variant_name(source_url, size):
+    digest = hashlib.sha1(source_url.encode()).hexdigest()[:20]
+    return f"{digest}_{size}.webp"
+
+
+def generate_variants(source_path, source_url):
+    """Render, store and record the variants of one image"""
+    with open_image(source_path) as image:
+        image.load()
+        variants = render_variants(image)
+
+    os.makedirs(VARIANT_DIR, exist_ok=True)
+    records = []
+    for size, (data, width, height) in variants.items():
+        name = _variant_name(source_url, size)
+        tmp_path = os.path.join(VARIANT_DIR, f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(VARIANT_DIR, name))
+        records.append((source_url, size, f"{VARIANT_URL}/{name}", width, height))
+
+    # Every size class is rendered each time, so one upsert replaces the old
+    # rows in a single statement and transaction
+    db_manager.execute_many("""
+        INSERT INTO image_variants (SourceURL, Size, URL, Width, Height) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (SourceURL, Size) DO UPDATE SET URL = excluded.URL, Width = excluded.Width, Height = excluded.Height
+    """, records)
+    with _cache_lock:
+        _remember(source_url, {size: (url, width) for _, size, url, width, _ in records})
+    return records
+
+
+def save_image_upload(file, kind):
+    """Validate and store an uploaded image, then schedule its variants
+
+    file is a Werkzeug FileStorage and kind a key of UPLOAD_LIMITS. The
+    original goes into the upload store, which counts the new reference;
+    returns its /media/ URL.
+    """
+    image_format = open_image(file.stream).format
+    file.stream.seek(0)
+    try:
+        url = upload_store.save_stream(file.stream, IMAGE_EXTENSIONS[image_format], max_bytes=UPLOAD_LIMITS[kind])
+    except UploadTooLarge:
+        raise InvalidImage(f"Image is larger than {UPLOAD_LIMITS[kind] // (1024 * 1024)} MB")
+    schedule_variants(upload_store.local_path(url), url)
+    return url
+
+
+def _run_variants(source_path, source_url):
+    started = time.perf_counter()
+    try:
+        generate_variants(source_path, source_url)
+        logger.info(f"Generated image variants for {source_url} in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        logger.error(f"Error generating image variants for {source_url}: {e}")
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix='image-variants')
+        return _executor
+
+
+def schedule_variants(source_path, source_url):
+    """Generate the variants of a stored upload in the background
+
+    Content-addressed uploads never change, so a blob whose variants are
+    already recorded is skipped; returns None then.
+    """
+    if parse_blob_url(source_url) and _lookup(source_url):
+        return None
+    with _cache_lock:
+        _variants.pop(source_url, None)
+    return _pool().submit(_run_variants, source_path, source_url)
+
+
+def preload_variants(urls):
+    """Load the recorded variants of many images with one query"""
+    with _cache_lock:
+        missing = [url for url in set(urls) if url and url not in _variants]
+    if not missing:
+        return
+    rows = db_manager.execute_query(
+        f"SELECT SourceURL, Size, URL, Width FROM image_variants WHERE SourceURL IN ({', '.join('?' for _ in missing)})",
+        missing
+    )
+    found = {}
+    for source_url, size, url, width in rows:
+        found.setdefault(source_url, {})[size] = (url, width)
+    now = time.monotonic()
+    with _cache_lock:
+        for url in missing:
+            _remember(url, found.get(url, (None, now)))
+
+
+def _remember(source_url, entry):
+    # Callers hold _cache_lock
+    _variants[source_url] = entry
+    _variants.move_to_end(source_url)
+    while len(_variants) > VARIANT_CACHE_SIZE:
+        _variants.popitem(last=False)
+
+
+def _lookup(source_url):
+    with _cache_lock:
+        entry = _variants.get(source_url)
+        if entry is not None:
+            _variants.move_to_end(source_url)
+    if isinstance(entry, tuple) and time.monotonic() - entry[1] >= PENDING_RECHECK_SECONDS:
+        with _cache_lock:
+            _variants.pop(source_url, None)
+        entry = None
+    if entry is None:
+        try:
+            preload_variants([source_url])
+        except Exception as e:
+            logger.error(f"Error loading image variants: {e}")
+            return {}
+        with _cache_lock:
+            entry = _variants.get(source_url)
+    return entry if isinstance(entry, dict) else {}
+
+
+def image_url(source_url, size='medium'):
+    """URL of a size class of an uploaded image, or the original until it exists"""
+    if not source_url:
+        return source_url
+    variant = _lookup(source_url).get(size)
+    return variant[0] if variant else source_url
+
+
+def image_srcset(source_url):
+    """srcset attribute value listing every variant by width"""
+    variants = _lookup(source_url) if source_url else {}
+    # Small originals give several size classes the same width; list each once
+    by_width = {width: url for url, width in variants.values()}
+    return ', '.join(f"{by_width[width]} {width}w" for width in sorted(by_width))
+
+
+def init_app(app):
+    """Register the image template helpers"""
+    install_image_variants()
+    app.add_template_global(image_url)
+    app.add_template_global(image_srcset)
@@ -0,0 +1,127 @@
+"""
+Keyset pagination for SuliStreetMeet list pages
+
+Pages are addressed by the sort key of a row at their edge rather than by an
+OFFSET, so every page costs one index range scan however deep it is. Sort
+keys must end in a unique column to make the order total, and nullable
+columns go in through date_key or another COALESCE. Cursors are opaque
+URL-safe strings holding those key values.
+"""
+
+import json
+import base64
+import datetime
+from flask import url_for
+from database_manager_hybrid import db_manager
+
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+# Stands in for a missing date in sort keys; sorts before every real date
+NO_DATE = "'0001-01-01'"
+
+
+def page_size(value, default=PAGE_SIZE):
+    """Requested page size clamped to 1..MAX_PAGE_SIZE"""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def date_key(column):
+    """Sort key expression for a nullable date column
+
+    Row-value comparisons never match a NULL, and SQLite and PostgreSQL sort
+    NULLs at opposite ends, so missing dates are keyed as NO_DATE instead.
+    """
+    return f"COALESCE({column}, {NO_DATE})"
+
+
+def encode_cursor(values):
+    """Opaque cursor for a list of sort key values
+
+    DATE and TIMESTAMP keys, which PostgreSQL returns as date and datetime
+    objects, are stored as ISO strings.
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(values), default=_iso_value).encode()).decode()
+
+
+def _iso_value(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def decode_cursor(cursor, length):
+    """Sort key values from a cursor, or None if it is missing or malformed
+
+    Dates come back as the ISO strings they were encoded as; both databases
+    compare those against date columns as dates.
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return tuple(values)
+
+
+def keyset_page(columns, from_clause, order, conditions=(), params=(), descending=False,
+                before=None, after=None, per_page=PAGE_SIZE):
+    """One page of rows ordered by the order columns
+
+    after continues forwards from a cursor, before goes back from one; both
+    are cursor strings. Returns (rows, prev_cursor, next_cursor), where a
+    cursor is None when there is no page in that direction.
+    """
+    before = decode_cursor(before, len(order))
+    after = decode_cursor(after, len(order)) if not before else None
+    conditions = list(conditions)
+    params = list(params)
+
+    key = f"({', '.join(order)})"
+    placeholders = f"({', '.join('?' for _ in order)})"
+    forward, backward = ('<', '>') if descending else ('>', '<')
+    direction = 'DESC' if descending else 'ASC'
+    if after:
+        conditions.append(f"{key} {forward} {placeholders}")
+        params.extend(after)
+    elif before:
+        # Walk the index the other way from the cursor and flip the rows
+        conditions.append(f"{key} {backward} {placeholders}")
+        params.extend(before)
+        direction = 'ASC' if descending else 'DESC'
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order_by = ', '.join(f"{column} {direction}" for column in order)
+    # The sort key is selected last so cursors can be read off the rows
+    rows = db_manager.execute_query(
+        f"SELECT {columns}, {', '.join(order)} FROM {from_clause} {where} ORDER BY {order_by} LIMIT ?",
+        params + [per_page + 1]
+    ) or []
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if before:
+        rows.reverse()
+    keys = [row[-len(order):] for row in rows]
+    rows = [row[:-len(order)] for row in rows]
+
+    if not rows:
+        return rows, None, None
+    has_prev = has_more if before else bool(after)
+    has_next = True if before else has_more
+    prev_cursor = encode_cursor(keys[0]) if has_prev else None
+    next_cursor = encode_cursor(keys[-1]) if has_next else None
+    return rows, prev_cursor, next_cursor
+
+
+def page_urls(endpoint, prev_cursor, next_cursor, **args):
+    """(prev_url, next_url) for a list route, keeping its other query arguments"""
+    args = {name: value for name, value in args.items() if value not in (None, '')}
+    prev_url = url_for(endpoint, before=prev_cursor, **args) if prev_cursor else None
+    next_url = url_for(endpoint, after=next_cursor, **args) if next_cursor else None
+    return prev_url, next_url
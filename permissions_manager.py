@@ -1,25 +1,62 @@
+import os
+import time
+import threading
 from functools import wraps
 from flask import session, redirect, url_for, flash, abort
 from database_manager_hybrid import db_manager
+from database_session import after_commit
+
+# Seconds a user's permissions are served from memory before being re-read.
+# Writes through PermissionManager or /update_permissions invalidate on commit;
+# the TTL only bounds staleness for changes made outside this process.
+PERMISSIONS_CACHE_TTL = float(os.environ.get('PERMISSIONS_CACHE_TTL', 60))
+
+_permissions_cache = {}
+_permissions_cache_lock = threading.Lock()
+
+def invalidate_permissions(user_id=None):
+    """Drop cached permissions for one user, or for everyone
+
+    Inside a request that changed permissions this waits for the commit;
+    dropping them earlier would let a concurrent request re-read and cache
+    the old rows.
+    """
+    after_commit(lambda: _drop_permissions(user_id))
+
+def _drop_permissions(user_id):
+    with _permissions_cache_lock:
+        if user_id is None:
+            _permissions_cache.clear()
+        else:
+            _permissions_cache.pop(str(user_id), None)
 
 class PermissionManager:
     """Centralized permission management for the application"""
     
     @staticmethod
     def get_user_permissions(user_id):
-        """Get all permissions for a specific user"""
+        """Get all permissions for a specific user (cached for PERMISSIONS_CACHE_TTL)"""
+        key = str(user_id)
+        with _permissions_cache_lock:
+            cached = _permissions_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return dict(cached[1]) if cached[1] else None
+
         try:
             permissions = db_manager.execute_query(
                 "SELECT * FROM permissions WHERE MemberID = ?",
                 [user_id]
             )
+            result = None
             if permissions:
-                return {
+                result = {
                     'can_edit_members': bool(permissions[0][2]),
                     'can_post_events': bool(permissions[0][3]),
                     'can_manage_vehicles': bool(permissions[0][4])
                 }
-            return None
+            with _permissions_cache_lock:
+                _permissions_cache[key] = (time.monotonic() + PERMISSIONS_CACHE_TTL, result)
+            return dict(result) if result else None
         except Exception as e:
             print(f"Error getting permissions: {e}")
             return None
@@ -57,6 +94,7 @@ class PermissionManager:
                     user_id
                 ]
             )
+            invalidate_permissions(user_id)
             return True
         except Exception as e:
             print(f"Error updating permissions: {e}")
@@ -70,6 +108,7 @@ class PermissionManager:
                 "INSERT INTO permissions (MemberID, CanEditMembers, CanPostEvents, CanManageVehicles) VALUES (?, 0, 0, 0)",
                 [user_id]
             )
+            invalidate_permissions(user_id)
             return True
         except Exception as e:
             print(f"Error creating default permissions: {e}")
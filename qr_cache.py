@@ -0,0 +1,118 @@
+import os
+import io
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import qrcode
+
+logger = logging.getLogger(__name__)
+
+# Bump when the rendering changes so cached images and ETags are replaced
+QR_RENDER_VERSION = 1
+
+QR_CACHE_MAX_BYTES = int(os.environ.get('QR_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+QR_CACHE_DIR = os.environ.get(
+    'QR_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'qr_cache')
+)
+
+
+def render_qr_png(data, box_size=10, border=4):
+    """Render data as a QR code PNG and return the bytes"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def qr_cache_key(ticket_id, box_size=10, border=4):
+    """Content address of a ticket QR image: same inputs, same PNG"""
+    raw = f"v{QR_RENDER_VERSION}|TICKET:{ticket_id}|{box_size}|{border}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class QRImageCache:
+    """
+    Two-level cache of rendered QR PNGs.
+
+    Images live in an in-memory LRU bounded by total bytes and, behind it, in
+    a sharded directory on disk that survives restarts and is shared by all
+    worker processes.
+    """
+
+    def __init__(self, max_bytes=QR_CACHE_MAX_BYTES, directory=QR_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._images = OrderedDict()
+        self._bytes = 0
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.png")
+
+    def _remember(self, key, png):
+        if len(png) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                return
+            self._images[key] = png
+            self._bytes += len(png)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get(self, key):
+        """Cached PNG bytes for key, or None"""
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return png
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                png = f.read()
+        except OSError:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+
+        with self._lock:
+            self._stats['disk_hits'] += 1
+        self._remember(key, png)
+        return png
+
+    def put(self, key, png):
+        """Store PNG bytes in memory and on disk"""
+        self._remember(key, png)
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write QR image to disk cache: {e}")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._images), bytes=self._bytes, max_bytes=self.max_bytes)
+
+
+# Global QR image cache instance
+qr_image_cache = QRImageCache()
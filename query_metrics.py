@@ -0,0 +1,127 @@
+import os
+import re
+import time
+import threading
+import logging
+from collections import Counter
+from functools import lru_cache
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+# Slow statements go to their own log file so they are not lost in app.log
+slow_query_logger = logging.getLogger('slow_queries')
+
+SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS', 200))
+# A statement shape repeated this often in one request is probably an N+1 loop
+REPEATED_QUERY_THRESHOLD = int(os.environ.get('DB_REPEATED_QUERY_THRESHOLD', 10))
+# Upper bound on distinct statement shapes kept in memory
+MAX_TRACKED_QUERIES = 500
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"IN\s*\((?:\s*\?\s*,)+\s*\?\s*\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(query):
+    """Collapse a statement to its shape: literals become ?, whitespace is squeezed"""
+    shape = _LITERAL_RE.sub('?', query)
+    shape = _IN_LIST_RE.sub('IN (...)', shape)
+    return _SPACE_RE.sub(' ', shape).strip()
+
+
+class QueryStats:
+    """Process-wide aggregate of query timings by statement shape"""
+
+    def __init__(self, max_entries=MAX_TRACKED_QUERIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def record(self, shape, duration_ms, rows, route):
+        with self._lock:
+            entry = self._entries.get(shape)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    # Drop the cheapest shape to make room
+                    cheapest = min(self._entries, key=lambda key: self._entries[key]['total_ms'])
+                    del self._entries[cheapest]
+                entry = self._entries[shape] = {
+                    'sql': shape, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'rows': 0, 'slow_count': 0, 'routes': Counter(),
+                }
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['rows'] += rows
+            if duration_ms >= SLOW_QUERY_MS:
+                entry['slow_count'] += 1
+            if route:
+                entry['routes'][route] += 1
+
+    def snapshot(self, order_by='total_ms', limit=50):
+        """Top statement shapes, most expensive first"""
+        with self._lock:
+            entries = [dict(entry, routes=dict(entry['routes'])) for entry in self._entries.values()]
+        for entry in entries:
+            entry['avg_ms'] = entry['total_ms'] / entry['count']
+        entries.sort(key=lambda entry: entry[order_by], reverse=True)
+        return entries[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+query_stats = QueryStats()
+
+
+def _row_count(result):
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, bool):
+        return int(result)
+    if isinstance(result, int):
+        return result
+    return 0
+
+
+def record_query(query, started, result):
+    """Record one executed statement; started is a time.perf_counter() value"""
+    duration_ms = (time.perf_counter() - started) * 1000
+    shape = normalize_sql(query)
+    rows = _row_count(result)
+    route = None
+
+    if has_request_context():
+        route = request.endpoint
+        g.db_query_count = g.get('db_query_count', 0) + 1
+        g.db_query_time = g.get('db_query_time', 0.0) + duration_ms
+        shapes = g.get('db_query_shapes')
+        if shapes is None:
+            shapes = g.db_query_shapes = Counter()
+        shapes[shape] += 1
+        if shapes[shape] == REPEATED_QUERY_THRESHOLD:
+            logger.warning(f"Possible N+1 query in {route}: ran {REPEATED_QUERY_THRESHOLD} times: {shape}")
+
+    query_stats.record(shape, duration_ms, rows, route)
+
+    if duration_ms >= SLOW_QUERY_MS:
+        slow_query_logger.warning(f"{duration_ms:.1f}ms rows={rows} route={route} sql={shape}")
+
+
+def init_app(app):
+    """Attach per-request query summaries to responses and set up the slow query log"""
+    log_path = os.environ.get('DB_SLOW_QUERY_LOG', os.path.join(app.root_path, 'slow_queries.log'))
+    if not slow_query_logger.handlers:
+        handler = logging.FileHandler(log_path)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.setLevel(logging.WARNING)
+
+    @app.after_request
+    def add_query_headers(response):
+        response.headers['X-DB-Query-Count'] = str(g.get('db_query_count', 0))
+        response.headers['X-DB-Time-Ms'] = f"{g.get('db_query_time', 0.0):.2f}"
+        return response
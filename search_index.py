@@ -0,0 +1,238 @@
+"""
+Full-text search for SuliStreetMeet Platform
+
+Members, vehicles and events are searched through a full-text index instead
+of leading-wildcard LIKE scans. On SQLite each table gets an external-content
+FTS5 table kept in sync by triggers; on PostgreSQL each table gets a GIN index
+over a weighted tsvector expression, which the database maintains itself.
+Every word of a search is matched as a prefix and results are ranked by
+relevance, with matches in the first listed columns weighing the most.
+
+Run ``python search_index.py --rebuild`` to repopulate the SQLite indexes
+from scratch.
+"""
+
+import re
+import sys
+import logging
+from database_manager_hybrid import db_manager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Most results a search returns; routes show them on one page
+SEARCH_LIMIT = 200
+# Words past this many are ignored
+MAX_TERMS = 8
+
+# Searchable tables: key column and (column, weight) pairs, heaviest first
+SEARCH_SOURCES = {
+    'members': {
+        'key': 'MemberID',
+        'columns': [('Username', 10.0), ('FirstName', 5.0), ('LastName', 5.0)],
+    },
+    'vehicles': {
+        'key': 'id',
+        'columns': [('Make', 5.0), ('Model', 5.0), ('Year', 2.0)],
+    },
+    'events': {
+        'key': 'EventID',
+        'columns': [('Title', 10.0), ('Location', 4.0), ('Description', 1.0)],
+    },
+}
+
+# PostgreSQL has four weight classes; columns are assigned them in order
+PG_WEIGHTS = 'ABCD'
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+_installed = set()
+
+
+def parse_terms(text):
+    """Lower-cased words of a search string"""
+    return TERM_RE.findall((text or '').lower())[:MAX_TERMS]
+
+
+def _fts_table(table):
+    return f"{table}_search"
+
+
+def _pg_vector(table):
+    """Weighted tsvector expression; the GIN index and queries must match it exactly"""
+    parts = [
+        f"setweight(to_tsvector('simple', coalesce(\"{column}\"::text, '')), '{PG_WEIGHTS[min(n, 3)]}')"
+        for n, (column, _) in enumerate(SEARCH_SOURCES[table]['columns'])
+    ]
+    return ' || '.join(parts)
+
+
+def _sqlite_statements(table):
+    source = SEARCH_SOURCES[table]
+    fts, key = _fts_table(table), source['key']
+    columns = [column for column, _ in source['columns']]
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f"NEW.{column}" for column in columns)
+    old_values = ', '.join(f"OLD.{column}" for column in columns)
+    return [
+        f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {column_list},
+                content='{table}', content_rowid='{key}',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS search_{table}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {fts} (rowid, {column_list}) VALUES (NEW.{key}, {new_values});
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS search_{table}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', OLD.{key}, {old_values});
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS search_{table}_update AFTER UPDATE OF {column_list} ON {table}
+            BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', OLD.{key}, {old_values});
+                INSERT INTO {fts} (rowid, {column_list}) VALUES (NEW.{key}, {new_values});
+            END
+        ''',
+    ]
+
+
+def _postgres_statements(table):
+    return [f"CREATE INDEX IF NOT EXISTS idx_{table}_search ON {table} USING GIN (({_pg_vector(table)}))"]
+
+
+def _trigger_names(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'search_%'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def install_search_index():
+    """Create the search indexes for every existing searchable table
+
+    On SQLite an FTS table is rebuilt whenever its triggers had to be added,
+    since rows written before then were not indexed.
+    """
+    tables = [table for table in SEARCH_SOURCES if db_manager.table_exists(table)]
+    with db_manager.get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            if db_manager.db_type == 'sqlite':
+                for table in tables:
+                    triggers_before = _trigger_names(cursor)
+                    for statement in _sqlite_statements(table):
+                        cursor.execute(statement)
+                    if _trigger_names(cursor) != triggers_before:
+                        cursor.execute(f"INSERT INTO {_fts_table(table)} ({_fts_table(table)}) VALUES ('rebuild')")
+                        logger.info(f"Built full-text search index for {table}")
+            else:
+                for table in tables:
+                    for statement in _postgres_statements(table):
+                        cursor.execute(statement)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error installing search index: {e}")
+            return False
+    _installed.update(tables)
+    return True
+
+
+def rebuild_search_index():
+    """Repopulate every SQLite FTS table from its base table"""
+    if db_manager.db_type != 'sqlite':
+        logger.info("PostgreSQL search indexes are maintained by the database")
+        return
+    with db_manager.get_db_connection() as conn:
+        cursor = conn.cursor()
+        for table in SEARCH_SOURCES:
+            if db_manager.table_exists(_fts_table(table)):
+                cursor.execute(f"INSERT INTO {_fts_table(table)} ({_fts_table(table)}) VALUES ('rebuild')")
+                logger.info(f"Rebuilt full-text search index for {table}")
+        conn.commit()
+
+
+def _index_ready(table):
+    """Whether the search index of table exists; positive results are remembered"""
+    if table in _installed:
+        return True
+    if db_manager.db_type == 'sqlite':
+        ready = db_manager.table_exists(_fts_table(table))
+    else:
+        ready = bool(db_manager.execute_query(
+            "SELECT 1 FROM pg_indexes WHERE indexname = ?", [f"idx_{table}_search"]
+        ))
+    if ready:
+        _installed.add(table)
+    return ready
+
+
+def _like_search(table, terms, limit):
+    """Unranked fallback for databases without the search index"""
+    source = SEARCH_SOURCES[table]
+    conditions = []
+    params = []
+    for term in terms:
+        conditions.append('(' + ' OR '.join(f"{column} LIKE ?" for column, _ in source['columns']) + ')')
+        params.extend([f'%{term}%'] * len(source['columns']))
+    return db_manager.execute_query(
+        f"SELECT {source['key']} FROM {table} WHERE {' AND '.join(conditions)} LIMIT ?",
+        params + [limit]
+    )
+
+
+def search(table, text, limit=SEARCH_LIMIT):
+    """Keys of the rows of table matching every word of text, best match first"""
+    terms = parse_terms(text)
+    if not terms:
+        return []
+
+    source = SEARCH_SOURCES[table]
+    if not _index_ready(table):
+        rows = _like_search(table, terms, limit)
+    elif db_manager.db_type == 'sqlite':
+        fts = _fts_table(table)
+        weights = ', '.join(str(weight) for _, weight in source['columns'])
+        # Each word is quoted, so FTS operators typed by users are taken literally
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        rows = db_manager.execute_query(
+            f"SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY bm25({fts}, {weights}) LIMIT ?",
+            [match, limit]
+        )
+    else:
+        vector = _pg_vector(table)
+        tsquery = ' & '.join(f"{term}:*" for term in terms)
+        rows = db_manager.execute_query(
+            f"SELECT \"{source['key']}\" FROM {table} WHERE ({vector}) @@ to_tsquery('simple', ?)"
+            f" ORDER BY ts_rank(({vector}), to_tsquery('simple', ?)) DESC LIMIT ?",
+            [tsquery, tsquery, limit]
+        )
+    return [row[0] for row in rows]
+
+
+def key_filter(column, keys):
+    """SQL condition and parameters restricting column to keys"""
+    if not keys:
+        return "1 = 0", []
+    return f"{column} IN ({', '.join('?' for _ in keys)})", list(keys)
+
+
+def order_by_rank(rows, keys, key_index=0):
+    """Rows sorted into the order of keys (best match first)"""
+    rank = {key: position for position, key in enumerate(keys)}
+    return sorted(rows, key=lambda row: rank.get(row[key_index], len(rank)))
+
+
+if __name__ == "__main__":
+    if '--rebuild' in sys.argv:
+        install_search_index()
+        rebuild_search_index()
+    else:
+        print("Usage: python search_index.py --rebuild")
+        sys.exit(1)
@@ -0,0 +1,223 @@
+"""
+SQL dialect translation for the hybrid database manager.
+
+Route code is written in SQLite style: ``?`` placeholders, unquoted CamelCase
+column names and SQLite date functions. The PostgreSQL schema uses quoted
+CamelCase identifiers and psycopg2 expects ``%s`` placeholders, so every
+statement is tokenized once, rewritten for PostgreSQL and cached by its text.
+"""
+
+import re
+from functools import lru_cache
+
+# Words left untouched when written in upper case; anything else with an
+# upper-case letter is a CamelCase identifier that PostgreSQL must see quoted.
+KEYWORDS = frozenset('''
+    ABS ADD AFTER ALL ALTER ANALYZE AND ANY AS ASC AVG BEFORE BEGIN BETWEEN BOOLEAN BY
+    CASCADE CASE CAST CHECK COALESCE COLLATE COLUMN COMMIT CONFLICT CONSTRAINT COUNT
+    CREATE CROSS CURRENT_DATE CURRENT_TIME CURRENT_TIMESTAMP DATE DEFAULT DELETE DESC
+    DISTINCT DO DOUBLE DROP EACH ELSE END ESCAPE EXCEPT EXCLUDED EXISTS EXPLAIN FALSE
+    FILTER FOR FOREIGN FROM FULL GLOB GROUP HAVING IF IGNORE ILIKE IN INDEX INNER INSERT
+    INTEGER INTERSECT INTERVAL INTO IS JOIN KEY LEFT LENGTH LIKE LIMIT LOWER MATCH MAX
+    MIN NATURAL NOCASE NOT NOTHING NULL NULLIF OFFSET ON OR ORDER OUTER OVER PARTITION
+    PLAN PRIMARY QUERY REAL REFERENCES RELEASE REPLACE RETURNING RIGHT ROLLBACK ROUND
+    ROW SAVEPOINT SELECT SERIAL SET SUBSTR SUM TABLE TEXT THEN TIME TIMESTAMP TO TRIGGER
+    TRUE UNION UNIQUE UPDATE UPPER USING VALUES VIEW WHEN WHERE WITH
+'''.split())
+
+# Columns declared BOOLEAN in PostgreSQL but compared against 0/1 in route code
+BOOLEAN_COLUMNS = frozenset([
+    'CanEditMembers', 'CanPostEvents', 'CanManageVehicles',
+    'IsPrimary', 'Featured', 'Published', 'IsRead',
+])
+
+STRFTIME_FORMATS = {
+    '%Y': 'YYYY', '%m': 'MM', '%d': 'DD',
+    '%H': 'HH24', '%M': 'MI', '%S': 'SS',
+}
+
+TOKEN_RE = re.compile(r"""
+    (?P<string>'(?:[^']|'')*')
+  | (?P<quoted>"(?:[^"]|"")*")
+  | (?P<pyformat>%s)
+  | (?P<placeholder>\?)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<space>\s+)
+  | (?P<op>!=|<>|<=|>=|.)
+""", re.VERBOSE | re.DOTALL)
+
+
+def tokenize(sql):
+    """Split a statement into (kind, text) tokens"""
+    return [(match.lastgroup, match.group()) for match in TOKEN_RE.finditer(sql)]
+
+
+def _next_significant(tokens, index):
+    """Index of the next non-whitespace token after index, or None"""
+    index += 1
+    while index < len(tokens) and tokens[index][0] == 'space':
+        index += 1
+    return index if index < len(tokens) else None
+
+
+def _call_arguments(tokens, open_index):
+    """Split the arguments of a call whose '(' is at open_index
+
+    Returns (arguments, close_index) where each argument is a token list
+    stripped of surrounding whitespace.
+    """
+    depth = 0
+    arguments = [[]]
+    for index in range(open_index, len(tokens)):
+        kind, text = tokens[index]
+        if text == '(':
+            depth += 1
+            if depth == 1:
+                continue
+        elif text == ')':
+            depth -= 1
+            if depth == 0:
+                arguments = [_strip(argument) for argument in arguments]
+                return [argument for argument in arguments if argument], index
+        elif text == ',' and depth == 1:
+            arguments.append([])
+            continue
+        arguments[-1].append((kind, text))
+    raise ValueError("Unbalanced parentheses in SQL statement")
+
+
+def _strip(tokens):
+    while tokens and tokens[0][0] == 'space':
+        tokens = tokens[1:]
+    while tokens and tokens[-1][0] == 'space':
+        tokens = tokens[:-1]
+    return tokens
+
+
+def _literal_value(argument):
+    """Python value of a single string literal argument, or None"""
+    if len(argument) == 1 and argument[0][0] == 'string':
+        return argument[0][1][1:-1].replace("''", "'")
+    return None
+
+
+def _date_modifier(modifier):
+    """Turn an SQLite date modifier like '-30 days' into an interval expression"""
+    match = re.fullmatch(r"\s*([+-]?)\s*(\d+)\s+(day|month|year|hour|minute)s?\s*", modifier or '', re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Unsupported SQLite date modifier: {modifier!r}")
+    sign, amount, unit = match.groups()
+    operator = '-' if sign == '-' else '+'
+    return f"{operator} INTERVAL '{amount} {unit.lower()}s'"
+
+
+def _rewrite_call(name, arguments):
+    """PostgreSQL replacement for an SQLite date function call, or None"""
+    values = [_literal_value(argument) for argument in arguments]
+
+    if name in ('date', 'datetime'):
+        now = 'CURRENT_DATE' if name == 'date' else 'CURRENT_TIMESTAMP'
+        if not arguments:
+            return [('word', now)]
+        if values[0] != 'now':
+            return None
+        if len(arguments) == 1:
+            return [('word', now)]
+        expression = f"({now} {' '.join(_date_modifier(value) for value in values[1:])})"
+        if name == 'date':
+            expression = f"CAST({expression} AS DATE)"
+        return [('sql', expression)]
+
+    if name == 'strftime' and values and values[0] is not None:
+        pg_format = values[0]
+        for sqlite_code, pg_code in STRFTIME_FORMATS.items():
+            pg_format = pg_format.replace(sqlite_code, pg_code)
+        if len(arguments) == 1 or values[1] == 'now':
+            target = [('word', 'CURRENT_TIMESTAMP')]
+        else:
+            target = arguments[1]
+        return [('word', 'to_char'), ('op', '(')] + target + [('op', ','), ('space', ' '), ('string', f"'{pg_format}'"), ('op', ')')]
+
+    return None
+
+
+def _rewrite_functions(tokens):
+    output = []
+    index = 0
+    while index < len(tokens):
+        kind, text = tokens[index]
+        if kind == 'word' and text.lower() in ('date', 'datetime', 'strftime'):
+            open_index = _next_significant(tokens, index)
+            if open_index is not None and tokens[open_index][1] == '(':
+                arguments, close_index = _call_arguments(tokens, open_index)
+                replacement = _rewrite_call(text.lower(), [_rewrite_functions(argument) for argument in arguments])
+                if replacement is not None:
+                    output.extend(replacement)
+                    index = close_index + 1
+                    continue
+        output.append((kind, text))
+        index += 1
+    return output
+
+
+def _is_identifier(tokens, index):
+    kind, text = tokens[index]
+    if kind != 'word' or text.lower() == text:
+        return False
+    if text.upper() == text and text in KEYWORDS:
+        return False
+    following = _next_significant(tokens, index)
+    # Mixed-case function names are left alone
+    return following is None or tokens[following][1] != '('
+
+
+def _to_postgres(tokens, escape_percent):
+    output = []
+    for index, (kind, text) in enumerate(tokens):
+        if kind == 'placeholder':
+            text = '%s'
+        elif kind == 'word' and text.upper() == 'LIKE' and text.upper() == text:
+            # SQLite's LIKE is case-insensitive for ASCII, PostgreSQL's is not
+            text = 'ILIKE'
+        elif _is_identifier(tokens, index):
+            text = f'"{text}"'
+        elif kind in ('string', 'op', 'sql') and escape_percent:
+            text = text.replace('%', '%%')
+        elif kind == 'number' and text in ('0', '1'):
+            text = _boolean_literal(tokens, index) or text
+        output.append(text)
+    return ''.join(output)
+
+
+def _boolean_literal(tokens, index):
+    """TRUE/FALSE for a 0/1 compared with a boolean column, else None"""
+    operator = index - 1
+    while operator >= 0 and tokens[operator][0] == 'space':
+        operator -= 1
+    if operator < 0 or tokens[operator][1] not in ('=', '!=', '<>'):
+        return None
+    column = operator - 1
+    while column >= 0 and tokens[column][0] == 'space':
+        column -= 1
+    if column < 0 or tokens[column][1].strip('"') not in BOOLEAN_COLUMNS:
+        return None
+    return 'TRUE' if tokens[index][1] == '1' else 'FALSE'
+
+
+@lru_cache(maxsize=2048)
+def translate_query(sql, dialect, escape_percent=True):
+    """Translate an SQLite-style statement for the given dialect
+
+    escape_percent doubles literal '%' characters, which psycopg2 requires
+    whenever parameters are passed alongside the statement.
+    """
+    if dialect != 'postgres':
+        return sql
+    tokens = _rewrite_functions(tokenize(sql))
+    return _to_postgres(tokens, escape_percent)
+
+
+def translation_cache_info():
+    """Hit/miss statistics of the translation cache"""
+    return translate_query.cache_info()
@@ -0,0 +1,107 @@
+// Resumable uploads for file inputs marked with data-chunked-upload="<kind>".
+// On submit the file is sent to /api/uploads in pieces with Content-Range
+// headers; a failed piece is retried from the offset the server reports.
+// The form is then submitted with the finished upload_id instead of the file.
+document.addEventListener('DOMContentLoaded', function () {
+    const MAX_RETRIES = 5;
+
+    document.querySelectorAll('input[type="file"][data-chunked-upload]').forEach(function (input) {
+        const form = input.form;
+        if (!form) {
+            return;
+        }
+        const button = form.querySelector('[type="submit"]');
+        let uploading = false;
+
+        form.addEventListener('submit', async function (event) {
+            const file = input.files[0];
+            if (!file || uploading) {
+                return;
+            }
+            event.preventDefault();
+            uploading = true;
+            if (button) {
+                button.disabled = true;
+            }
+            try {
+                const uploadId = await upload(file, input.dataset.chunkedUpload);
+                let hidden = form.querySelector('input[name="upload_id"]');
+                if (!hidden) {
+                    hidden = document.createElement('input');
+                    hidden.type = 'hidden';
+                    hidden.name = 'upload_id';
+                    form.appendChild(hidden);
+                }
+                hidden.value = uploadId;
+                // The file has been uploaded already; do not post it again
+                input.removeAttribute('name');
+                input.required = false;
+                form.submit();
+            } catch (error) {
+                alert(`Upload failed: ${error.message}`);
+                uploading = false;
+                if (button) {
+                    button.disabled = false;
+                    button.textContent = button.dataset.label || button.textContent;
+                }
+            }
+        });
+
+        function progress(sent, total) {
+            if (button) {
+                button.dataset.label = button.dataset.label || button.textContent;
+                button.textContent = `Uploading ${Math.floor(sent * 100 / total)}%`;
+            }
+        }
+
+        async function upload(file, kind) {
+            let response = await fetch('/api/uploads', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ kind: kind, size: file.size })
+            });
+            let data = await response.json();
+            if (!data.success) {
+                throw new Error(data.error);
+            }
+            const uploadId = data.upload_id;
+            const pieceSize = data.piece_size;
+            let offset = 0;
+            let retries = 0;
+
+            while (offset < file.size) {
+                const end = Math.min(offset + pieceSize, file.size);
+                try {
+                    response = await fetch(`/api/uploads/${uploadId}`, {
+                        method: 'PUT',
+                        headers: { 'Content-Range': `bytes ${offset}-${end - 1}/${file.size}` },
+                        body: file.slice(offset, end)
+                    });
+                    data = await response.json();
+                } catch (error) {
+                    // Connection lost: ask the server how much arrived
+                    if (++retries > MAX_RETRIES) {
+                        throw error;
+                    }
+                    await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+                    const status = await (await fetch(`/api/uploads/${uploadId}`)).json();
+                    offset = status.received;
+                    continue;
+                }
+                if (data.success) {
+                    offset = data.received;
+                    retries = 0;
+                } else if (response.status === 409 || (response.status === 400 && 'received' in data)) {
+                    offset = data.received;
+                    if (++retries > MAX_RETRIES) {
+                        throw new Error(data.error);
+                    }
+                } else {
+                    throw new Error(data.error);
+                }
+                progress(offset, file.size);
+            }
+            return uploadId;
+        }
+    });
+});
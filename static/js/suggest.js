@@ -0,0 +1,58 @@
+// Typeahead for inputs marked with data-suggest="make|model|vehicle|username|place".
+// Suggestions come from /api/suggest and are shown through a <datalist>.
+// A model input can name its make input with data-suggest-make="#make".
+document.addEventListener('DOMContentLoaded', function () {
+    const DEBOUNCE_MS = 120;
+    const cache = new Map();
+
+    document.querySelectorAll('input[data-suggest]').forEach(function (input, n) {
+        const list = document.createElement('datalist');
+        list.id = `suggest-list-${n}`;
+        input.setAttribute('list', list.id);
+        input.setAttribute('autocomplete', 'off');
+        input.after(list);
+
+        let timer = null;
+        let controller = null;
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(fetchSuggestions, DEBOUNCE_MS);
+        });
+
+        async function fetchSuggestions() {
+            const prefix = input.value.trim();
+            if (!prefix) {
+                list.innerHTML = '';
+                return;
+            }
+            const params = new URLSearchParams({ kind: input.dataset.suggest, q: prefix });
+            const makeInput = input.dataset.suggestMake && document.querySelector(input.dataset.suggestMake);
+            if (makeInput && makeInput.value && makeInput.value !== 'Other') {
+                params.set('make', makeInput.value);
+            }
+
+            const url = `/api/suggest?${params}`;
+            let suggestions = cache.get(url);
+            if (!suggestions) {
+                if (controller) controller.abort();
+                controller = new AbortController();
+                try {
+                    const response = await fetch(url, { signal: controller.signal });
+                    if (!response.ok) return;
+                    suggestions = (await response.json()).suggestions;
+                    cache.set(url, suggestions);
+                } catch (error) {
+                    return;
+                }
+            }
+
+            list.innerHTML = '';
+            suggestions.forEach(function (value) {
+                const option = document.createElement('option');
+                option.value = value;
+                list.appendChild(option);
+            });
+        }
+    });
+});
@@ -0,0 +1,252 @@
+"""
+Trigger-maintained dashboard counters for SuliStreetMeet Platform
+
+The stats_counters table holds one row per counter (members, vehicles, events,
+tickets by status and ticket revenue). Database triggers update it in the
+same transaction as the insert, update or delete that changes it, so the
+dashboards read a handful of rows instead of scanning the big tables.
+
+Run ``python stats_counters.py --rebuild`` to recompute every counter from
+scratch, e.g. after data was changed with the triggers missing.
+"""
+
+import sys
+import logging
+from database_manager_hybrid import db_manager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tables whose row count is kept in a counter of the same name
+COUNTED_TABLES = ['members', 'vehicles', 'events']
+
+TICKET_STATUSES = ['valid', 'used', 'expired']
+
+TICKET_COUNTERS = ['tickets_total'] + [f'tickets_{status}' for status in TICKET_STATUSES] + ['revenue']
+
+COUNTERS = COUNTED_TABLES + TICKET_COUNTERS
+
+
+def _column(name):
+    return name if db_manager.db_type == 'sqlite' else f'"{name}"'
+
+
+def _ticket_delta(row):
+    """Per-counter change caused by one ticket row (NEW or OLD)"""
+    name, status, price = _column('Name'), f"{row}.{_column('Status')}", f"{row}.{_column('Price')}"
+    return (
+        f"CASE WHEN {name} = 'tickets_total' THEN 1"
+        f" WHEN {name} = 'revenue' THEN (CASE WHEN {status} IN ('valid', 'used') THEN COALESCE({price}, 0) ELSE 0 END)"
+        f" WHEN {name} = 'tickets_' || {status} THEN 1"
+        f" ELSE 0 END"
+    )
+
+
+def _ticket_update(row, sign):
+    names = ', '.join(f"'{counter}'" for counter in TICKET_COUNTERS)
+    value = _column('Value')
+    return f"UPDATE stats_counters SET {value} = {value} {sign} ({_ticket_delta(row)}) WHERE {_column('Name')} IN ({names})"
+
+
+def _sqlite_statements(existing_tables):
+    statements = ['''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            Name TEXT PRIMARY KEY,
+            Value REAL NOT NULL DEFAULT 0
+        )
+    ''']
+    for table in COUNTED_TABLES:
+        if table not in existing_tables:
+            continue
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS stats_{table}_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE stats_counters SET Value = Value + 1 WHERE Name = '{table}';
+            END
+        ''')
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS stats_{table}_delete AFTER DELETE ON {table}
+            BEGIN
+                UPDATE stats_counters SET Value = Value - 1 WHERE Name = '{table}';
+            END
+        ''')
+    if 'tickets' in existing_tables:
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS stats_tickets_insert AFTER INSERT ON tickets
+            BEGIN
+                {_ticket_update('NEW', '+')};
+            END
+        ''')
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS stats_tickets_update AFTER UPDATE OF Status, Price ON tickets
+            BEGIN
+                {_ticket_update('OLD', '-')};
+                {_ticket_update('NEW', '+')};
+            END
+        ''')
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS stats_tickets_delete AFTER DELETE ON tickets
+            BEGIN
+                {_ticket_update('OLD', '-')};
+            END
+        ''')
+    return statements
+
+
+def _postgres_statements(existing_tables):
+    statements = ['''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            "Name" TEXT PRIMARY KEY,
+            "Value" NUMERIC NOT NULL DEFAULT 0
+        )
+    ''', '''
+        CREATE OR REPLACE FUNCTION stats_counters_row_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE stats_counters SET "Value" = "Value" + 1 WHERE "Name" = TG_ARGV[0];
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE stats_counters SET "Value" = "Value" - 1 WHERE "Name" = TG_ARGV[0];
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    ''', f'''
+        CREATE OR REPLACE FUNCTION stats_counters_tickets() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                {_ticket_update('OLD', '-')};
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                {_ticket_update('NEW', '+')};
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    ''']
+    for table in COUNTED_TABLES:
+        if table not in existing_tables:
+            continue
+        statements.append(f'DROP TRIGGER IF EXISTS stats_{table}_count ON {table}')
+        statements.append(f'''
+            CREATE TRIGGER stats_{table}_count AFTER INSERT OR DELETE ON {table}
+            FOR EACH ROW EXECUTE PROCEDURE stats_counters_row_count('{table}')
+        ''')
+    if 'tickets' in existing_tables:
+        statements.append('DROP TRIGGER IF EXISTS stats_tickets_count ON tickets')
+        statements.append('''
+            CREATE TRIGGER stats_tickets_count AFTER INSERT OR DELETE OR UPDATE OF "Status", "Price" ON tickets
+            FOR EACH ROW EXECUTE PROCEDURE stats_counters_tickets()
+        ''')
+    return statements
+
+
+def _recompute(cursor, existing_tables):
+    """Current counter values computed from the base tables"""
+    values = dict.fromkeys(COUNTERS, 0)
+    for table in COUNTED_TABLES:
+        if table in existing_tables:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            values[table] = cursor.fetchone()[0]
+    if 'tickets' in existing_tables:
+        status, price = _column('Status'), _column('Price')
+        cursor.execute(f'''
+            SELECT COUNT(*),
+                   SUM(CASE WHEN {status} = 'valid' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN {status} = 'used' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN {status} = 'expired' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN {status} IN ('valid', 'used') THEN COALESCE({price}, 0) ELSE 0 END)
+            FROM tickets
+        ''')
+        row = cursor.fetchone()
+        for counter, value in zip(TICKET_COUNTERS, row):
+            values[counter] = value or 0
+    return values
+
+
+def _write_counters(cursor, values):
+    placeholder = '?' if db_manager.db_type == 'sqlite' else '%s'
+    cursor.execute("DELETE FROM stats_counters")
+    cursor.executemany(
+        f"INSERT INTO stats_counters ({_column('Name')}, {_column('Value')}) VALUES ({placeholder}, {placeholder})",
+        list(values.items())
+    )
+
+
+def _existing_tables():
+    return {table for table in COUNTED_TABLES + ['tickets'] if db_manager.table_exists(table)}
+
+
+def _trigger_names(cursor):
+    if db_manager.db_type == 'sqlite':
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'stats_%'")
+    else:
+        cursor.execute("SELECT tgname FROM pg_trigger WHERE NOT tgisinternal AND tgname LIKE 'stats_%'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def install_counters():
+    """Create the counters table and triggers
+
+    The counters are recomputed whenever a trigger had to be added (new
+    install, or a counted table that did not exist last time), since rows
+    written before then were not counted.
+    """
+    tables = _existing_tables()
+    statements = _sqlite_statements(tables) if db_manager.db_type == 'sqlite' else _postgres_statements(tables)
+
+    with db_manager.get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            triggers_before = _trigger_names(cursor)
+            for statement in statements:
+                cursor.execute(statement)
+            if _trigger_names(cursor) != triggers_before:
+                _write_counters(cursor, _recompute(cursor, tables))
+                logger.info("Installed stats counter triggers and recomputed counters")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error installing stats counters: {e}")
+            return False
+    return True
+
+
+def rebuild_counters():
+    """Recompute every counter from the base tables in one transaction"""
+    tables = _existing_tables()
+    with db_manager.get_db_connection() as conn:
+        cursor = conn.cursor()
+        if db_manager.db_type == 'sqlite':
+            # Block writers between the recount and the rewrite
+            cursor.execute("BEGIN IMMEDIATE")
+        else:
+            cursor.execute("LOCK TABLE stats_counters IN EXCLUSIVE MODE")
+        try:
+            values = _recompute(cursor, tables)
+            _write_counters(cursor, values)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    logger.info(f"Rebuilt stats counters: {values}")
+    return values
+
+
+def read_counters():
+    """All counters as a dict; the table must have been installed"""
+    rows = db_manager.execute_query("SELECT Name, Value FROM stats_counters")
+    values = dict.fromkeys(COUNTERS, 0)
+    for name, value in rows:
+        # Revenue is accumulated in floating point; round away the drift
+        values[name] = round(float(value), 2) if name == 'revenue' else int(value)
+    return values
+
+
+if __name__ == "__main__":
+    if '--rebuild' in sys.argv:
+        install_counters()
+        for name, value in rebuild_counters().items():
+            print(f"{name}: {value}")
+    else:
+        print("Usage: python stats_counters.py --rebuild")
+        sys.exit(1)
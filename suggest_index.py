@@ -0,0 +1,189 @@
+"""
+Typeahead suggestions for SuliStreetMeet Platform
+
+Vehicle makes and models, usernames and place names are kept in memory as
+sorted arrays and answered with a binary search, so per-keystroke suggestions
+never touch the database. Inserts are added to the arrays as they happen;
+updates and deletes mark the affected index stale and it is reloaded on the
+next lookup. Each worker process also reloads its indexes every
+SUGGEST_REFRESH_SECONDS to pick up writes made by other workers.
+"""
+
+import os
+import time
+import bisect
+import logging
+import threading
+from flask import Blueprint, jsonify, request, session
+from database_manager_hybrid import db_manager
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_REFRESH_SECONDS = float(os.environ.get('SUGGEST_REFRESH_SECONDS', 300))
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 25
+MAX_PREFIX_LENGTH = 64
+
+# Separates make and model in the keys of the per-make model index
+MAKE_SEPARATOR = '\x1f'
+
+# Rows each index is loaded from; every row is (key parts..., display value)
+SUGGEST_QUERIES = {
+    'make': "SELECT Make, Make FROM vehicles WHERE Make IS NOT NULL",
+    'model': "SELECT Model, Model FROM vehicles WHERE Model IS NOT NULL",
+    'make_model': "SELECT Make, Model, Model FROM vehicles WHERE Make IS NOT NULL AND Model IS NOT NULL",
+    'username': "SELECT Username, Username FROM members",
+    'place': "SELECT Name, Name FROM places",
+}
+
+# Kinds that are only suggested to signed-in users
+PRIVATE_KINDS = {'username'}
+
+suggest_bp = Blueprint('suggest', __name__)
+
+
+def normalize(value):
+    """Case- and whitespace-insensitive form used for keys and prefixes"""
+    return ' '.join(str(value).split()).casefold()
+
+
+def _key(parts):
+    return MAKE_SEPARATOR.join(normalize(part) for part in parts)
+
+
+class PrefixIndex:
+    """
+    Sorted array of normalized keys answering prefix lookups with bisect.
+
+    Each key remembers how many rows carry it, so a make shared by many
+    vehicles stays suggested until the last of them is gone.
+    """
+
+    def __init__(self, rows=()):
+        self._counts = {}
+        self._display = {}
+        for row in rows:
+            self._count(_key(row[:-1]), row[-1])
+        self._keys = sorted(self._counts)
+
+    def _count(self, key, display):
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self._display.setdefault(key, display)
+
+    def add(self, parts, display):
+        key = _key(parts)
+        if key not in self._counts:
+            bisect.insort(self._keys, key)
+        self._count(key, display)
+
+    def lookup(self, prefix, limit=SUGGEST_LIMIT):
+        """Display values of up to limit keys starting with prefix, in key order"""
+        start = bisect.bisect_left(self._keys, prefix)
+        results = []
+        for key in self._keys[start:start + limit]:
+            if not key.startswith(prefix):
+                break
+            results.append(self._display[key])
+        return results
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class SuggestIndex:
+    """Lazily loaded prefix indexes, one per suggestion kind"""
+
+    def __init__(self, db, refresh_seconds=SUGGEST_REFRESH_SECONDS):
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self._loaded_at = {}
+
+    def _load(self, kind):
+        try:
+            rows = self.db.execute_query(SUGGEST_QUERIES[kind])
+        except Exception as e:
+            logger.error(f"Error loading {kind} suggestions: {e}")
+            rows = []
+        return PrefixIndex(rows)
+
+    def _index(self, kind):
+        loaded_at = self._loaded_at.get(kind)
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_seconds:
+            # Load outside the lock; lookups keep using the old index meanwhile
+            index = self._load(kind)
+            with self._lock:
+                self._indexes[kind] = index
+                self._loaded_at[kind] = time.monotonic()
+        return self._indexes[kind]
+
+    def suggest(self, kind, prefix, limit=SUGGEST_LIMIT, make=None):
+        """Suggestions of a kind starting with prefix; models can be limited to one make"""
+        prefix = normalize(prefix)
+        if make and kind == 'model':
+            kind, prefix = 'make_model', _key([make, prefix])
+        index = self._index(kind)
+        with self._lock:
+            return index.lookup(prefix, limit)
+
+    def add(self, kind, parts, display):
+        """Add one newly written row to a loaded index"""
+        with self._lock:
+            if kind in self._indexes:
+                self._indexes[kind].add(parts, display)
+
+    def add_vehicle(self, make, model):
+        self.add('make', [make], make)
+        self.add('model', [model], model)
+        self.add('make_model', [make, model], model)
+
+    def add_member(self, username):
+        self.add('username', [username], username)
+
+    def add_place(self, name):
+        self.add('place', [name], name)
+
+    def invalidate(self, *kinds):
+        """Reload the given indexes (all of them by default) on next use"""
+        with self._lock:
+            for kind in kinds or list(self._loaded_at):
+                self._loaded_at.pop(kind, None)
+
+
+# Global suggestion index instance
+suggest_index = SuggestIndex(db_manager)
+
+
+@suggest_bp.route('/api/suggest')
+def suggest():
+    """Typeahead suggestions: ?kind=make|model|vehicle|username|place&q=prefix"""
+    kind = request.args.get('kind', '')
+    prefix = request.args.get('q', '')[:MAX_PREFIX_LENGTH]
+    try:
+        limit = min(max(int(request.args.get('limit', SUGGEST_LIMIT)), 1), SUGGEST_MAX_LIMIT)
+    except ValueError:
+        limit = SUGGEST_LIMIT
+
+    if kind not in ('make', 'model', 'vehicle', 'username', 'place'):
+        return jsonify({'success': False, 'error': 'Unknown suggestion kind'}), 400
+    if kind in PRIVATE_KINDS and 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'Login required'}), 401
+    if not prefix.strip():
+        return jsonify({'success': True, 'kind': kind, 'suggestions': []})
+
+    if kind == 'vehicle':
+        # Makes first, then models, for the vehicle search boxes
+        suggestions = suggest_index.suggest('make', prefix, limit)
+        suggestions += suggest_index.suggest('model', prefix, limit - len(suggestions))
+    else:
+        suggestions = suggest_index.suggest(kind, prefix, limit, make=request.args.get('make'))
+
+    response = jsonify({'success': True, 'kind': kind, 'suggestions': suggestions})
+    response.headers['Cache-Control'] = 'private, max-age=60'
+    return response
+
+
+def init_app(app):
+    """Initialize the suggestion API blueprint"""
+    app.register_blueprint(suggest_bp)
@@ -1,6 +1,8 @@
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, render_template, jsonify, request
 from database_manager_hybrid import db_manager
 from permissions_manager import require_admin
+from query_metrics import query_stats, SLOW_QUERY_MS
+from dashboard_stats import dashboard_stats
 from datetime import datetime, timedelta
 import logging
 
@@ -13,26 +15,19 @@ system_analytics_bp = Blueprint('system_analytics', __name__)
 def system_analytics():
     """Display system analytics dashboard"""
     try:
-        # Get user activity statistics
-        total_users = db_manager.execute_query("SELECT COUNT(*) FROM members")[0][0]
-        # Note: LastLogin column doesn't exist in members table, so we'll use JoinDate as proxy for active users
-        active_users = db_manager.execute_query("SELECT COUNT(*) FROM members WHERE JoinDate >= date('now', '-30 days')")[0][0] if db_manager.db_type == 'sqlite' else db_manager.execute_query("SELECT COUNT(*) FROM members WHERE JoinDate >= DATE_SUB(NOW(), INTERVAL 30 DAY)")[0][0]
-
-        # Get event statistics
-        total_events = db_manager.execute_query("SELECT COUNT(*) FROM events")[0][0]
-        upcoming_events = db_manager.execute_query("SELECT COUNT(*) FROM events WHERE EventDate >= date('now')")[0][0] if db_manager.db_type == 'sqlite' else db_manager.execute_query("SELECT COUNT(*) FROM events WHERE EventDate >= CURDATE()")[0][0]
-        past_events = total_events - upcoming_events
-
-        # Get vehicle statistics
-        total_vehicles = db_manager.execute_query("SELECT COUNT(*) FROM vehicles")[0][0]
-
-        # Get ticket statistics if tickets table exists
-        ticket_stats = {'total': 0, 'sold': 0, 'revenue': 0}
-        if db_manager.table_exists('tickets'):
-            ticket_stats['total'] = db_manager.execute_query("SELECT COUNT(*) FROM tickets")[0][0]
-            ticket_stats['sold'] = db_manager.execute_query("SELECT COUNT(*) FROM tickets WHERE Status IN ('valid', 'used')")[0][0]
-            revenue_result = db_manager.execute_query("SELECT SUM(Price) FROM tickets WHERE Status IN ('valid', 'used')")[0][0]
-            ticket_stats['revenue'] = revenue_result if revenue_result else 0
+        # Get member, event, vehicle and ticket counters
+        stats = dashboard_stats.get()
+        total_users = stats['total_members']
+        active_users = stats['active_members']
+        total_events = stats['total_events']
+        upcoming_events = stats['upcoming_events']
+        past_events = stats['past_events']
+        total_vehicles = stats['total_vehicles']
+        ticket_stats = {
+            'total': stats['total_tickets'],
+            'sold': stats['sold_tickets'],
+            'revenue': stats['total_revenue']
+        }
 
         # Get recent activity (last 10 actions)
         recent_activity = []
@@ -79,6 +74,11 @@ def system_analytics():
             'server_uptime': 'Unknown',
             'memory_usage': 'Unknown'
         }
+        try:
+            pool_stats = db_manager.get_pool_stats()
+            system_health['connection_pool'] = f"{pool_stats['in_use']}/{pool_stats['max_size']} in use, {pool_stats['idle']} idle"
+        except Exception as e:
+            logger.error(f"Error fetching connection pool stats: {e}")
 
         return render_template('system_analytics.html',
                              total_users=total_users,
@@ -102,22 +102,13 @@ def user_growth_api():
     """API endpoint for user growth chart data"""
     try:
         # Get user registration data for the last 12 months
-        if db_manager.db_type == 'sqlite':
-            growth_data = db_manager.execute_query("""
-                SELECT strftime('%Y-%m', JoinDate) as month, COUNT(*) as count
-                FROM members
-                WHERE JoinDate >= date('now', '-12 months')
-                GROUP BY strftime('%Y-%m', JoinDate)
-                ORDER BY month
-            """)
-        else:
-            growth_data = db_manager.execute_query("""
-                SELECT DATE_FORMAT(JoinDate, '%Y-%m') as month, COUNT(*) as count
-                FROM members
-                WHERE JoinDate >= DATE_SUB(NOW(), INTERVAL 12 MONTH)
-                GROUP BY DATE_FORMAT(JoinDate, '%Y-%m')
-                ORDER BY month
-            """)
+        growth_data = db_manager.execute_query("""
+            SELECT strftime('%Y-%m', JoinDate) as month, COUNT(*) as count
+            FROM members
+            WHERE JoinDate >= date('now', '-12 months')
+            GROUP BY strftime('%Y-%m', JoinDate)
+            ORDER BY month
+        """)
 
         data = {
             'labels': [row[0] for row in growth_data],
@@ -144,14 +135,6 @@ def event_participation_api():
             GROUP BY e.EventID, e.Title
             ORDER BY attendees DESC
             LIMIT 10
-        """) if db_manager.db_type == 'sqlite' else db_manager.execute_query("""
-            SELECT e.Title, COUNT(ea.AttendeeID) as attendees
-            FROM events e
-            LEFT JOIN event_attendees ea ON e.EventID = ea.EventID
-            WHERE e.EventDate >= DATE_SUB(NOW(), INTERVAL 6 MONTH)
-            GROUP BY e.EventID, e.Title
-            ORDER BY attendees DESC
-            LIMIT 10
         """)
 
         data = {
@@ -165,6 +148,42 @@ def event_participation_api():
         logger.error(f"Event participation API error: {e}")
         return jsonify({'error': 'Failed to fetch event participation data'}), 500
 
+@system_analytics_bp.route('/api/analytics/db_pool')
+@require_admin
+def db_pool_api():
+    """API endpoint for database connection pool statistics"""
+    try:
+        return jsonify(db_manager.get_pool_stats())
+    except Exception as e:
+        logger.error(f"DB pool stats API error: {e}")
+        return jsonify({'error': 'Failed to fetch connection pool statistics'}), 500
+
+@system_analytics_bp.route('/system_analytics/queries')
+@require_admin
+def query_stats_view():
+    """Display the most expensive query shapes since the process started"""
+    order_by = request.args.get('order_by', 'total_ms')
+    if order_by not in ('total_ms', 'count', 'max_ms', 'avg_ms', 'rows'):
+        order_by = 'total_ms'
+    return render_template('query_stats.html',
+                         queries=query_stats.snapshot(order_by=order_by),
+                         order_by=order_by,
+                         slow_query_ms=SLOW_QUERY_MS)
+
+@system_analytics_bp.route('/api/analytics/queries')
+@require_admin
+def query_stats_api():
+    """API endpoint for per-query timing statistics"""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        return jsonify({
+            'slow_query_ms': SLOW_QUERY_MS,
+            'queries': query_stats.snapshot(limit=limit)
+        })
+    except Exception as e:
+        logger.error(f"Query stats API error: {e}")
+        return jsonify({'error': 'Failed to fetch query statistics'}), 500
+
 def init_app(app):
     """Initialize the system analytics blueprint"""
     app.register_blueprint(system_analytics_bp)
@@ -0,0 +1,38 @@
+"""
+Temporary databases for the test scripts
+
+Each test builds the full schema in a fresh SQLite file and swaps the
+resulting manager in as the db_manager of the modules it exercises, so tests
+never touch the development database or each other's rows.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from database_manager_hybrid import HybridDatabaseManager
+
+
+def temp_database_manager():
+    """Hybrid manager on a new SQLite file in a temporary directory"""
+    os.environ['SQLITE_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'test.db')
+    try:
+        return HybridDatabaseManager()
+    finally:
+        del os.environ['SQLITE_DB_PATH']
+
+
+@contextmanager
+def temp_database(*modules):
+    """Yield a temporary database manager used as db_manager by each module
+
+    The modules get their own managers back on exit.
+    """
+    manager = temp_database_manager()
+    original_managers = [module.db_manager for module in modules]
+    for module in modules:
+        module.db_manager = manager
+    try:
+        yield manager
+    finally:
+        for module, original in zip(modules, original_managers):
+            module.db_manager = original
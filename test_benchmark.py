@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the ticket system benchmark harness on a small run
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ticket_system
+from app import app
+from benchmark_ticket_system import seed_database, build_plan, summarize, run_benchmark, ENDPOINTS
+from test_ticket_scan import make_ticket_database
+
+def test_benchmark():
+    """Test percentiles, the precomputed plan and a test-client run"""
+    stats = summarize([n / 1000 for n in range(1, 101)], 0, 2.0)
+    assert (stats['p50_ms'], stats['p95_ms'], stats['p99_ms']) == (50.0, 95.0, 99.0)
+    assert stats['throughput_rps'] == 50.0
+
+    original_manager, original_cache = ticket_system.db_manager, ticket_system.qr_image_cache
+    ticket_system.db_manager = make_ticket_database()
+    try:
+        event_ids, ticket_ids = seed_database(ticket_system, 2, 15)
+        assert len(event_ids) == 2 and len(set(ticket_ids)) == 30
+
+        plan = build_plan(event_ids, ticket_ids, 10, repeat_ratio=0.5)
+        assert all(len(plan[name]) == 10 for name in ENDPOINTS)
+        assert plan == build_plan(event_ids, ticket_ids, 10, repeat_ratio=0.5)
+
+        results = run_benchmark(app, ticket_system, event_ids, ticket_ids, 10, 2, modes=['testclient'])
+        for name in ENDPOINTS:
+            print(f"⏱️  {name}: p95 {results['testclient'][name]['p95_ms']} ms")
+            assert results['testclient'][name]['requests'] == 10
+            assert results['testclient'][name]['errors'] == 0
+        print("✅ Benchmark run completed without errors")
+    finally:
+        ticket_system.db_manager, ticket_system.qr_image_cache = original_manager, original_cache
+        ticket_system.used_tickets.clear()
+
+if __name__ == '__main__':
+    test_benchmark()
+    print("\n🎉 Test passed!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script to verify bulk membership card selection, pooled rendering and streamed output
+"""
+
+import io
+import os
+import sys
+import json
+import zipfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import card_batch
+import card_renderer
+import image_pipeline
+import search_index
+from app import app
+from flask import session
+from temp_database import temp_database
+
+def test_card_batch():
+    """Test member selection, parallel rendering, streaming ZIP, PDF and job progress"""
+    with temp_database(card_batch, image_pipeline, search_index) as manager:
+        assert card_batch.install_card_jobs() and image_pipeline.install_image_variants()
+        for name in ['Aram', 'Bestun', 'Chnar']:
+            manager.execute_query(
+                "INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES (?, 'x', ?, ?, 'Rider')",
+                [name.lower(), f"{name.lower()}@example.com", name]
+            )
+        manager.execute_query("INSERT INTO vehicles (MemberID, Make, Model, Year, Color, LicensePlate) VALUES (1, 'Nissan', 'Skyline', 1999, 'Blue', '22 A 1')")
+        manager.execute_query("INSERT INTO vehicles (MemberID, Make, Model, Year, Color, LicensePlate) VALUES (1, 'Honda', 'S2000', 2004, 'Red', '22 A 2')")
+        manager.execute_query("INSERT INTO vehicles (MemberID, Make, Model, Year, Color, LicensePlate) VALUES (3, 'BMW', 'M3', 2008, 'White', '22 B 3')")
+
+        rows = card_batch.select_members('with_vehicle')
+        assert [(row[0], row[5]) for row in rows] == [(1, '22 A 1'), (3, '22 B 3')]
+        cards, skipped = card_batch.build_cards(card_batch.select_members(), 'DRIVER')
+        assert [card['member_id'] for card in cards] == ['SSM-0001', 'SSM-0003'] and skipped == [2]
+        assert cards[0]['model'] == 'Nissan Skyline' and cards[0]['member_name'] == 'Aram Rider'
+        owners, _ = card_batch.build_cards(card_batch.select_members(member_ids=[2]), 'OWNER')
+        assert [card['member_id'] for card in owners] == ['SSM-0002']
+
+        # Members can be picked by their platform role
+        manager.execute_query("INSERT INTO permissions (MemberID, CanEditMembers, CanPostEvents, CanManageVehicles) VALUES (1, 1, 1, 1)")
+        manager.execute_query("INSERT INTO permissions (MemberID, CanEditMembers, CanPostEvents, CanManageVehicles) VALUES (2, 0, 1, 0)")
+        manager.execute_query("INSERT INTO permissions (MemberID, CanEditMembers, CanPostEvents, CanManageVehicles) VALUES (3, 0, 0, 0)")
+        for member_role, expected in [('admin', [1]), ('moderator', [2]), ('member', [3])]:
+            assert [row[0] for row in card_batch.select_members(member_role=member_role)] == expected
+
+        # The pool renders the same cards as inline rendering, in order
+        many = [dict(cards[n % 2], member_id=f"SSM-{n:04d}") for n in range(card_batch.POOL_THRESHOLD + 5)]
+        pooled = list(card_batch.render_cards(many, workers=2))
+        assert [card[0] for card in pooled] == [card['member_id'] for card in many]
+        assert pooled[3] == card_renderer.render_member_card(many[3])
+
+        # The ZIP is produced card by card and is complete at the end
+        chunks = list(card_batch.stream_cards_zip(iter(pooled)))
+        assert len(chunks) == len(pooled) + 1
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            assert len(archive.namelist()) == 2 * len(pooled)
+            assert archive.read('SSM-0003_back.png') == pooled[3][2]
+        print(f"🪪 Streamed {len(pooled)} card pairs in {len(chunks)} chunks")
+
+        # 25 cards fill three sheets, each a page of fronts and a page of backs, sent as it fills
+        chunks = list(card_batch.stream_cards_pdf(iter(pooled[:25])))
+        assert len(chunks) == 3 + 2
+        pdf = b''.join(chunks)
+        assert pdf.startswith(b'%PDF') and b'/Count 6' in pdf and pdf.endswith(b'%%EOF\n')
+        xref = int(pdf[pdf.rindex(b'startxref'):].split()[1])
+        assert pdf[xref:].startswith(b'xref')
+
+        with app.test_request_context('/cards/bulk'):
+            assert 'Generate Cards' in card_batch.bulk_cards_page.__wrapped__()
+
+        with app.test_request_context('/api/cards/jobs', method='POST', json={'role': 'DRIVER', 'format': 'zip'}):
+            session['user_id'] = 1
+            data = card_batch.create_card_job.__wrapped__().get_json()
+            assert data['success'] and data['total'] == 2 and data['skipped'] == [2]
+            job_id = data['job_id']
+        with app.test_request_context('/api/cards/jobs', method='POST', json={'role': 'HONORARY_GUEST'}):
+            response, status = card_batch.create_card_job.__wrapped__()
+            assert status == 400
+
+        with app.test_request_context(f'/api/cards/jobs/{job_id}/download'):
+            response = card_batch.download_card_job.__wrapped__(job_id)
+            assert response.mimetype == 'application/zip' and response.is_streamed
+            assert card_batch.card_job_progress.__wrapped__(job_id).get_json()['status'] == 'pending'
+            body = b''.join(response.response)
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            assert sorted(archive.namelist()) == ['SSM-0001_back.png', 'SSM-0001_front.png', 'SSM-0003_back.png', 'SSM-0003_front.png']
+        with app.test_request_context(f'/api/cards/jobs/{job_id}'):
+            progress = card_batch.card_job_progress.__wrapped__(job_id).get_json()
+            assert (progress['done'], progress['total'], progress['status']) == (2, 2, 'done')
+        assert json.loads(manager.execute_query("SELECT Params FROM card_jobs")[0][0])['role'] == 'DRIVER'
+
+        # A download dropped part way leaves the job cancelled, not running
+        with app.test_request_context(f'/api/cards/jobs/{job_id}/download'):
+            response = card_batch.download_card_job.__wrapped__(job_id)
+            next(iter(response.response))
+            response.close()
+        with app.test_request_context(f'/api/cards/jobs/{job_id}'):
+            assert card_batch.card_job_progress.__wrapped__(job_id).get_json()['status'] == 'cancelled'
+        print("✅ Bulk cards render in parallel and stream with progress")
+
+if __name__ == '__main__':
+    test_card_batch()
+    print("\n🎉 Test passed!")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script to verify streaming, resumable chunked uploads and upload size limits
+"""
+
+import io
+import os
+import sys
+import hashlib
+import tempfile
+import threading
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+import chunked_upload
+import image_pipeline
+import upload_store
+from app import app
+from temp_database import temp_database
+
+def put_piece(client, upload_id, data, start, total):
+    return client.put(f'/api/uploads/{upload_id}', data=data,
+                      headers={'Content-Range': f'bytes {start}-{start + len(data) - 1}/{total}'})
+
+def test_chunked_upload():
+    """Test piecewise upload, resume, magic byte checks, claiming and limits"""
+    original_directory = upload_store.upload_store.directory
+    original_variant_dir = image_pipeline.VARIANT_DIR
+    upload_store.upload_store.directory = tempfile.mkdtemp()
+    image_pipeline.VARIANT_DIR = tempfile.mkdtemp()
+    try:
+        with temp_database(chunked_upload, image_pipeline, upload_store) as manager:
+            assert upload_store.install_upload_store() and image_pipeline.install_image_variants()
+            assert chunked_upload.install_upload_sessions()
+
+            buffer = io.BytesIO()
+            Image.effect_noise((900, 700), 60).convert('RGB').save(buffer, format='PNG')
+            photo = buffer.getvalue()
+            digest = hashlib.sha256(photo).hexdigest()
+            piece = len(photo) // 3 + 1
+
+            with app.test_client() as client:
+                assert client.post('/api/uploads', json={'kind': 'vehicle_photo', 'size': len(photo)}).status_code == 401
+                with client.session_transaction() as sess:
+                    sess['user_id'] = 7
+
+                too_big = upload_store.UPLOAD_LIMITS['vehicle_photo'] + 1
+                assert client.post('/api/uploads', json={'kind': 'vehicle_photo', 'size': too_big}).status_code == 413
+                assert client.post('/api/uploads', json={'kind': 'nope', 'size': 10}).status_code == 400
+
+                # Files that are not images are refused from the first piece
+                upload_id = client.post('/api/uploads', json={'kind': 'vehicle_photo', 'size': 100}).get_json()['upload_id']
+                assert put_piece(client, upload_id, b'MZ' + b'\0' * 98, 0, 100).status_code == 415
+                assert client.get(f'/api/uploads/{upload_id}').status_code == 404
+
+                upload_id = client.post('/api/uploads', json={'kind': 'vehicle_photo', 'size': len(photo)}).get_json()['upload_id']
+                data = put_piece(client, upload_id, photo[:piece], 0, len(photo)).get_json()
+                assert data == {'success': True, 'received': piece, 'complete': False}
+
+                # A retried or out-of-order piece is told where to resume
+                response = put_piece(client, upload_id, photo[piece * 2:], piece * 2, len(photo))
+                assert response.status_code == 409 and response.get_json()['received'] == piece
+                assert client.get(f'/api/uploads/{upload_id}').get_json()['received'] == piece
+
+                # Another worker process picks up the upload: the hash is rebuilt from disk
+                chunked_upload._hashers.clear()
+                put_piece(client, upload_id, photo[piece:piece * 2], piece, len(photo))
+                data = put_piece(client, upload_id, photo[piece * 2:], piece * 2, len(photo)).get_json()
+                assert data['complete'] and data['url'] == f"/media/{digest[:2]}/{digest[2:4]}/{digest}.png"
+                with open(upload_store.upload_store.local_path(data['url']), 'rb') as f:
+                    assert f.read() == photo
+                print(f"🧩 Uploaded {len(photo)} bytes in 3 pieces as {data['url']}")
+
+                # Two requests racing for the same offset: one piece lands whole, the other is refused
+                race_id = client.post('/api/uploads', json={'kind': 'vehicle_photo', 'size': len(photo)}).get_json()['upload_id']
+                rival = photo[:16] + bytes(reversed(photo[16:piece]))
+                results = {}
+
+                def race(data):
+                    with app.test_client() as racer:
+                        with racer.session_transaction() as sess:
+                            sess['user_id'] = 7
+                        results[data] = put_piece(racer, race_id, data, 0, len(photo)).status_code
+
+                racers = [threading.Thread(target=race, args=(data,)) for data in (photo[:piece], rival)]
+                for racer in racers:
+                    racer.start()
+                for racer in racers:
+                    racer.join()
+                assert sorted(results.values()) == [200, 409]
+                winner = next(data for data, status in results.items() if status == 200)
+                with open(chunked_upload._part_path(race_id), 'rb') as f:
+                    assert f.read() == winner
+                assert os.listdir(os.path.dirname(chunked_upload._part_path(race_id))) == [f"{race_id}.part"]
+
+                # The finished upload is claimed once, by its owner
+                assert chunked_upload.claim_upload(upload_id, 8, 'vehicle_photo') is None
+                assert chunked_upload.claim_upload(upload_id, 7, 'vehicle_photo') == data['url']
+                assert chunked_upload.claim_upload(upload_id, 7, 'vehicle_photo') is None
+
+                # Request bodies over MAX_CONTENT_LENGTH are refused before reading
+                response = client.post('/api/uploads', data=b'x',
+                                       environ_overrides={'CONTENT_LENGTH': str(chunked_upload.MAX_CONTENT_LENGTH + 1)})
+                assert response.status_code == 413
+
+            # Abandoned uploads expire and lose their files
+            stale_id = 'f' * 32
+            open(chunked_upload._part_path(stale_id), 'wb').close()
+            manager.execute_query(
+                "INSERT INTO upload_sessions (UploadID, UserID, Kind, Size, UpdatedAt) VALUES (?, 7, 'vehicle_photo', 10, 0)",
+                [stale_id]
+            )
+            assert chunked_upload.expire_uploads() == 1
+            assert not os.path.exists(chunked_upload._part_path(stale_id))
+            print("✅ Chunked uploads stream to disk, resume and enforce limits")
+    finally:
+        upload_store.upload_store.directory = original_directory
+        image_pipeline.VARIANT_DIR = original_variant_dir
+        chunked_upload._hashers.clear()
+
+if __name__ == '__main__':
+    test_chunked_upload()
+    print("\n🎉 Test passed!")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script to verify connection pooling in the SQLite database manager
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database_manager_sqlite import SQLiteDatabaseManager
+from database_pool import PoolTimeout
+
+POOL_SETTINGS = {'min_size': 1, 'max_size': 2, 'timeout': 0.2, 'validate_after': 30, 'max_lifetime': 3600}
+DEFAULT_PROFILE = {'profile': 'default', 'busy_timeout': 5000, 'cache_size': -2000, 'mmap_size': 0}
+WAL_PROFILE = {'profile': 'wal', 'busy_timeout': 200, 'cache_size': -2000, 'mmap_size': 0}
+
+def test_connection_pool():
+    """Test that queries reuse pooled connections and the pool stays bounded"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'pool_test.db')
+    manager = SQLiteDatabaseManager(db_path=db_path, pool_settings=POOL_SETTINGS, sqlite_settings=DEFAULT_PROFILE)
+
+    for _ in range(10):
+        manager.execute_query("SELECT COUNT(*) FROM members")
+
+    stats = manager.get_pool_stats()
+    print(f"📊 Pool stats after 10 queries: {stats}")
+    assert stats['connections_created'] == 1
+    assert stats['in_use'] == 0
+
+    # Nested checkouts in one thread share a connection
+    with manager.get_db_connection() as outer:
+        with manager.get_db_connection() as inner:
+            assert inner is outer
+
+    # A third concurrent checkout times out instead of opening a connection
+    held = manager.pool.checkout()
+    acquired = threading.Event()
+    release = threading.Event()
+
+    def hold_second_connection():
+        conn = manager.pool.checkout()
+        acquired.set()
+        release.wait()
+        manager.pool.checkin(conn)
+
+    holder = threading.Thread(target=hold_second_connection)
+    holder.start()
+    acquired.wait()
+
+    errors = []
+
+    def try_third_connection():
+        try:
+            manager.pool.checkout()
+        except PoolTimeout as e:
+            errors.append(e)
+
+    waiter = threading.Thread(target=try_third_connection)
+    waiter.start()
+    waiter.join()
+    release.set()
+    holder.join()
+    manager.pool.checkin(held)
+
+    assert len(errors) == 1
+    stats = manager.get_pool_stats()
+    assert stats['timeouts'] == 1
+    assert stats['size'] <= POOL_SETTINGS['max_size']
+    print("✅ Connection pool is bounded and reuses connections")
+
+def test_wal_profile():
+    """Test that readers keep reading while the single writer holds a transaction"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'wal_test.db')
+    manager = SQLiteDatabaseManager(db_path=db_path, pool_settings=POOL_SETTINGS, sqlite_settings=WAL_PROFILE)
+
+    with manager.get_db_connection(readonly=True) as reader:
+        assert reader.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        try:
+            reader.execute("DELETE FROM members")
+            assert False, "reader connection accepted a write"
+        except Exception as e:
+            print(f"Reader rejected write as expected: {e}")
+
+    results = []
+    with manager.get_db_connection() as writer:
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute(
+            "INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES ('w', 'x', 'w@example.com', 'W', 'X')"
+        )
+
+        # Another thread reads the last committed state without waiting
+        reader_thread = threading.Thread(
+            target=lambda: results.append(manager.execute_query("SELECT COUNT(*) FROM members")[0][0])
+        )
+        reader_thread.start()
+        reader_thread.join()
+        writer.commit()
+
+    assert results == [0]
+    assert manager.execute_query("SELECT COUNT(*) FROM members")[0][0] == 1
+    assert manager.get_pool_stats()['writer']['max_size'] == 1
+    print("✅ WAL readers are not blocked by the writer")
+
+if __name__ == '__main__':
+    test_connection_pool()
+    test_wal_profile()
+    print("\n🎉 Test passed!")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the dashboard stats service matches per-counter queries
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database_manager_hybrid import db_manager
+from dashboard_stats import DashboardStats
+
+def test_dashboard_stats():
+    """Test that aggregate counters agree with individual COUNT/SUM queries"""
+    service = DashboardStats(db_manager, ttl=60)
+    stats = service.get()
+    print(f"📊 Dashboard stats: {stats}")
+
+    assert stats['total_members'] == db_manager.execute_query("SELECT COUNT(*) FROM members")[0][0]
+    assert stats['total_vehicles'] == db_manager.execute_query("SELECT COUNT(*) FROM vehicles")[0][0]
+    assert stats['upcoming_events'] == db_manager.execute_query("SELECT COUNT(*) FROM events WHERE EventDate >= DATE()")[0][0]
+    if db_manager.table_exists('tickets'):
+        assert stats['used_tickets'] == db_manager.execute_query("SELECT COUNT(*) FROM tickets WHERE Status = 'used'")[0][0]
+        revenue = db_manager.execute_query("SELECT SUM(Price) FROM tickets WHERE Status IN ('valid', 'used')")[0][0]
+        assert stats['total_revenue'] == (revenue or 0)
+
+    # Served from the cache until invalidated
+    assert service.get() == stats
+    assert service._stats is not None
+    service.invalidate()
+    assert service._stats is None
+    print("✅ Dashboard stats correct and cached")
+
+if __name__ == '__main__':
+    test_dashboard_stats()
+    print("\n🎉 Test passed!")
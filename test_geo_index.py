@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the places geospatial index and nearby/viewport queries
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import geo_index
+from app import app
+from temp_database import temp_database
+
+PLACES = [
+    ('Azadi Park', 35.5611, 45.4375),
+    ('Goizha Lookout', 35.5920, 45.4680),
+    ('Dukan Lake', 35.9542, 44.9528),
+    ('Erbil Citadel', 36.1912, 44.0092),
+    ('No Coordinates', None, None),
+]
+
+def test_geo_index():
+    """Test R*-tree prefilter plus haversine refine, and index sync"""
+    assert round(geo_index.haversine_km(35.5611, 45.4375, 36.1912, 44.0092)) == 147
+    min_lat, max_lat, min_lon, max_lon = geo_index.bounding_box(35.56, 45.44, 10)
+    assert min_lat < 35.56 < max_lat and min_lon < 45.44 < max_lon
+    assert geo_index.bounding_box(89.99, 0, 50)[2:] == (-180.0, 180.0)
+
+    geo_index._rtree_ready = False
+    try:
+        with temp_database(geo_index) as manager:
+            manager.execute_query("INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES ('scout', 'x', 's@example.com', 'Scout', 'Rider')")
+            # Places written before the index exists are picked up by the initial build
+            manager.execute_query("INSERT INTO places (Name, Address, Type, Latitude, Longitude, AddedBy) VALUES (?, 'Kurdistan', 'Spot', ?, ?, 1)", PLACES[0])
+            assert geo_index.install_geo_index()
+            for place in PLACES[1:]:
+                manager.execute_query("INSERT INTO places (Name, Address, Type, Latitude, Longitude, AddedBy) VALUES (?, 'Kurdistan', 'Spot', ?, ?, 1)", place)
+            assert manager.execute_query("SELECT COUNT(*) FROM places_geo")[0][0] == 4
+
+            nearby = geo_index.nearby_places(35.5611, 45.4375, 10)
+            assert [place['name'] for place in nearby] == ['Azadi Park', 'Goizha Lookout']
+            assert nearby[0]['distance_km'] == 0
+            assert len(geo_index.nearby_places(35.5611, 45.4375, 200)) == 4
+            print(f"📍 Nearby: {[(p['name'], p['distance_km']) for p in nearby]}")
+
+            # Moving and deleting places keeps the R*-tree in sync
+            manager.execute_query("UPDATE places SET Latitude = 35.5615, Longitude = 45.4380 WHERE Name = 'Dukan Lake'")
+            manager.execute_query("DELETE FROM places WHERE Name = 'Goizha Lookout'")
+            assert [p['name'] for p in geo_index.nearby_places(35.5611, 45.4375, 10)] == ['Azadi Park', 'Dukan Lake']
+
+            with app.test_client() as client:
+                data = client.get('/api/places/bbox?min_lat=35&max_lat=37&min_lon=43.5&max_lon=44.5').get_json()
+                assert [place['name'] for place in data['places']] == ['Erbil Citadel']
+                data = client.get('/api/places/nearby?lat=35.5611&lon=45.4375&radius=5').get_json()
+                assert data['success'] and len(data['places']) == 2
+                assert client.get('/api/places/nearby?lat=95&lon=0').status_code == 400
+                assert client.get('/api/places/nearby?lon=0').status_code == 400
+            print("✅ Geospatial queries use the index and stay in sync")
+    finally:
+        geo_index._rtree_ready = False
+
+if __name__ == '__main__':
+    test_geo_index()
+    print("\n🎉 Test passed!")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test script to verify upload validation and responsive WebP image variants
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+import image_pipeline
+import upload_store
+import vehicle_gallery
+import permissions_manager
+import database_schema_updates
+from app import app
+from temp_database import temp_database
+
+def test_image_pipeline():
+    """Test variant generation, recording and the template helpers"""
+    original_variant_dir = image_pipeline.VARIANT_DIR
+    image_pipeline.VARIANT_DIR = tempfile.mkdtemp()
+    image_pipeline._variants.clear()
+    try:
+        with temp_database(image_pipeline) as manager:
+            assert image_pipeline.install_image_variants()
+
+            # Non-images are refused before anything is stored
+            try:
+                image_pipeline.open_image(io.BytesIO(b'not an image at all'))
+                assert False, "InvalidImage not raised"
+            except image_pipeline.InvalidImage:
+                pass
+
+            source_path = os.path.join(tempfile.mkdtemp(), 'car.png')
+            Image.new('RGB', (3000, 2000), (0, 200, 60)).save(source_path)
+            source_url = '/static/uploads/car.png'
+
+            # Until variants exist the original is served
+            assert image_pipeline.image_url(source_url, 'thumb') == source_url
+            assert image_pipeline.image_srcset(source_url) == ''
+
+            records = image_pipeline.generate_variants(source_path, source_url)
+            widths = {size: width for _, size, _, width, _ in records}
+            assert widths == {'large': 1600, 'medium': 800, 'small': 400, 'thumb': 160}
+            for _, size, url, width, height in records:
+                with Image.open(os.path.join(image_pipeline.VARIANT_DIR, os.path.basename(url))) as variant:
+                    assert variant.format == 'WEBP' and variant.size == (width, height)
+            print(f"🖼️ Variants: {widths}")
+
+            # A fresh worker process finds the recorded variants in the database
+            image_pipeline._variants.clear()
+            image_pipeline.preload_variants([source_url, '/static/uploads/missing.png'])
+            thumb = image_pipeline.image_url(source_url, 'thumb')
+            assert thumb.startswith(image_pipeline.VARIANT_URL) and thumb.endswith('_thumb.webp')
+            assert image_pipeline.image_url('/static/uploads/missing.png') == '/static/uploads/missing.png'
+            assert image_pipeline.image_srcset(source_url).endswith('1600w')
+            assert image_pipeline.image_url(None) is None
+
+            # Small originals are never upscaled
+            small_path = os.path.join(tempfile.mkdtemp(), 'small.gif')
+            Image.new('P', (300, 120)).save(small_path)
+            records = image_pipeline.generate_variants(small_path, '/static/uploads/small.gif')
+            assert {width for _, _, _, width, _ in records} == {300, 160}
+            assert image_pipeline.image_srcset('/static/uploads/small.gif').count('w,') == 1
+
+            # Regenerating replaces the recorded variants in place
+            records = image_pipeline.generate_variants(source_path, source_url)
+            assert manager.execute_query("SELECT COUNT(*) FROM image_variants WHERE SourceURL = ?", [source_url])[0][0] == 4
+
+            # The in-memory cache keeps only the most recently used images
+            original_size = image_pipeline.VARIANT_CACHE_SIZE
+            image_pipeline.VARIANT_CACHE_SIZE = 2
+            try:
+                image_pipeline.image_url(source_url)
+                image_pipeline.preload_variants(['/static/uploads/a.png', '/static/uploads/b.png'])
+                assert len(image_pipeline._variants) == 2 and source_url not in image_pipeline._variants
+            finally:
+                image_pipeline.VARIANT_CACHE_SIZE = original_size
+
+            with app.test_request_context():
+                html = app.jinja_env.from_string("{{ image_url(url, 'small') }}").render(url=source_url)
+                assert html.endswith('_small.webp')
+            print("✅ Uploads are validated and served as resized WebP variants")
+    finally:
+        image_pipeline.VARIANT_DIR = original_variant_dir
+        image_pipeline._variants.clear()
+
+def test_vehicle_photo_upload():
+    """Test that a vehicle's owner can upload a photo and others cannot"""
+    original_directory = upload_store.upload_store.directory
+    original_variant_dir = image_pipeline.VARIANT_DIR
+    original_schedule = image_pipeline.schedule_variants
+    upload_store.upload_store.directory = tempfile.mkdtemp()
+    image_pipeline.VARIANT_DIR = tempfile.mkdtemp()
+    scheduled = []
+    image_pipeline.schedule_variants = lambda *args: scheduled.append(original_schedule(*args))
+    try:
+        with temp_database(image_pipeline, upload_store, vehicle_gallery, permissions_manager,
+                           database_schema_updates) as manager:
+            assert upload_store.install_upload_store() and image_pipeline.install_image_variants()
+            database_schema_updates.add_new_tables()
+            for member_id, name in [(7, 'dana'), (8, 'shvan')]:
+                manager.execute_query(
+                    "INSERT INTO members (MemberID, Username, Password, Email, FirstName, LastName) VALUES (?, ?, 'x', ?, ?, 'Rider')",
+                    [member_id, name, f"{name}@example.com", name.title()]
+                )
+            manager.execute_query(
+                "INSERT INTO vehicles (MemberID, Make, Model, Year, Color, LicensePlate) VALUES (7, 'Toyota', 'Supra', 1998, 'Orange', '22 C 7')"
+            )
+
+            buffer = io.BytesIO()
+            Image.new('RGB', (640, 480), (0, 90, 200)).save(buffer, format='JPEG')
+            photo = buffer.getvalue()
+
+            with app.test_client() as client:
+                with client.session_transaction() as sess:
+                    sess['user_id'] = 7
+                response = client.post('/vehicle/1/photos', content_type='multipart/form-data',
+                                       data={'photo': (io.BytesIO(photo), 'car.jpg'), 'caption': 'Front'})
+                assert response.status_code == 302 and response.location.endswith('/vehicle/1')
+                rows = manager.execute_query("SELECT PhotoURL, Caption FROM vehicle_photos WHERE VehicleID = 1")
+                assert len(rows) == 1 and rows[0][1] == 'Front'
+                assert rows[0][0].startswith(upload_store.MEDIA_URL + '/') and rows[0][0].endswith('.jpg')
+
+                # Somebody else's vehicle is refused before anything is stored
+                with client.session_transaction() as sess:
+                    sess['user_id'] = 8
+                client.post('/vehicle/1/photos', content_type='multipart/form-data',
+                            data={'photo': (io.BytesIO(photo), 'car.jpg')})
+                assert len(manager.execute_query("SELECT PhotoID FROM vehicle_photos")) == 1
+
+            for future in scheduled:
+                future.result()
+            print(f"📸 Owner uploaded {rows[0][0]}")
+    finally:
+        upload_store.upload_store.directory = original_directory
+        image_pipeline.VARIANT_DIR = original_variant_dir
+        image_pipeline.schedule_variants = original_schedule
+        image_pipeline._variants.clear()
+
+if __name__ == '__main__':
+    test_image_pipeline()
+    test_vehicle_photo_upload()
+    print("\n🎉 Test passed!")
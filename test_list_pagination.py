@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script to verify keyset pagination of the list pages
+"""
+
+import os
+import sys
+import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pagination
+from temp_database import temp_database
+
+def walk(order, descending, conditions=(), params=(), per_page=3, columns='PlaceID, Name', table='places'):
+    """Every page forwards, then every page backwards from the last one"""
+    pages = []
+    rows, prev_cursor, next_cursor = pagination.keyset_page(columns, table, order, conditions, params,
+                                                            descending, per_page=per_page)
+    assert prev_cursor is None
+    pages.append(rows)
+    while next_cursor:
+        rows, prev_cursor, next_cursor = pagination.keyset_page(columns, table, order, conditions, params,
+                                                                descending, after=next_cursor, per_page=per_page)
+        assert prev_cursor
+        pages.append(rows)
+
+    back = [rows]
+    while prev_cursor:
+        rows, prev_cursor, _ = pagination.keyset_page(columns, table, order, conditions, params,
+                                                      descending, before=prev_cursor, per_page=per_page)
+        back.insert(0, rows)
+    assert back == pages
+    return [row for page in pages for row in page]
+
+def test_list_pagination():
+    """Test forward and backward walks over a list with duplicate sort values"""
+    with temp_database(pagination) as manager:
+        manager.execute_query("INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES ('scout', 'x', 's@example.com', 'Scout', 'Rider')")
+        names = ['Bazaar', 'Airport', 'Citadel', 'Bazaar', 'Dam', 'Airport', 'Park', 'Bazaar']
+        manager.execute_many(
+            "INSERT INTO places (Name, Address, Type, AddedBy) VALUES (?, 'Suli', 'Spot', 1)",
+            [(name,) for name in names]
+        )
+        rows = walk(['Name', 'PlaceID'], False)
+        assert [row[1] for row in rows] == sorted(names)
+        assert len({row[0] for row in rows}) == len(names)
+        print(f"📄 Ascending walk visited {len(rows)} places once each")
+
+        rows = walk(['Name', 'PlaceID'], True)
+        assert [(row[1], row[0]) for row in rows] == sorted(((row[1], row[0]) for row in rows), reverse=True)
+
+        rows = walk(['Name', 'PlaceID'], False, ["Name = ?"], ['Bazaar'], per_page=2)
+        assert [row[1] for row in rows] == ['Bazaar'] * 3
+        print("📄 Descending and filtered walks are stable")
+
+        # Members without a join date are still paged, after everyone who has one
+        manager.execute_many(
+            "INSERT INTO members (Username, Password, Email, FirstName, LastName, JoinDate) VALUES (?, 'x', ?, 'M', 'R', ?)",
+            [(f"m{n}", f"m{n}@example.com", join_date) for n, join_date in
+             enumerate(['2024-03-01', None, '2024-01-15', None, '2024-03-01', '2023-12-31'])]
+        )
+        rows = walk([pagination.date_key('JoinDate'), 'MemberID'], True, per_page=2, columns='MemberID, JoinDate', table='members')
+        assert len(rows) == 7 and len({row[0] for row in rows}) == 7
+        assert [row[1] for row in rows[-3:]] == ['2023-12-31', None, None]
+        print("📄 Rows with a NULL sort column are walked too")
+
+        assert pagination.decode_cursor('not-a-cursor', 2) is None
+        assert pagination.decode_cursor(pagination.encode_cursor(['a']), 2) is None
+
+        # PostgreSQL returns DATE keys as date objects; they travel as ISO strings
+        cursor = pagination.encode_cursor([datetime.date(2024, 5, 1), 7])
+        assert pagination.decode_cursor(cursor, 2) == ('2024-05-01', 7)
+        stamp = datetime.datetime(2024, 5, 1, 18, 30)
+        assert pagination.decode_cursor(pagination.encode_cursor([stamp]), 1) == ('2024-05-01T18:30:00',)
+        assert pagination.page_size('5000') == pagination.MAX_PAGE_SIZE
+        assert pagination.page_size('x') == pagination.PAGE_SIZE
+
+        # A malformed cursor falls back to the first page
+        rows, prev_cursor, _ = pagination.keyset_page('PlaceID', 'places', ['Name', 'PlaceID'], after='garbage')
+        assert prev_cursor is None and len(rows) == len(names)
+        print("✅ Keyset pagination walks every row once")
+
+if __name__ == '__main__':
+    test_list_pagination()
+    print("\n🎉 Test passed!")
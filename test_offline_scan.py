@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script to verify offline scanner manifests and batched scan sync
+"""
+
+import os
+import sys
+import base64
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ticket_system
+import ticket_manifest
+from app import app
+from test_ticket_scan import make_ticket_database
+
+def sync(payload):
+    """Call the sync view directly, past the login/permission decorator"""
+    with app.test_request_context('/ticket/api/scan_sync', method='POST', json=payload):
+        response = ticket_system.scan_sync.__wrapped__()
+    if isinstance(response, tuple):
+        return response[1], response[0].get_json()
+    return response.status_code, response.get_json()
+
+def test_offline_scan():
+    """Test manifest packing, signing and conflict reporting on sync"""
+    packed, width = ticket_manifest.pack_ticket_ids(['B2', 'A', 'C333'])
+    assert width == 4 and packed == b'A   B2  C333'
+
+    original_managers = ticket_system.db_manager, ticket_manifest.db_manager
+    manager = make_ticket_database()
+    ticket_system.db_manager = ticket_manifest.db_manager = manager
+    ticket_system.used_tickets.clear()
+    secret = app.config['SECRET_KEY']
+
+    try:
+        manager.execute_query("INSERT INTO tickets (TicketID, EventID, BuyerName, BuyerEmail, PurchaseDate) VALUES ('SCAN2', 1, 'Kai', 'kai@example.com', '2099-01-01')")
+        manifest = ticket_manifest.build_manifest(1, secret)
+        ids = base64.b64decode(manifest['ids']).decode()
+        assert manifest['count'] == 2 and ids == 'SCAN1SCAN2'
+        assert ticket_manifest.verify_manifest(secret, 1, manifest)[0]
+        assert not ticket_manifest.verify_manifest(secret, 2, manifest)[0]
+        print(f"📋 Manifest of {manifest['count']} tickets verified")
+
+        header = {key: manifest[key] for key in ('generated_at', 'digest', 'signature')}
+        status, forged = sync({'event_id': 1, 'manifest': dict(header, signature='0' * 64), 'scans': []})
+        assert status == 400 and not forged['success']
+
+        # SCAN1 is used online after the manifest was downloaded
+        manager.execute_query("UPDATE tickets SET Status = 'used', ScannedAt = '2099-01-01 18:00:00', ScannedBy = 'gate1' WHERE TicketID = 'SCAN1'")
+        status, result = sync({'event_id': 1, 'manifest': header, 'scans': [
+            {'ticket_id': 'SCAN2', 'scanned_at': '2099-01-01T18:05:00'},
+            {'ticket_id': 'SCAN1', 'scanned_at': '2099-01-01T18:01:00'},
+            {'ticket_id': 'SCAN2', 'scanned_at': '2099-01-01T18:06:00'},
+            {'ticket_id': 'NOPE', 'scanned_at': '2099-01-01T18:07:00'},
+        ]})
+        assert status == 200 and result['success']
+        assert result['accepted'] == ['SCAN2']
+        reasons = {(c['ticket_id'], c['reason']) for c in result['conflicts']}
+        assert reasons == {('SCAN1', 'already_used'), ('SCAN2', 'duplicate_in_batch'), ('NOPE', 'not_found')}
+        assert not result['manifest_stale']
+
+        row = manager.execute_query("SELECT Status, ScannedAt FROM tickets WHERE TicketID = 'SCAN2'")[0]
+        assert row == ('used', '2099-01-01 18:05:00')
+        print(f"✅ Synced {len(result['accepted'])} scan, reported {len(result['conflicts'])} conflicts")
+    finally:
+        ticket_system.db_manager, ticket_manifest.db_manager = original_managers
+        ticket_system.used_tickets.clear()
+
+if __name__ == '__main__':
+    test_offline_scan()
+    print("\n🎉 Test passed!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script to verify permissions are cached and invalidated on update
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import g
+from app import app
+from database_manager_hybrid import db_manager
+import permissions_manager
+from permissions_manager import PermissionManager, get_user_role, invalidate_permissions
+
+def test_permissions_cache():
+    """Test that repeated lookups hit the cache and updates are seen at once"""
+    username = 'permissions_cache_user'
+    db_manager.execute_query("DELETE FROM members WHERE Username = ?", [username])
+    db_manager.execute_query(
+        "INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES (?, ?, ?, ?, ?)",
+        [username, 'x', 'permissions_cache@example.com', 'Cache', 'Test']
+    )
+    user_id = db_manager.execute_query("SELECT MemberID FROM members WHERE Username = ?", [username])[0][0]
+    db_manager.execute_query("DELETE FROM permissions WHERE MemberID = ?", [user_id])
+    invalidate_permissions()
+    PermissionManager.create_default_permissions(user_id)
+
+    with app.test_request_context('/dashboard'):
+        app.preprocess_request()
+        assert get_user_role(user_id) == 'member'
+        count_after_first = g.db_query_count
+        for _ in range(5):
+            PermissionManager.has_permission(user_id, 'edit_members')
+            get_user_role(user_id)
+        count_after_repeats = g.db_query_count
+        print(f"📊 Queries for 10 more permission lookups: {count_after_repeats - count_after_first}")
+        assert count_after_repeats == count_after_first
+        app.process_response(app.response_class('ok'))
+
+    PermissionManager.update_permissions(user_id, {'can_edit_members': True})
+    assert get_user_role(user_id) == 'admin'
+
+    # Inside a request the entry is dropped only once the change is committed,
+    # so a concurrent read of the old row cannot outlive the update
+    with app.test_request_context('/update_permissions', method='POST'):
+        app.preprocess_request()
+        PermissionManager.update_permissions(user_id, {'can_post_events': True})
+        assert str(user_id) in permissions_manager._permissions_cache
+        app.process_response(app.response_class('ok'))
+    assert str(user_id) not in permissions_manager._permissions_cache
+    assert get_user_role(user_id) == 'moderator'
+    print("✅ Permissions cached and invalidated on update")
+
+    db_manager.execute_query("DELETE FROM permissions WHERE MemberID = ?", [user_id])
+    db_manager.execute_query("DELETE FROM members WHERE MemberID = ?", [user_id])
+    invalidate_permissions(user_id)
+
+if __name__ == '__main__':
+    test_permissions_cache()
+    print("\n🎉 Test passed!")
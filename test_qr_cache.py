@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script to verify ticket QR images are cached and served with ETags
+"""
+
+import os
+import sys
+import tempfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ticket_system
+from app import app
+from database_manager_hybrid import db_manager
+from qr_cache import QRImageCache, qr_cache_key
+
+def test_qr_cache():
+    """Test render-once, 304 revalidation of existing tickets and the LRU byte budget"""
+    member_id = db_manager.execute_query("SELECT MemberID FROM members LIMIT 1")[0][0]
+    event_id = db_manager.execute_query("SELECT EventID FROM events LIMIT 1")[0][0]
+    db_manager.execute_query("INSERT INTO tickets (EventID, MemberID, Price) VALUES (?, ?, ?)", [event_id, member_id, 0])
+    ticket_id = db_manager.execute_query("SELECT MAX(TicketID) FROM tickets")[0][0]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        ticket_system.qr_image_cache = QRImageCache(directory=cache_dir)
+        try:
+            with app.test_client() as client:
+                first = client.get(f'/ticket/ticket/qr/{ticket_id}')
+                assert first.status_code == 200
+                assert first.headers['Content-Type'] == 'image/png'
+                assert first.headers['Cache-Control'] == 'private, max-age=31536000, immutable'
+                etag = first.headers['ETag']
+
+                second = client.get(f'/ticket/ticket/qr/{ticket_id}')
+                assert second.data == first.data
+                # Only the ticket lookup; the image comes from the cache
+                assert second.headers['X-DB-Query-Count'] == '1'
+
+                revalidated = client.get(f'/ticket/ticket/qr/{ticket_id}', headers={'If-None-Match': etag})
+                assert revalidated.status_code == 304
+
+                assert client.get('/ticket/ticket/qr/NOPE').status_code == 404
+                # A matching ETag is no way around the ticket check
+                stale = client.get('/ticket/ticket/qr/NOPE', headers={'If-None-Match': f'"{qr_cache_key("NOPE")}"'})
+                assert stale.status_code == 404
+            print(f"📊 QR cache stats: {ticket_system.qr_image_cache.stats()}")
+
+            # A fresh process finds the image on disk
+            assert QRImageCache(directory=cache_dir).get(etag.strip('"')) == first.data
+
+            small = QRImageCache(max_bytes=len(first.data) * 2, directory=cache_dir)
+            for key in ('a1', 'b2', 'c3'):
+                small.put(key, first.data)
+            assert small.stats()['entries'] == 2
+            print("✅ QR images cached in memory and on disk")
+        finally:
+            ticket_system.qr_image_cache = QRImageCache()
+            db_manager.execute_query("DELETE FROM tickets WHERE TicketID = ?", [ticket_id])
+
+if __name__ == '__main__':
+    test_qr_cache()
+    print("\n🎉 Test passed!")
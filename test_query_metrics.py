@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test script to verify query timing, normalization and per-request summaries
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from database_manager_hybrid import db_manager
+from query_metrics import normalize_sql, query_stats
+
+def test_normalize_sql():
+    """Test that literals and whitespace do not create separate query shapes"""
+    assert normalize_sql("SELECT * FROM members WHERE MemberID = 5") == "SELECT * FROM members WHERE MemberID = ?"
+    assert normalize_sql("SELECT *\n  FROM tickets WHERE Status = 'valid'") == "SELECT * FROM tickets WHERE Status = ?"
+    assert normalize_sql("SELECT * FROM events WHERE EventID IN (?, ?, ?)") == "SELECT * FROM events WHERE EventID IN (...)"
+    print("✅ Queries normalized correctly")
+
+def test_request_summary():
+    """Test that a request reports its query count and records each shape"""
+    query_stats.reset()
+
+    with app.test_request_context('/dashboard'):
+        app.preprocess_request()
+        for _ in range(3):
+            db_manager.execute_query("SELECT COUNT(*) FROM members")
+        response = app.process_response(app.response_class('ok'))
+
+    print(f"📊 X-DB-Query-Count: {response.headers['X-DB-Query-Count']}, X-DB-Time-Ms: {response.headers['X-DB-Time-Ms']}")
+    assert int(response.headers['X-DB-Query-Count']) >= 3
+    assert float(response.headers['X-DB-Time-Ms']) >= 0
+
+    entry = next(q for q in query_stats.snapshot() if q['sql'] == "SELECT COUNT(*) FROM members")
+    assert entry['count'] == 3
+    assert entry['rows'] == 3
+    print("✅ Request summary recorded")
+
+if __name__ == '__main__':
+    test_normalize_sql()
+    test_request_summary()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that one request shares a single database connection and transaction
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from database_manager_hybrid import db_manager
+
+def total_checkouts():
+    """Checkouts across the reader pool and, in the WAL profile, the writer"""
+    stats = db_manager.get_pool_stats()
+    return stats['checkouts'] + stats.get('writer', {}).get('checkouts', 0)
+
+def test_request_session():
+    """Test that queries in one request reuse one connection and commit once"""
+    username = 'session_test_user'
+
+    with app.test_request_context('/dashboard'):
+        app.preprocess_request()
+        checkouts_before = total_checkouts()
+
+        db_manager.execute_query("DELETE FROM members WHERE Username = ?", [username])
+        db_manager.execute_query(
+            "INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES (?, ?, ?, ?, ?)",
+            [username, 'x', 'session_test@example.com', 'Session', 'Test']
+        )
+
+        # A failing statement handled by the route must not undo earlier work
+        try:
+            db_manager.execute_query(
+                "INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES (?, ?, ?, ?, ?)",
+                [username, 'x', 'session_test@example.com', 'Session', 'Test']
+            )
+        except Exception as e:
+            print(f"Expected duplicate insert error: {e}")
+
+        for _ in range(5):
+            db_manager.execute_query("SELECT COUNT(*) FROM members")
+
+        checkouts = total_checkouts() - checkouts_before
+        print(f"📊 Pool checkouts during request: {checkouts}")
+        assert checkouts == 1
+
+        app.process_response(app.response_class('ok'))
+
+    # Committed once the request finished
+    members = db_manager.execute_query("SELECT MemberID FROM members WHERE Username = ?", [username])
+    assert len(members) == 1
+    db_manager.execute_query("DELETE FROM members WHERE Username = ?", [username])
+    print("✅ Request shared one connection and committed its writes")
+
+if __name__ == '__main__':
+    test_request_session()
+    print("\n🎉 Test passed!")
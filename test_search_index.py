@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script to verify full-text search ranking, prefix matching and index sync
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import search_index
+import pagination
+from app import app
+from temp_database import temp_database
+
+def test_search_index():
+    """Test the FTS index on a temporary SQLite database"""
+    app_module = sys.modules['app']
+    search_index._installed.clear()
+    try:
+        with temp_database(search_index, pagination, app_module) as manager:
+            # Rows written before the index exists are picked up by the initial build
+            manager.execute_query("INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES ('karwan', 'x', 'k@example.com', 'Karwan', 'Aziz')")
+            assert search_index.install_search_index()
+
+            manager.execute_query("INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES ('drifter', 'x', 'd@example.com', 'Karim', 'Karwani')")
+            manager.execute_query("INSERT INTO events (Title, Description, Location, EventDate, CreatedBy) VALUES ('Night Drift', 'Karwan hosts', 'Sulaymaniyah', '2099-01-01', 1)")
+            manager.execute_query("INSERT INTO events (Title, Description, Location, EventDate, CreatedBy) VALUES ('Karwan Cup', 'Time attack', 'Erbil', '2099-02-01', 1)")
+
+            # Prefix matching, every word required
+            assert sorted(search_index.search('members', 'kar')) == [1, 2]
+            assert search_index.search('members', 'karim kar') == [2]
+            assert search_index.search('members', 'zzz') == []
+            assert search_index.search('members', '"*') == []
+            print("🔎 Prefix and multi-word matching works")
+
+            # A title match outranks a description match
+            assert search_index.search('events', 'karwan') == [2, 1]
+            print("🏆 Results are ranked by column weight")
+
+            # Updates and deletes keep the index in sync
+            manager.execute_query("UPDATE events SET Title = 'Spring Cup' WHERE EventID = 2")
+            assert search_index.search('events', 'karwan') == [1]
+            manager.execute_query("DELETE FROM events WHERE EventID = 1")
+            assert search_index.search('events', 'karwan') == []
+            assert search_index.search('events', 'spring') == [2]
+            print("🔄 Index follows updates and deletes")
+
+            rows = [(1, 'a'), (2, 'b'), (3, 'c')]
+            assert search_index.order_by_rank(rows, [3, 1]) == [(3, 'c'), (1, 'a'), (2, 'b')]
+            assert search_index.key_filter('id', []) == ("1 = 0", [])
+
+            # Sorting by relevance without a search falls back to the name order
+            with app.test_request_context('/members?sort_by=relevance'):
+                html = app_module.members.__wrapped__()
+                assert html.index('drifter') < html.index('karwan')
+            with app.test_request_context('/members?search=karw&sort_by=relevance'):
+                assert 'drifter' in app_module.members.__wrapped__()
+            print("✅ Full-text search behaves as expected")
+    finally:
+        search_index._installed.clear()
+
+if __name__ == '__main__':
+    test_search_index()
+    print("\n🎉 Test passed!")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script to verify SQLite-style queries are translated for PostgreSQL
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sql_dialect import translate_query
+
+def test_postgres_translation():
+    """Test placeholders, identifiers, booleans and date functions"""
+    cases = [
+        (
+            "SELECT v.*, m.FirstName FROM vehicles v JOIN members m ON v.MemberID = m.MemberID WHERE v.Make = ?",
+            'SELECT v.*, m."FirstName" FROM vehicles v JOIN members m ON v."MemberID" = m."MemberID" WHERE v."Make" = %s',
+        ),
+        (
+            "SELECT COUNT(*) FROM events WHERE EventDate >= DATE()",
+            'SELECT COUNT(*) FROM events WHERE "EventDate" >= CURRENT_DATE',
+        ),
+        (
+            "SELECT COUNT(*) FROM members WHERE JoinDate >= date('now', '-30 days')",
+            "SELECT COUNT(*) FROM members WHERE \"JoinDate\" >= CAST((CURRENT_DATE - INTERVAL '30 days') AS DATE)",
+        ),
+        (
+            "SELECT strftime('%Y-%m', JoinDate) as month FROM members",
+            "SELECT to_char(\"JoinDate\", 'YYYY-MM') as month FROM members",
+        ),
+        (
+            "SELECT * FROM notifications WHERE UserID = ? AND IsRead = 0",
+            'SELECT * FROM notifications WHERE "UserID" = %s AND "IsRead" = FALSE',
+        ),
+        (
+            "SELECT * FROM members WHERE Username LIKE ? AND Bio LIKE '%cars%'",
+            "SELECT * FROM members WHERE \"Username\" ILIKE %s AND \"Bio\" ILIKE '%%cars%%'",
+        ),
+        (
+            'SELECT "MemberID" FROM members WHERE "Username" = %s',
+            'SELECT "MemberID" FROM members WHERE "Username" = %s',
+        ),
+    ]
+
+    for sqlite_sql, expected in cases:
+        translated = translate_query(sqlite_sql, 'postgres')
+        print(f"{sqlite_sql}\n  -> {translated}")
+        assert translated == expected
+
+    # No parameters means psycopg2 does no interpolation, so '%' stays as is
+    assert translate_query("SELECT 'a%b'", 'postgres', escape_percent=False) == "SELECT 'a%b'"
+    # SQLite statements pass through untouched
+    assert translate_query("SELECT * FROM members WHERE MemberID = ?", 'sqlite') == "SELECT * FROM members WHERE MemberID = ?"
+    print("✅ Queries translated correctly")
+
+if __name__ == '__main__':
+    test_postgres_translation()
+    print("\n🎉 Test passed!")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test script to verify trigger-maintained stats counters stay in sync
+"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database_manager_hybrid import db_manager
+from stats_counters import install_counters, rebuild_counters, read_counters
+
+def test_stats_counters():
+    """Test that inserts, status changes and deletes update the counters"""
+    assert install_counters()
+    before = rebuild_counters()
+    print(f"📊 Counters after rebuild: {before}")
+
+    username = 'stats_counter_user'
+    db_manager.execute_query("DELETE FROM members WHERE Username = ?", [username])
+    before = rebuild_counters()
+    db_manager.execute_query(
+        "INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES (?, ?, ?, ?, ?)",
+        [username, 'x', 'stats_counter@example.com', 'Stats', 'Counter']
+    )
+    member_id = db_manager.execute_query("SELECT MemberID FROM members WHERE Username = ?", [username])[0][0]
+    event_id = db_manager.execute_query("SELECT EventID FROM events LIMIT 1")[0][0]
+
+    db_manager.execute_query(
+        "INSERT INTO tickets (EventID, MemberID, Price, Status) VALUES (?, ?, ?, 'valid')",
+        [event_id, member_id, 25.0]
+    )
+    ticket_id = db_manager.execute_query("SELECT MAX(TicketID) FROM tickets WHERE MemberID = ?", [member_id])[0][0]
+    db_manager.execute_query("UPDATE tickets SET Status = 'used' WHERE TicketID = ?", [ticket_id])
+
+    counters = read_counters()
+    print(f"📊 Counters after insert and scan: {counters}")
+    assert counters['members'] == before['members'] + 1
+    assert counters['tickets_total'] == before['tickets_total'] + 1
+    assert counters['tickets_valid'] == before['tickets_valid']
+    assert counters['tickets_used'] == before['tickets_used'] + 1
+    assert counters['revenue'] == round(before['revenue'] + 25.0, 2)
+
+    db_manager.execute_query("DELETE FROM tickets WHERE TicketID = ?", [ticket_id])
+    db_manager.execute_query("DELETE FROM members WHERE MemberID = ?", [member_id])
+
+    counters = read_counters()
+    assert counters['members'] == before['members']
+    assert counters['tickets_total'] == before['tickets_total']
+    assert counters['revenue'] == round(before['revenue'], 2)
+    print("✅ Counters kept in sync by triggers")
+
+if __name__ == '__main__':
+    test_stats_counters()
+    print("\n🎉 Test passed!")
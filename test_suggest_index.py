@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the in-memory typeahead index and the suggest API
+"""
+
+import os
+import sys
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import suggest_index as suggest_module
+from app import app
+from suggest_index import PrefixIndex, SuggestIndex
+
+class RowsDatabase:
+    """Stands in for the database manager with fixed rows per query"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def execute_query(self, query, params=None):
+        self.queries += 1
+        return self.rows.get(query, [])
+
+def test_suggest_index():
+    """Test prefix lookups, incremental adds, invalidation and the API"""
+    index = PrefixIndex([('BMW', 'BMW'), ('bmw', 'bmw'), ('Bentley', 'Bentley'), ('Audi', 'Audi')])
+    assert len(index) == 3
+    assert index.lookup('b') == ['Bentley', 'BMW']
+    index.add(['Buick'], 'Buick')
+    assert index.lookup('bu') == ['Buick']
+    assert index.lookup('c') == []
+
+    large = PrefixIndex((f"user{n:06d}", f"user{n:06d}") for n in range(100000))
+    lookups = 1000
+    started = time.perf_counter()
+    for _ in range(lookups):
+        large.lookup('user0999', 10)
+    per_lookup_ms = (time.perf_counter() - started) * 1000 / lookups
+    print(f"⚡ Lookup over 100k keys: {per_lookup_ms:.4f} ms")
+    assert per_lookup_ms < 1
+
+    queries = suggest_module.SUGGEST_QUERIES
+    db = RowsDatabase({
+        queries['make']: [('BMW', 'BMW'), ('Mazda', 'Mazda')],
+        queries['model']: [('M3', 'M3'), ('MX-5', 'MX-5')],
+        queries['make_model']: [('BMW', 'M3', 'M3'), ('Mazda', 'MX-5', 'MX-5')],
+        queries['username']: [('karwan', 'karwan')],
+    })
+    suggestions = SuggestIndex(db)
+    assert suggestions.suggest('model', 'm') == ['M3', 'MX-5']
+    assert suggestions.suggest('model', 'm', make='bmw') == ['M3']
+
+    # Inserts land in the loaded index without another query
+    loaded_queries = db.queries
+    suggestions.add_vehicle('BMW', 'M5')
+    assert suggestions.suggest('model', 'm', make='BMW') == ['M3', 'M5']
+    assert db.queries == loaded_queries
+    suggestions.invalidate('model')
+    assert suggestions.suggest('model', 'm5') == []
+    assert db.queries == loaded_queries + 1
+    print("🧩 Incremental adds and invalidation work")
+
+    original = suggest_module.suggest_index
+    suggest_module.suggest_index = suggestions
+    try:
+        with app.test_client() as client:
+            data = client.get('/api/suggest?kind=vehicle&q=m').get_json()
+            assert data['suggestions'] == ['Mazda', 'M3', 'MX-5']
+            assert client.get('/api/suggest?kind=username&q=k').status_code == 401
+            assert client.get('/api/suggest?kind=bogus&q=k').status_code == 400
+            with client.session_transaction() as sess:
+                sess['user_id'] = 1
+            assert client.get('/api/suggest?kind=username&q=K').get_json()['suggestions'] == ['karwan']
+        print("✅ Suggest API answers from memory")
+    finally:
+        suggest_module.suggest_index = original
+
+if __name__ == '__main__':
+    test_suggest_index()
+    print("\n🎉 Test passed!")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Test script to verify batch ticket QR rendering and ZIP packaging
+"""
+
+import io
+import os
+import sys
+import zipfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ticket_batch import generate_ticket_ids, render_ticket_qrs, build_ticket_zip
+from qr_cache import render_qr_png
+
+def test_ticket_batch():
+    """Test that batch rendering matches single rendering and the ZIP holds every ticket"""
+    ticket_ids = generate_ticket_ids(60)
+    assert len(set(ticket_ids)) == len(ticket_ids)
+
+    images = render_ticket_qrs(ticket_ids)
+    assert set(images) == set(ticket_ids)
+    assert images[ticket_ids[0]] == render_qr_png(f"TICKET:{ticket_ids[0]}")
+
+    archive = zipfile.ZipFile(io.BytesIO(build_ticket_zip(7, images)))
+    names = archive.namelist()
+    print(f"📦 ZIP entries: {len(names)}")
+    assert len(names) == len(ticket_ids) + 1
+    manifest = archive.read('tickets.csv').decode().splitlines()
+    assert manifest[0] == 'TicketID,EventID,File'
+    assert len(manifest) == len(ticket_ids) + 1
+    print("✅ Batch rendered and packaged")
+
+if __name__ == '__main__':
+    test_ticket_batch()
+    print("\n🎉 Test passed!")
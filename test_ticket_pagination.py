@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script to verify keyset pagination of the ticket dashboard
+"""
+
+import os
+import sys
+import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database_manager_hybrid import db_manager
+from ticket_system import get_ticket_page, get_ticket_stats, encode_ticket_cursor, decode_ticket_cursor
+
+def test_ticket_pagination():
+    """Test that walking pages forwards and back visits every ticket once"""
+    member_id = db_manager.execute_query("SELECT MemberID FROM members LIMIT 1")[0][0]
+    db_manager.execute_query(
+        "INSERT INTO events (Title, Description, Location, EventDate, CreatedBy) VALUES (?, ?, ?, ?, ?)",
+        ['Pagination Test Meet', 'Test', 'Test', '2099-01-01', member_id]
+    )
+    event_id = db_manager.execute_query("SELECT MAX(EventID) FROM events WHERE Title = ?", ['Pagination Test Meet'])[0][0]
+
+    try:
+        for day in range(1, 8):
+            db_manager.execute_query(
+                "INSERT INTO tickets (EventID, MemberID, Price, PurchaseDate, Status) VALUES (?, ?, ?, ?, ?)",
+                [event_id, member_id, 10.0, f'2099-01-0{day}', 'used' if day % 3 == 0 else 'valid']
+            )
+
+        stats = get_ticket_stats(event_id)
+        print(f"📊 Event ticket stats: {stats}")
+        assert stats['total_tickets'] == 7
+        assert stats['used_tickets'] == 2
+        assert stats['total_revenue'] == 70.0
+
+        seen = []
+        tickets, has_newer, has_older = get_ticket_page(event_id, per_page=3)
+        assert not has_newer
+        pages = [tickets]
+        while has_older:
+            tickets, has_newer, has_older = get_ticket_page(event_id, before=decode_ticket_cursor(encode_ticket_cursor(tickets[-1])), per_page=3)
+            assert has_newer
+            pages.append(tickets)
+        for page in pages:
+            seen.extend(ticket[-1] for ticket in page)
+        print(f"📄 Page sizes: {[len(page) for page in pages]}")
+        assert seen == sorted(seen, reverse=True)
+        assert len(seen) == 7
+
+        # Paging back from the last page returns the page before it
+        tickets, has_newer, has_older = get_ticket_page(event_id, after=decode_ticket_cursor(encode_ticket_cursor(pages[-1][0])), per_page=3)
+        assert [t[0] for t in tickets] == [t[0] for t in pages[-2]]
+        assert has_older
+
+        # PostgreSQL returns PurchaseDate as a date; its cursor pages the same way
+        edge = pages[0][-1]
+        as_date = edge[:-1] + (datetime.date.fromisoformat(edge[-1]),)
+        tickets, _, _ = get_ticket_page(event_id, before=decode_ticket_cursor(encode_ticket_cursor(as_date)), per_page=3)
+        assert [t[0] for t in tickets] == [t[0] for t in pages[1]]
+
+        used, _, _ = get_ticket_page(event_id, status='used', per_page=10)
+        assert len(used) == 2
+        print("✅ Keyset pagination walks every ticket once")
+    finally:
+        db_manager.execute_query("DELETE FROM tickets WHERE EventID = ?", [event_id])
+        db_manager.execute_query("DELETE FROM events WHERE EventID = ?", [event_id])
+
+if __name__ == '__main__':
+    test_ticket_pagination()
+    print("\n🎉 Test passed!")
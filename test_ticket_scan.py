@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that concurrent scans of one ticket accept it exactly once
+"""
+
+import os
+import sys
+import threading
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ticket_system
+from app import app
+from temp_database import temp_database_manager
+
+def make_ticket_database():
+    """Hybrid manager on a temporary SQLite file with the ticket system schema"""
+    manager = temp_database_manager()
+    manager.execute_query("DROP TABLE tickets")
+    manager.execute_query("""
+        CREATE TABLE tickets (
+            TicketID TEXT PRIMARY KEY, EventID INTEGER, BuyerName TEXT NOT NULL, BuyerEmail TEXT NOT NULL,
+            BuyerPhone TEXT, Price DOUBLE, PurchaseDate TEXT NOT NULL, QRCode MEMO,
+            Status TEXT DEFAULT 'valid', ScannedAt TEXT, ScannedBy TEXT
+        )
+    """)
+    manager.execute_query("INSERT INTO members (Username, Password, Email, FirstName, LastName) VALUES ('gate', 'x', 'gate@example.com', 'Gate', 'Keeper')")
+    manager.execute_query("INSERT INTO events (Title, Description, Location, EventDate, CreatedBy) VALUES ('Scan Meet', 'Test', 'Test', '2099-01-01', 1)")
+    manager.execute_query("INSERT INTO tickets (TicketID, EventID, BuyerName, BuyerEmail, PurchaseDate) VALUES ('SCAN1', 1, 'Alex', 'alex@example.com', '2099-01-01')")
+    manager.execute_query("INSERT INTO tickets (TicketID, EventID, BuyerName, BuyerEmail, PurchaseDate, Status) VALUES ('OLD1', 1, 'Sam', 'sam@example.com', '2099-01-01', 'expired')")
+    return manager
+
+def test_ticket_scan():
+    """Test atomic check-and-mark under concurrent scans and the used-ticket cache"""
+    original_manager = ticket_system.db_manager
+    ticket_system.db_manager = make_ticket_database()
+    ticket_system.used_tickets.clear()
+    results = []
+
+    def scan():
+        with app.test_client() as client:
+            results.append(client.post('/ticket/api/scan_ticket', json={'ticket_id': 'TICKET:SCAN1'}).get_json())
+
+    try:
+        threads = [threading.Thread(target=scan) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        accepted = [r for r in results if r['success']]
+        print(f"🎫 Accepted {len(accepted)} of {len(results)} concurrent scans")
+        assert len(accepted) == 1
+        assert accepted[0]['ticket']['event_name'] == 'Scan Meet'
+        assert all(r['error'] == 'Ticket has already been used' for r in results if not r['success'])
+
+        # Repeat scans are answered from the used-ticket cache
+        with app.test_client() as client:
+            repeat = client.post('/ticket/api/scan_ticket', json={'ticket_id': 'SCAN1'})
+            assert repeat.headers['X-DB-Query-Count'] == '0'
+            assert repeat.get_json()['error'] == 'Ticket has already been used'
+
+            assert client.post('/ticket/api/scan_ticket', json={'ticket_id': 'OLD1'}).get_json()['error'] == 'Ticket has expired'
+            assert client.post('/ticket/api/scan_ticket', json={'ticket_id': 'NOPE'}).get_json()['error'] == 'Ticket not found'
+
+        # A scan whose transaction is rolled back leaves no trace in the cache
+        ticket_system.db_manager.execute_query("INSERT INTO tickets (TicketID, EventID, BuyerName, BuyerEmail, PurchaseDate) VALUES ('SCAN2', 1, 'Kawa', 'kawa@example.com', '2099-01-01')")
+        for status, expected in ((500, 'valid'), (200, 'used')):
+            with app.test_request_context('/ticket/api/scan_ticket', method='POST', json={'ticket_id': 'SCAN2'}):
+                app.preprocess_request()
+                assert ticket_system.scan_ticket().get_json()['success']
+                assert ticket_system.used_tickets.get('SCAN2') is None
+                app.process_response(app.response_class('done', status=status))
+            stored = ticket_system.db_manager.execute_query("SELECT Status FROM tickets WHERE TicketID = 'SCAN2'")
+            assert stored[0][0] == expected
+            assert (ticket_system.used_tickets.get('SCAN2') is not None) == (expected == 'used')
+        print("✅ Ticket accepted exactly once")
+    finally:
+        ticket_system.db_manager = original_manager
+        ticket_system.used_tickets.clear()
+
+if __name__ == '__main__':
+    test_ticket_scan()
+    print("\n🎉 Test passed!")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the content-addressed, reference-counted upload store
+"""
+
+import io
+import os
+import sys
+import hashlib
+import tempfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import upload_store
+from app import app
+from temp_database import temp_database
+
+def ref_count(manager, url):
+    rows = manager.execute_query("SELECT RefCount FROM upload_blobs WHERE Hash = ?", [upload_store.parse_blob_url(url)[0]])
+    return rows[0][0] if rows else None
+
+def test_upload_store():
+    """Test deduplication, reference counting, garbage collection and serving"""
+    store = upload_store.upload_store
+    original_directory = store.directory
+    store.directory = tempfile.mkdtemp()
+    try:
+        with temp_database(upload_store) as manager:
+            assert upload_store.install_upload_store()
+
+            # Larger than one chunk so hashing happens across reads
+            content = os.urandom(upload_store.CHUNK_SIZE * 3 + 17)
+            digest = hashlib.sha256(content).hexdigest()
+            first = store.save_stream(io.BytesIO(content), 'JPG')
+            second = store.save_stream(io.BytesIO(content), 'jpg')
+            assert first == second == f"/media/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+            assert ref_count(manager, first) == 2
+            stored = [name for _, _, names in os.walk(store.directory) for name in names]
+            assert stored == [f"{digest}.jpg"], stored
+            print(f"📦 Two uploads stored once as {first}")
+
+            other = store.save_stream(io.BytesIO(b'another picture'), 'png')
+            assert other != first
+
+            # Swapping a profile picture moves the reference
+            store.replace(first, other)
+            assert ref_count(manager, first) == 1 and ref_count(manager, other) == 2
+            store.replace(other, other, counted=True)
+            assert ref_count(manager, other) == 1
+            assert store.release('/static/uploads/legacy.jpg') is None
+
+            with app.test_client() as client:
+                response = client.get(first)
+                assert response.status_code == 200 and response.data == content
+                assert 'immutable' in response.headers['Cache-Control']
+                assert response.headers['ETag'] == f'"{digest}"'
+                assert client.get(first, headers={'If-None-Match': f'"{digest}"'}).status_code == 304
+                assert client.get(f"/media/00/00/{digest}.jpg").status_code == 404
+                assert client.get("/media/../..%2fapp.py/x").status_code == 404
+
+            # A file placed by a request that rolls back is left unreferenced
+            with app.test_request_context('/upload', method='POST'):
+                app.preprocess_request()
+                orphan = store.save_stream(io.BytesIO(b'rolled back picture'), 'png')
+                app.process_response(app.response_class('x', status=500))
+            assert ref_count(manager, orphan) == 0 and os.path.exists(store.local_path(orphan))
+
+            # Unreferenced blobs survive until the grace period is over
+            assert store.release(first) == 0
+            assert store.collect_garbage() == 0
+            assert store.collect_garbage(grace_seconds=-1) == 2
+            assert not os.path.exists(store.local_path(first)) and not os.path.exists(store.local_path(orphan))
+            assert os.path.exists(store.local_path(other))
+            print("✅ Uploads are deduplicated, reference counted and served immutably")
+    finally:
+        store.directory = original_directory
+
+if __name__ == '__main__':
+    test_upload_store()
+    print("\n🎉 Test passed!")
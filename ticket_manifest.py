@@ -0,0 +1,65 @@
+"""
+Offline scanner manifests for SuliStreetMeet ticketing
+
+A manifest is the set of valid ticket IDs for one event, packed as a sorted
+array of fixed-width ASCII records so a scanner can binary-search it without
+parsing. The server signs (event, time, content digest) with the app's
+SECRET_KEY; scanners send those fields back when syncing so the server can
+tell its own manifests from forged or stale ones.
+"""
+
+import hmac
+import time
+import base64
+import hashlib
+from database_manager_hybrid import db_manager
+
+# Manifests older than this are still accepted but reported as stale
+MANIFEST_MAX_AGE = 6 * 60 * 60
+
+
+def pack_ticket_ids(ticket_ids):
+    """Sorted, space-padded fixed-width records; returns (bytes, width)"""
+    ids = [str(ticket_id) for ticket_id in ticket_ids]
+    width = max((len(ticket_id) for ticket_id in ids), default=0)
+    records = sorted(ticket_id.ljust(width) for ticket_id in ids)
+    return ''.join(records).encode('ascii'), width
+
+
+def sign_manifest(secret_key, event_id, generated_at, digest):
+    message = f"{event_id}|{generated_at}|{digest}".encode()
+    return hmac.new(secret_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def build_manifest(event_id, secret_key):
+    """Signed manifest of the valid tickets of an event, as a JSON-ready dict"""
+    rows = db_manager.execute_query(
+        "SELECT TicketID FROM tickets WHERE EventID = ? AND Status = 'valid'",
+        [event_id]
+    )
+    packed, width = pack_ticket_ids(row[0] for row in rows)
+    digest = hashlib.sha256(packed).hexdigest()
+    generated_at = int(time.time())
+    return {
+        'event_id': event_id,
+        'generated_at': generated_at,
+        'count': len(rows),
+        'width': width,
+        'ids': base64.b64encode(packed).decode('ascii'),
+        'digest': digest,
+        'signature': sign_manifest(secret_key, event_id, generated_at, digest),
+    }
+
+
+def verify_manifest(secret_key, event_id, manifest):
+    """Check a manifest header sent back by a scanner
+
+    Returns (valid, age_in_seconds).
+    """
+    try:
+        generated_at = int(manifest['generated_at'])
+        expected = sign_manifest(secret_key, event_id, generated_at, manifest['digest'])
+    except (KeyError, TypeError, ValueError):
+        return False, None
+    valid = hmac.compare_digest(expected, str(manifest.get('signature', '')))
+    return valid, int(time.time()) - generated_at
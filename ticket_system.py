@@ -3,14 +3,28 @@ import qrcode
 import io
 import secrets
 import base64
+import threading
+from functools import partial
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from flask import Blueprint, render_template, request, jsonify, flash, session, send_file, redirect, url_for, Response
+from flask import Blueprint, render_template, request, jsonify, flash, session, send_file, redirect, url_for, Response, current_app
 from database_manager_hybrid import db_manager
+from database_session import after_commit
+from dashboard_stats import dashboard_stats, TICKET_STATS_QUERY
+from qr_cache import qr_image_cache, qr_cache_key, render_qr_png
+from ticket_batch import issue_ticket_batch, MAX_BATCH_TICKETS
+from permissions_manager import require_admin, require_permission
+from ticket_manifest import build_manifest, verify_manifest, MANIFEST_MAX_AGE
+from pagination import encode_cursor, decode_cursor
 from PIL import Image
 
 # Create blueprint for ticket system
 ticket_bp = Blueprint('ticket', __name__)
 
+# Allowed range for the box_size render parameter of ticket QR images
+QR_MIN_BOX_SIZE = 2
+QR_MAX_BOX_SIZE = 20
+
 # Initialize ticket database table
 def init_ticket_table():
     """Initialize the tickets table if it doesn't exist"""
@@ -144,6 +158,39 @@ def purchase_ticket(event_id):
                          buyer_name=session.get('username', ''),
                          buyer_email='')
 
+@ticket_bp.route('/api/issue_batch', methods=['POST'])
+@require_admin
+def issue_batch():
+    """Issue many tickets for one event and download their QR codes as a ZIP"""
+    data = request.get_json(silent=True) or request.form
+    try:
+        event_id = int(data.get('event_id'))
+        count = int(data.get('count', 1))
+        price = float(data.get('price', 0) or 0)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'event_id, count and price must be numbers'}), 400
+
+    if count < 1 or count > MAX_BATCH_TICKETS:
+        return jsonify({'success': False, 'error': f'Count must be between 1 and {MAX_BATCH_TICKETS}'}), 400
+
+    buyer_name = (data.get('buyer_name') or '').strip() or 'Guest'
+    buyer_email = (data.get('buyer_email') or '').strip() or 'guest@example.com'
+    buyer_phone = (data.get('buyer_phone') or '').strip()
+
+    if not db_manager.execute_query("SELECT EventID FROM events WHERE EventID = ?", [event_id]):
+        return jsonify({'success': False, 'error': 'Event not found'}), 404
+
+    try:
+        ticket_ids, archive = issue_ticket_batch(event_id, count, buyer_name, buyer_email, buyer_phone, price)
+    except Exception as e:
+        print(f"Error issuing ticket batch: {e}")
+        return jsonify({'success': False, 'error': 'Error issuing tickets'}), 500
+
+    return send_file(io.BytesIO(archive),
+                     mimetype='application/zip',
+                     as_attachment=True,
+                     download_name=f'tickets_event_{event_id}.zip')
+
 @ticket_bp.route('/ticket/<ticket_id>')
 def view_ticket(ticket_id):
     """Display ticket details"""
@@ -180,9 +227,14 @@ def view_ticket(ticket_id):
 
 @ticket_bp.route('/ticket/qr/<ticket_id>')
 def get_qr_code(ticket_id):
-    """Serve QR code image - generated on demand"""
+    """Serve QR code image - rendered once, then served from the QR cache"""
     try:
-        # Verify ticket exists
+        box_size = max(QR_MIN_BOX_SIZE, min(request.args.get('box_size', 10, type=int), QR_MAX_BOX_SIZE))
+        key = qr_cache_key(ticket_id, box_size=box_size)
+
+        # Checked on every request, so a cached image or a client's ETag never
+        # outlives its ticket; the ticket ID is what grants access, as on
+        # view_ticket
         ticket = db_manager.execute_query("""
             SELECT TicketID FROM tickets WHERE TicketID = ?
         """, [ticket_id])
@@ -190,50 +242,136 @@ def get_qr_code(ticket_id):
         if not ticket:
             return Response("Ticket not found", status=404, mimetype='text/plain')
 
-        # Generate QR code on the fly
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(f"TICKET:{ticket_id}")
-        qr.make(fit=True)
-
-        # Create QR code image
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        # Convert PIL image to bytes
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        buffer.seek(0)
-        image_bytes = buffer.getvalue()
-
-        # Return as downloadable file
-        response = Response(image_bytes, mimetype='image/png')
-        response.headers.set('Content-Disposition', f'attachment; filename=ticket_{ticket_id}.png')
-        response.headers.set('Content-Type', 'image/png')
+        # The image for a given key never changes, so a matching ETag is final
+        if key in request.if_none_match:
+            response = Response(status=304)
+        else:
+            image_bytes = qr_image_cache.get(key)
+            if image_bytes is None:
+                image_bytes = render_qr_png(f"TICKET:{ticket_id}", box_size=box_size)
+                qr_image_cache.put(key, image_bytes)
+
+            # Return as downloadable file
+            response = Response(image_bytes, mimetype='image/png')
+            response.headers.set('Content-Disposition', f'attachment; filename=ticket_{ticket_id}.png')
+
+        response.set_etag(key)
+        # The QR is the ticket itself: browsers may keep it, shared caches must not
+        response.headers.set('Cache-Control', 'private, max-age=31536000, immutable')
         return response
 
     except Exception as e:
         print(f"Error serving QR code: {e}")
         return Response("Error loading QR code", status=500, mimetype='text/plain')
 
+class UsedTicketCache:
+    """
+    In-memory record of tickets this process has seen used, grouped by event.
+
+    "used" is final, so a hit can reject a repeat scan without touching the
+    database. The database update stays the source of truth: a miss always
+    goes through the atomic check-and-mark below. Only the most recently
+    scanned events are kept.
+    """
+
+    def __init__(self, max_events=20):
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._events = OrderedDict()
+        self._tickets = {}
+
+    def get(self, ticket_id):
+        """(event_id, details) for a known used ticket, or None"""
+        with self._lock:
+            return self._tickets.get(ticket_id)
+
+    def add(self, event_id, ticket_id, details):
+        with self._lock:
+            tickets = self._events.get(event_id)
+            if tickets is None:
+                tickets = self._events[event_id] = set()
+                while len(self._events) > self.max_events:
+                    _, evicted = self._events.popitem(last=False)
+                    for evicted_id in evicted:
+                        self._tickets.pop(evicted_id, None)
+            else:
+                self._events.move_to_end(event_id)
+            tickets.add(ticket_id)
+            self._tickets[ticket_id] = (event_id, details)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self._tickets.clear()
+
+used_tickets = UsedTicketCache()
+
+def _used_ticket_response(details):
+    return jsonify({
+        'success': False,
+        'error': 'Ticket has already been used',
+        'ticket': dict(details, status='used')
+    })
+
 @ticket_bp.route('/api/scan_ticket', methods=['POST'])
 def scan_ticket():
-    """API endpoint for scanning tickets"""
+    """API endpoint for scanning tickets
+
+    The ticket is checked and marked used by one conditional UPDATE, so two
+    gates scanning the same ticket at once cannot both accept it.
+    """
     try:
         data = request.get_json()
         ticket_id = data.get('ticket_id', '').replace('TICKET:', '')
+        event_id = data.get('event_id')
 
         if not ticket_id:
             return jsonify({'success': False, 'error': 'Invalid ticket ID'})
 
-        # Get ticket details
+        known = used_tickets.get(ticket_id)
+        if known is not None and (not event_id or str(known[0]) == str(event_id)):
+            return _used_ticket_response(known[1])
+
+        # Mark ticket as used, if and only if it is still valid
+        scanned_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        update_query = """
+            UPDATE tickets
+            SET Status = 'used', ScannedAt = ?, ScannedBy = ?
+            WHERE TicketID = ? AND Status = 'valid'
+        """
+        params = [scanned_at, session.get('username', 'Scanner'), ticket_id]
+        if event_id:
+            update_query += " AND EventID = ?"
+            params.append(event_id)
+        update_query += """
+            RETURNING TicketID, BuyerName, EventID,
+                (SELECT Title FROM events WHERE events.EventID = tickets.EventID),
+                (SELECT EventDate FROM events WHERE events.EventID = tickets.EventID)
+        """
+        marked = db_manager.execute_query(update_query, params)
+
+        if marked:
+            ticket = marked[0]
+            details = {
+                'id': ticket[0],
+                'buyer_name': ticket[1],
+                'event_name': ticket[3],
+                'event_date': ticket[4],
+                'scanned_at': scanned_at
+            }
+            # Cached only once committed; a failed commit leaves the ticket valid
+            after_commit(partial(used_tickets.add, ticket[2], ticket[0], details))
+            return jsonify({
+                'success': True,
+                'message': 'Ticket validated successfully',
+                'ticket': details
+            })
+
+        # Rejected: find out why (slow path, only for bad scans)
         ticket = db_manager.execute_query("""
-            SELECT t.*, e.Title as EventName, e.EventDate
+            SELECT t.TicketID, t.BuyerName, t.EventID, t.Status, t.ScannedAt, e.Title
             FROM tickets t
-            JOIN events e ON t.EventID = e.EventID
+            LEFT JOIN events e ON t.EventID = e.EventID
             WHERE t.TicketID = ?
         """, [ticket_id])
 
@@ -241,99 +379,258 @@ def scan_ticket():
             return jsonify({'success': False, 'error': 'Ticket not found'})
 
         ticket = ticket[0]
+        details = {
+            'id': ticket[0],
+            'buyer_name': ticket[1],
+            'event_name': ticket[5],
+            'status': ticket[3]
+        }
 
-        # Check ticket status
-        if ticket[8] == 'used':  # Status is at index 8
-            return jsonify({
-                'success': False,
-                'error': 'Ticket has already been used',
-                'ticket': {
-                    'id': ticket[0],
-                    'buyer_name': ticket[2],
-                    'event_name': ticket[9],  # EventName
-                    'status': ticket[8],
-                    'scanned_at': ticket[9] if len(ticket) > 9 else None
-                }
-            })
+        if event_id and str(ticket[2]) != str(event_id):
+            return jsonify({'success': False, 'error': 'Ticket is for a different event', 'ticket': details})
 
-        if ticket[8] == 'expired':
-            return jsonify({
-                'success': False,
-                'error': 'Ticket has expired',
-                'ticket': {
-                    'id': ticket[0],
-                    'buyer_name': ticket[2],
-                    'event_name': ticket[9],
-                    'status': ticket[8]
-                }
-            })
+        if ticket[3] == 'used':
+            details['scanned_at'] = ticket[4]
+            after_commit(partial(used_tickets.add, ticket[2], ticket[0], details))
+            return _used_ticket_response(details)
 
-        # Mark ticket as used
-        scanned_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        update_query = """
-            UPDATE tickets
-            SET Status = 'used', ScannedAt = ?, ScannedBy = ?
-            WHERE TicketID = ?
-        """
+        if ticket[3] == 'expired':
+            return jsonify({'success': False, 'error': 'Ticket has expired', 'ticket': details})
 
-        db_manager.execute_query(update_query, [
-            scanned_at,
-            session.get('username', 'Scanner'),
-            ticket_id
-        ])
+        return jsonify({'success': False, 'error': f'Ticket is {ticket[3]}', 'ticket': details})
+
+    except Exception as e:
+        print(f"Error scanning ticket: {e}")
+        return jsonify({'success': False, 'error': 'Server error'})
+
+MAX_SYNC_SCANS = 5000
+
+@ticket_bp.route('/api/events/<int:event_id>/manifest')
+@require_permission('post_events')
+def scan_manifest(event_id):
+    """Signed list of valid ticket IDs for offline scanning"""
+    try:
+        manifest = build_manifest(event_id, current_app.config['SECRET_KEY'])
+        # The digest identifies the ticket set; an unchanged set needs no download
+        if manifest['digest'] in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = jsonify(manifest)
+        response.set_etag(manifest['digest'])
+        response.headers.set('Cache-Control', 'private, no-cache')
+        return response
+    except Exception as e:
+        print(f"Error building scan manifest: {e}")
+        return jsonify({'success': False, 'error': 'Server error'}), 500
+
+def _scan_time(value):
+    """Normalize a scanner timestamp to the format stored in ScannedAt"""
+    try:
+        scanned = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        if scanned.tzinfo is not None:
+            scanned = scanned.astimezone().replace(tzinfo=None)
+        return scanned.strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+@ticket_bp.route('/api/scan_sync', methods=['POST'])
+@require_permission('post_events')
+def scan_sync():
+    """Apply a batch of offline scans and report the ones that conflict
+
+    Scans are applied in the order they happened. Each one uses the same
+    conditional update as scan_ticket, so a ticket already used online or at
+    another gate is reported as a conflict instead of being overwritten.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        event_id = int(data.get('event_id'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'event_id is required'}), 400
+
+    scans = data.get('scans') or []
+    if not isinstance(scans, list) or len(scans) > MAX_SYNC_SCANS:
+        return jsonify({'success': False, 'error': f'Send between 0 and {MAX_SYNC_SCANS} scans per batch'}), 400
+
+    manifest_valid, manifest_age = verify_manifest(current_app.config['SECRET_KEY'], event_id, data.get('manifest') or {})
+    if not manifest_valid:
+        return jsonify({'success': False, 'error': 'Unknown or forged manifest'}), 400
+
+    try:
+        accepted = []
+        conflicts = []
+        seen = set()
+        scanner = session.get('username', 'Scanner')
+        ordered = sorted(
+            (dict(scan, scanned_at=_scan_time(scan.get('scanned_at'))) for scan in scans if scan.get('ticket_id')),
+            key=lambda scan: scan['scanned_at']
+        )
+
+        for scan in ordered:
+            ticket_id = str(scan['ticket_id']).replace('TICKET:', '')
+            if ticket_id in seen:
+                conflicts.append({'ticket_id': ticket_id, 'scanned_at': scan['scanned_at'], 'reason': 'duplicate_in_batch'})
+                continue
+            seen.add(ticket_id)
+
+            marked = db_manager.execute_query("""
+                UPDATE tickets
+                SET Status = 'used', ScannedAt = ?, ScannedBy = ?
+                WHERE TicketID = ? AND EventID = ? AND Status = 'valid'
+                RETURNING TicketID, BuyerName
+            """, [scan['scanned_at'], scan.get('scanner') or scanner, ticket_id, event_id])
+
+            if marked:
+                accepted.append(ticket_id)
+                after_commit(partial(used_tickets.add, event_id, ticket_id, {
+                    'id': ticket_id,
+                    'buyer_name': marked[0][1],
+                    'scanned_at': scan['scanned_at']
+                }))
+                continue
+
+            conflicts.append(dict(_sync_conflict(ticket_id, event_id), scanned_at=scan['scanned_at']))
 
         return jsonify({
             'success': True,
-            'message': 'Ticket validated successfully',
-            'ticket': {
-                'id': ticket[0],
-                'buyer_name': ticket[2],
-                'event_name': ticket[9],
-                'event_date': ticket[10],
-                'scanned_at': scanned_at
-            }
+            'accepted': accepted,
+            'conflicts': conflicts,
+            'manifest_stale': manifest_age > MANIFEST_MAX_AGE
         })
 
     except Exception as e:
-        print(f"Error scanning ticket: {e}")
-        return jsonify({'success': False, 'error': 'Server error'})
+        print(f"Error syncing offline scans: {e}")
+        return jsonify({'success': False, 'error': 'Server error'}), 500
+
+def _sync_conflict(ticket_id, event_id):
+    """Why an offline scan could not be applied"""
+    ticket = db_manager.execute_query(
+        "SELECT EventID, Status, ScannedAt, ScannedBy FROM tickets WHERE TicketID = ?",
+        [ticket_id]
+    )
+    if not ticket:
+        return {'ticket_id': ticket_id, 'reason': 'not_found'}
+    ticket = ticket[0]
+    if str(ticket[0]) != str(event_id):
+        return {'ticket_id': ticket_id, 'reason': 'wrong_event'}
+    if ticket[1] == 'used':
+        return {'ticket_id': ticket_id, 'reason': 'already_used', 'server_scanned_at': ticket[2], 'server_scanned_by': ticket[3]}
+    return {'ticket_id': ticket_id, 'reason': ticket[1]}
 
 @ticket_bp.route('/scan_ticket')
 def scan_ticket_page():
     """Display ticket scanning page"""
-    return render_template('scan_ticket.html')
+    try:
+        # Events a scanner can download an offline ticket list for
+        events = db_manager.execute_query(
+            "SELECT EventID, Title, EventDate FROM events WHERE EventDate >= date('now', '-1 day') ORDER BY EventDate"
+        )
+    except Exception as e:
+        print(f"Error loading scanner events: {e}")
+        events = []
+    return render_template('scan_ticket.html', events=events)
+
+# Ticket dashboard listing
+TICKET_STATUSES = ('valid', 'used', 'expired')
+DASHBOARD_PAGE_SIZE = 25
+DASHBOARD_MAX_PAGE_SIZE = 100
+
+def encode_ticket_cursor(ticket):
+    """Opaque cursor for a ticket row, positioned on (PurchaseDate, TicketID)"""
+    # get_ticket_page appends PurchaseDate as the last column
+    return encode_cursor([ticket[-1], ticket[0]])
+
+def decode_ticket_cursor(cursor):
+    """(PurchaseDate, TicketID) from a cursor, or None if it is malformed"""
+    return decode_cursor(cursor, 2)
+
+def get_ticket_page(event_id=None, status=None, before=None, after=None, per_page=DASHBOARD_PAGE_SIZE):
+    """One page of tickets, newest first, using keyset pagination
+
+    before/after are decoded cursors. Returns (tickets, has_newer, has_older).
+    """
+    conditions = []
+    params = []
+    if event_id:
+        conditions.append("t.EventID = ?")
+        params.append(event_id)
+    if status:
+        conditions.append("t.Status = ?")
+        params.append(status)
+
+    # Paging backwards walks the index in ascending order and flips the rows
+    if after:
+        conditions.append("(t.PurchaseDate, t.TicketID) > (?, ?)")
+        params.extend(after)
+        order = "ASC"
+    else:
+        if before:
+            conditions.append("(t.PurchaseDate, t.TicketID) < (?, ?)")
+            params.extend(before)
+        order = "DESC"
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    params.append(per_page + 1)
+    tickets = db_manager.execute_query(f"""
+        SELECT t.*, e.Title as EventName, e.EventDate, e.Location, t.PurchaseDate
+        FROM tickets t
+        LEFT JOIN events e ON t.EventID = e.EventID
+        {where}
+        ORDER BY t.PurchaseDate {order}, t.TicketID {order}
+        LIMIT ?
+    """, params) or []
+
+    has_more = len(tickets) > per_page
+    tickets = tickets[:per_page]
+    if after:
+        tickets.reverse()
+        return tickets, has_more, True
+    return tickets, bool(before), has_more
+
+def get_ticket_stats(event_id=None):
+    """Status counts and revenue, aggregated in SQL"""
+    if not event_id:
+        stats = dashboard_stats.get()
+        return {key: stats[key] for key in ('total_tickets', 'valid_tickets', 'used_tickets', 'expired_tickets', 'total_revenue')}
+
+    row = db_manager.execute_query(TICKET_STATS_QUERY + " WHERE EventID = ?", [event_id])[0]
+    return {
+        'total_tickets': row[0],
+        'valid_tickets': row[1] or 0,
+        'used_tickets': row[2] or 0,
+        'expired_tickets': row[3] or 0,
+        'total_revenue': row[4] or 0,
+    }
 
 @ticket_bp.route('/dashboard')
 def ticket_dashboard():
     """Modern ticket dashboard with overview and analytics"""
-    try:
-        # Get all tickets with event details
-        tickets = db_manager.execute_query("""
-            SELECT t.*, e.Title as EventName, e.EventDate, e.Location
-            FROM tickets t
-            LEFT JOIN events e ON t.EventID = e.EventID
-            ORDER BY t.PurchaseDate DESC
-        """)
+    event_id = request.args.get('event_id', type=int)
+    status = request.args.get('status')
+    if status not in TICKET_STATUSES:
+        status = None
+    per_page = max(1, min(request.args.get('per_page', DASHBOARD_PAGE_SIZE, type=int), DASHBOARD_MAX_PAGE_SIZE))
+    before = decode_ticket_cursor(request.args['before']) if request.args.get('before') else None
+    after = decode_ticket_cursor(request.args['after']) if request.args.get('after') else None
 
-        # Calculate statistics
-        total_tickets = len(tickets) if tickets else 0
-        valid_tickets = len([t for t in tickets if t[8] == 'valid']) if tickets else 0
-        used_tickets = len([t for t in tickets if t[8] == 'used']) if tickets else 0
-        expired_tickets = len([t for t in tickets if t[8] == 'expired']) if tickets else 0
-
-        # Get recent tickets (last 10)
-        recent_tickets = tickets[:10] if tickets else []
+    try:
+        stats = get_ticket_stats(event_id)
+        tickets, has_newer, has_older = get_ticket_page(event_id, status, before, after, per_page)
+        events = db_manager.execute_query("SELECT EventID, Title FROM events ORDER BY EventDate DESC")
 
-        # Calculate revenue
-        total_revenue = sum(float(t[5]) for t in tickets if t[5]) if tickets else 0
+        filters = {'event_id': event_id, 'status': status, 'per_page': per_page}
+        newer_url = url_for('ticket.ticket_dashboard', after=encode_ticket_cursor(tickets[0]), **filters) if tickets and has_newer else None
+        older_url = url_for('ticket.ticket_dashboard', before=encode_ticket_cursor(tickets[-1]), **filters) if tickets and has_older else None
 
         return render_template('ticket_dashboard.html',
-                             tickets=recent_tickets,
-                             total_tickets=total_tickets,
-                             valid_tickets=valid_tickets,
-                             used_tickets=used_tickets,
-                             expired_tickets=expired_tickets,
-                             total_revenue=total_revenue)
+                             tickets=tickets,
+                             events=events,
+                             selected_event=event_id,
+                             selected_status=status,
+                             statuses=TICKET_STATUSES,
+                             newer_url=newer_url,
+                             older_url=older_url,
+                             **stats)
 
     except Exception as e:
         print(f"Error loading ticket dashboard: {e}")
@@ -0,0 +1,274 @@
+"""
+Content-addressed store for uploaded files
+
+Every upload is hashed with SHA-256 while it is copied to disk and stored
+once under its hash in a sharded directory tree (ab/cd/<hash>.<ext>), so
+identical files are kept a single time and a stored file never changes. The
+upload_blobs table counts the database rows referring to each blob; blobs
+nobody refers to any more are removed by collect_garbage() once a grace
+period has passed. Blobs are served from /media/ with year-long immutable
+cache headers.
+"""
+
+import os
+import re
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from flask import Blueprint, Response, request, send_from_directory
+from database_manager_hybrid import db_manager
+from database_session import after_rollback
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_STORE_DIR = os.environ.get(
+    'UPLOAD_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media')
+)
+MEDIA_URL = '/media'
+CHUNK_SIZE = 64 * 1024
+# Unreferenced blobs are kept this long in case an upload is re-referenced
+GC_GRACE_SECONDS = 3600
+
+# Largest accepted upload of each kind, in bytes
+UPLOAD_LIMITS = {
+    'profile_picture': 5 * 1024 * 1024,
+    'vehicle_photo': 40 * 1024 * 1024,
+    'card_photo': 10 * 1024 * 1024,
+}
+
+BLOB_NAME_RE = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]{1,8}$')
+BLOB_URL_RE = re.compile(r'^/media/([0-9a-f]{2})/([0-9a-f]{2})/(([0-9a-f]{64})\.([a-z0-9]{1,8}))$')
+
+media_bp = Blueprint('media', __name__)
+
+
+class UploadTooLarge(ValueError):
+    """Upload is larger than the limit for its kind"""
+
+
+def install_upload_store():
+    """Create the upload_blobs reference count table"""
+    if db_manager.db_type == 'sqlite':
+        statement = '''
+            CREATE TABLE IF NOT EXISTS upload_blobs (
+                Hash TEXT PRIMARY KEY,
+                Ext TEXT NOT NULL,
+                Size INTEGER NOT NULL,
+                RefCount INTEGER NOT NULL DEFAULT 0,
+                CreatedAt REAL NOT NULL,
+                ReleasedAt REAL
+            )
+        '''
+    else:
+        statement = '''
+            CREATE TABLE IF NOT EXISTS upload_blobs (
+                "Hash" TEXT PRIMARY KEY,
+                "Ext" TEXT NOT NULL,
+                "Size" BIGINT NOT NULL,
+                "RefCount" INTEGER NOT NULL DEFAULT 0,
+                "CreatedAt" DOUBLE PRECISION NOT NULL,
+                "ReleasedAt" DOUBLE PRECISION
+            )
+        '''
+    try:
+        with db_manager.get_db_connection() as conn:
+            conn.cursor().execute(statement)
+            conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Error creating upload_blobs table: {e}")
+        return False
+
+
+def parse_blob_url(url):
+    """(hash, ext) of a /media/ URL, or None for anything else"""
+    match = BLOB_URL_RE.match(url or '')
+    if not match or match.group(4)[:2] != match.group(1) or match.group(4)[2:4] != match.group(2):
+        return None
+    return match.group(4), match.group(5)
+
+
+class UploadStore:
+    """
+    Deduplicating, reference-counted blob store on the local filesystem.
+
+    Temporary files are written inside the store directory so a finished
+    upload is moved into place with an atomic rename.
+    """
+
+    def __init__(self, directory=UPLOAD_STORE_DIR):
+        self.directory = directory
+
+    def _relative_path(self, digest, ext):
+        return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+    def path(self, digest, ext):
+        return os.path.join(self.directory, digest[:2], digest[2:4], f"{digest}.{ext}")
+
+    def url(self, digest, ext):
+        return f"{MEDIA_URL}/{self._relative_path(digest, ext)}"
+
+    def local_path(self, url):
+        """Filesystem path of a blob URL, or None if it is not a blob URL"""
+        parsed = parse_blob_url(url)
+        return self.path(*parsed) if parsed else None
+
+    def open_temp(self):
+        """New temporary file inside the store; returns (path, file object)"""
+        tmp_dir = os.path.join(self.directory, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, f"{os.getpid()}.{threading.get_ident()}.{time.monotonic_ns()}.tmp")
+        return tmp_path, open(tmp_path, 'wb')
+
+    def save_stream(self, stream, ext, max_bytes=None):
+        """Copy a stream into the store, hashing it on the way; returns the blob URL
+
+        The new reference is counted, so the caller should record the URL.
+        Raises UploadTooLarge as soon as more than max_bytes have been read.
+        """
+        tmp_path, tmp_file = self.open_temp()
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with tmp_file:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+            return self.commit_temp(tmp_path, digest.hexdigest(), ext, size)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def commit_temp(self, tmp_path, digest, ext, size):
+        """Move a fully written, already hashed temp file into the store"""
+        ext = ext.lower().lstrip('.')
+        path = self.path(digest, ext)
+        if os.path.exists(path):
+            # Same content is already stored: keep the existing, identical file
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        self._add_ref(digest, ext, size)
+        after_rollback(lambda: self._record_unreferenced(digest, ext, size))
+        return self.url(digest, ext)
+
+    def _record_unreferenced(self, digest, ext, size):
+        # The reference was rolled back, so the file may have no row at all;
+        # an unreferenced row lets collect_garbage remove it after the grace
+        # period, unless another upload of the same content counts it first
+        db_manager.execute_query("""
+            INSERT INTO upload_blobs (Hash, Ext, Size, RefCount, CreatedAt, ReleasedAt) VALUES (?, ?, ?, 0, ?, ?)
+            ON CONFLICT (Hash) DO NOTHING
+        """, [digest, ext, size, time.time(), time.time()])
+
+    def _add_ref(self, digest, ext, size):
+        db_manager.execute_query("""
+            INSERT INTO upload_blobs (Hash, Ext, Size, RefCount, CreatedAt) VALUES (?, ?, ?, 1, ?)
+            ON CONFLICT (Hash) DO UPDATE SET RefCount = upload_blobs.RefCount + 1, ReleasedAt = NULL
+        """, [digest, ext, size, time.time()])
+
+    def add_ref(self, url):
+        """Count one more reference to a stored blob; other URLs are ignored"""
+        parsed = parse_blob_url(url)
+        if not parsed:
+            return False
+        return bool(db_manager.execute_query(
+            "UPDATE upload_blobs SET RefCount = RefCount + 1, ReleasedAt = NULL WHERE Hash = ?",
+            [parsed[0]]
+        ))
+
+    def release(self, url):
+        """Drop one reference to a blob; returns the references left, or None"""
+        parsed = parse_blob_url(url)
+        if not parsed:
+            return None
+        rows = db_manager.execute_query("""
+            UPDATE upload_blobs
+            SET RefCount = RefCount - 1,
+                ReleasedAt = CASE WHEN RefCount = 1 THEN ? ELSE ReleasedAt END
+            WHERE Hash = ? AND RefCount > 0
+            RETURNING RefCount
+        """, [time.time(), parsed[0]])
+        return rows[0][0] if rows else None
+
+    def replace(self, old_url, new_url, counted=False):
+        """Move a column's reference from old_url to new_url once its row is updated
+
+        counted says the reference to new_url was already counted by
+        save_stream, as it is for a fresh upload.
+        """
+        if old_url == new_url:
+            if counted:
+                self.release(new_url)
+            return
+        if not counted:
+            self.add_ref(new_url)
+        self.release(old_url)
+
+    def collect_garbage(self, grace_seconds=GC_GRACE_SECONDS):
+        """Delete blobs that have had no references for grace_seconds"""
+        cutoff = time.time() - grace_seconds
+        rows = db_manager.execute_query(
+            "DELETE FROM upload_blobs WHERE RefCount <= 0 AND ReleasedAt < ? RETURNING Hash, Ext",
+            [cutoff]
+        ) or []
+        for digest, ext in rows:
+            try:
+                os.remove(self.path(digest, ext))
+            except FileNotFoundError:
+                pass
+        if rows:
+            logger.info(f"Removed {len(rows)} unreferenced upload blobs")
+        return len(rows)
+
+
+# Global upload store instance
+upload_store = UploadStore()
+
+
+@media_bp.route('/media/<shard1>/<shard2>/<name>')
+def media(shard1, shard2, name):
+    """Serve a stored blob; its content never changes, so it is cached for a year"""
+    parsed = parse_blob_url(f"{MEDIA_URL}/{shard1}/{shard2}/{name}")
+    if not parsed or not BLOB_NAME_RE.match(name):
+        return Response("Not found", status=404, mimetype='text/plain')
+
+    digest = parsed[0]
+    if digest in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = send_from_directory(upload_store.directory, f"{shard1}/{shard2}/{name}",
+                                       etag=digest, conditional=False)
+    response.set_etag(digest)
+    response.headers.set('Cache-Control', 'public, max-age=31536000, immutable')
+    return response
+
+
+def init_app(app):
+    """Initialize the upload store and its media route"""
+    install_upload_store()
+    app.register_blueprint(media_bp)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed upload store")
+    parser.add_argument('--gc', action='store_true', help="Delete blobs no longer referenced")
+    parser.add_argument('--grace', type=int, default=GC_GRACE_SECONDS,
+                        help="Seconds an unreferenced blob is kept (default: %(default)s)")
+    args = parser.parse_args()
+    if args.gc:
+        install_upload_store()
+        print(f"Removed {upload_store.collect_garbage(args.grace)} unreferenced blobs")
+    else:
+        parser.print_help()
@@ -1,12 +1,20 @@
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, session
 from database_manager_hybrid import db_manager
-from permissions_manager import require_login
+from permissions_manager import PermissionManager, require_login
+from image_pipeline import save_image_upload, preload_variants, InvalidImage
+from upload_store import upload_store
+from chunked_upload import claim_upload
+import search_index
 import logging
 
 logger = logging.getLogger(__name__)
 
 vehicle_gallery_bp = Blueprint('vehicle_gallery', __name__)
 
+# Photo shown on a vehicle's gallery card, selected last in the gallery queries
+PRIMARY_PHOTO = """(SELECT PhotoURL FROM vehicle_photos
+                    WHERE VehicleID = v.id ORDER BY IsPrimary DESC, PhotoID LIMIT 1)"""
+
 @vehicle_gallery_bp.route('/vehicle_gallery')
 def vehicle_gallery():
     """Public vehicle gallery with filtering and search"""
@@ -15,13 +23,17 @@ def vehicle_gallery():
         search = request.args.get('search', '')
         make_filter = request.args.get('make', '')
         featured_only = request.args.get('featured', 'false').lower() == 'true'
-        sort_by = request.args.get('sort', 'newest')  # newest, oldest, most_liked, most_viewed
+        # newest, oldest, most_liked, most_viewed; searches default to relevance
+        sort_by = request.args.get('sort') or ('relevance' if search else 'newest')
+        if sort_by == 'relevance' and not search:
+            sort_by = 'newest'
 
         # Build query
-        query = """
+        query = f"""
         SELECT v.*, m.FirstName, m.LastName,
                COUNT(DISTINCT vp.PhotoID) as photo_count,
-               COUNT(DISTINCT l.LikeID) as like_count
+               COUNT(DISTINCT l.LikeID) as like_count,
+               {PRIMARY_PHOTO} as primary_photo
         FROM vehicles v
         LEFT JOIN members m ON v.OwnerID = m.MemberID
         LEFT JOIN vehicle_photos vp ON v.id = vp.VehicleID
@@ -33,9 +45,10 @@ def vehicle_gallery():
 
         # Add search filter
         if search:
-            query += " AND (v.Make LIKE ? OR v.Model LIKE ? OR v.Year LIKE ?)"
-            search_param = f'%{search}%'
-            params.extend([search_param, search_param, search_param])
+            vehicle_ids = search_index.search('vehicles', search)
+            condition, search_params = search_index.key_filter('v.id', vehicle_ids)
+            query += f" AND {condition}"
+            params.extend(search_params)
 
         # Add make filter
         if make_filter and make_filter != 'all':
@@ -59,13 +72,15 @@ def vehicle_gallery():
             query += " ORDER BY v.Views DESC"
 
         vehicles = db_manager.execute_query(query, params)
+        if sort_by == 'relevance':
+            vehicles = search_index.order_by_rank(vehicles, vehicle_ids)
 
         # Get unique makes for filter dropdown
         makes = db_manager.execute_query("SELECT DISTINCT Make FROM vehicles WHERE Make IS NOT NULL ORDER BY Make")
 
         # Get featured vehicles for showcase
-        featured_vehicles = db_manager.execute_query("""
-            SELECT v.*, COUNT(vp.PhotoID) as photo_count
+        featured_vehicles = db_manager.execute_query(f"""
+            SELECT v.*, COUNT(vp.PhotoID) as photo_count, {PRIMARY_PHOTO} as primary_photo
             FROM vehicles v
             LEFT JOIN vehicle_photos vp ON v.id = vp.VehicleID
             WHERE v.Featured = 1
@@ -74,6 +89,9 @@ def vehicle_gallery():
             LIMIT 6
         """)
 
+        # Variant lookups for every card photo in one query
+        preload_variants([vehicle[-1] for vehicle in list(vehicles) + list(featured_vehicles)])
+
         return render_template('vehicle_gallery.html',
                              vehicles=vehicles,
                              makes=makes,
@@ -107,6 +125,7 @@ def vehicle_detail(vehicle_id):
 
         # Get vehicle photos
         photos = db_manager.get_vehicle_photos(vehicle_id)
+        preload_variants([photo[2] for photo in photos])
 
         # Get comments
         comments = db_manager.get_comments('vehicle', vehicle_id)
@@ -217,6 +236,49 @@ def toggle_vehicle_favorite(vehicle_id):
         logger.error(f"Toggle favorite error: {e}")
         return jsonify({'success': False, 'error': 'Failed to toggle favorite'}), 500
 
+@vehicle_gallery_bp.route('/vehicle/<int:vehicle_id>/photos', methods=['POST'])
+@require_login
+def upload_vehicle_photo(vehicle_id):
+    """Add a photo to a vehicle; resized variants are generated in the background"""
+    detail_url = url_for('vehicle_gallery.vehicle_detail', vehicle_id=vehicle_id)
+    try:
+        owner = db_manager.execute_query("SELECT MemberID FROM vehicles WHERE id = ?", (vehicle_id,))
+        if not owner:
+            flash('Vehicle not found', 'error')
+            return redirect(url_for('vehicle_gallery.vehicle_gallery'))
+        user_id = session['user_id']
+        if owner[0][0] != user_id and not PermissionManager.has_permission(user_id, 'manage_vehicles'):
+            flash('You can only add photos to your own vehicles', 'error')
+            return redirect(detail_url)
+
+        caption = request.form.get('caption', '').strip() or None
+        is_primary = request.form.get('is_primary') == 'on'
+
+        # Large photos arrive through the chunked upload API beforehand
+        upload_id = request.form.get('upload_id')
+        file = request.files.get('photo')
+        if upload_id:
+            photo_url = claim_upload(upload_id, user_id, 'vehicle_photo')
+            if not photo_url:
+                flash('Upload not found or incomplete, please try again', 'error')
+                return redirect(detail_url)
+        elif file and file.filename:
+            photo_url = save_image_upload(file, 'vehicle_photo')
+        else:
+            flash('Please choose a photo to upload', 'error')
+            return redirect(detail_url)
+        if db_manager.add_vehicle_photo(vehicle_id, photo_url, caption, is_primary):
+            flash('Photo uploaded!', 'success')
+        else:
+            upload_store.release(photo_url)
+            flash('Error uploading photo', 'error')
+    except InvalidImage as e:
+        flash(f'Photo rejected: {e}', 'error')
+    except Exception as e:
+        logger.error(f"Upload vehicle photo error: {e}")
+        flash('Error uploading photo', 'error')
+    return redirect(detail_url)
+
 def init_app(app):
     """Initialize the vehicle gallery blueprint"""
     app.register_blueprint(vehicle_gallery_bp)